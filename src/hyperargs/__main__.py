@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/__main__.py
+'''
+Command line tools of HyperArgs.
+
+Usage:
+    python -m hyperargs sweep <module:ConfClass> --spec sweep.yaml --out out_dir [--base base.yaml]
+                              [--format json] [--workers N] [--chunk-size K]
+    python -m hyperargs serve <module:ConfClass> [--host 127.0.0.1] [--port 8000]
+'''
+
+from typing import List, Optional, Type
+import argparse
+import importlib
+import logging
+import sys
+
+from .conf import Conf
+
+
+def import_conf_class(reference: str) -> Type[Conf]:
+    """Import a configuration class from a 'package.module:ClassName' reference."""
+    module_name, sep, qualname = reference.partition(':')
+    if not sep or not module_name or not qualname:
+        raise ValueError(f"Expected a 'package.module:ClassName' reference, got '{reference}'")
+    obj = importlib.import_module(module_name)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    if not (isinstance(obj, type) and issubclass(obj, Conf)):
+        raise TypeError(f"'{reference}' is not a Conf subclass")
+    return obj
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m hyperargs', description='HyperArgs command line tools.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sweep = commands.add_parser('sweep', help='Validate and save every variant of a sweep, in parallel.')
+    sweep.add_argument('conf', help="The configuration class, as 'package.module:ClassName'.")
+    sweep.add_argument('--spec', required=True, help='The sweep spec file with grid, random, n and seed.')
+    sweep.add_argument('--out', required=True, help='The output directory.')
+    sweep.add_argument('--base', default=None, help='The base configuration file, defaults to the class defaults.')
+    sweep.add_argument('--format', default='json', choices=['json', 'toml', 'yaml', 'hargs'],
+                       help='The variant file format.')
+    sweep.add_argument('--workers', type=int, default=None, help='The number of worker processes, all CPUs by default.')
+    sweep.add_argument('--chunk-size', type=int, default=256, help='The number of variants per worker task.')
+
+    serve = commands.add_parser('serve', help='Serve the configurations of many jobs as JSON over HTTP.')
+    serve.add_argument('conf', help="The configuration class, as 'package.module:ClassName'.")
+    serve.add_argument('--host', default='127.0.0.1', help='The address to listen on.')
+    serve.add_argument('--port', type=int, default=8000, help='The port to listen on.')
+
+    args = parser.parse_args(argv)
+    if args.command == 'sweep':
+        from .sweep import materialize_sweep
+        manifest_path = materialize_sweep(
+            import_conf_class(args.conf),
+            spec=args.spec,
+            out_dir=args.out,
+            base=args.base,
+            file_format=args.format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+        print(f"Manifest written to {manifest_path}")
+    elif args.command == 'serve':
+        from .server import serve as serve_conf
+        logging.basicConfig(level=logging.INFO)
+        serve_conf(import_conf_class(args.conf), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,16 @@
 This module defines various argument types for hyperparameter management.
 '''
 
-from typing import Any, Optional, TypeVar, List, Generic, Union, Dict
+from typing import Any, Optional, TypeVar, List, Generic, Union, Dict, Tuple, NamedTuple, FrozenSet, TYPE_CHECKING
 from typing_extensions import Self, Callable
+import copy
+import math
 import os
-from copy import deepcopy
+import time
 
-from streamlit.delta_generator import DeltaGenerator
+if TYPE_CHECKING:
+    # Streamlit is only needed by the web GUI, it is imported on first use to keep `import hyperargs` light.
+    from streamlit.delta_generator import DeltaGenerator
 
 # JSON can be: object, array, string, number, boolean, or null
 JSON_VALUE = Union[str, int, float, bool, None]
@@ -23,11 +27,149 @@ ST_TAG = "$$这是filed✅$$"
 T = TypeVar("T")
 
 
+class ArgSpec(NamedTuple):
+    ''' The immutable settings of a `StrArg` or `BoolArg`. '''
+    allow_none: bool = False
+    env_bind: Optional[str] = None
+
+
+class NumberSpec(NamedTuple):
+    ''' The immutable settings of an `IntArg` or `FloatArg`. '''
+    allow_none: bool = False
+    env_bind: Optional[str] = None
+    min_value: Optional[Union[int, float]] = None
+    max_value: Optional[Union[int, float]] = None
+
+
+class OptionCache:
+    ''' Caches the options returned by an `option_fn`, shared by all the values parsed from the same `OptionArg`.
+
+    The options expire `ttl` seconds after they are fetched, never if `ttl` is None, and immediately if `ttl` is 0.
+    `hits` and `misses` count the lookups served from the cache and the calls to `option_fn`.
+    '''
+    __slots__ = ('option_fn', 'ttl', 'hits', 'misses', '_options', '_option_set', '_expires_at')
+
+    def __init__(self, option_fn: Callable[..., List[str]], ttl: Optional[float] = None):
+        self.option_fn = option_fn
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._options: Tuple[str, ...] = ()
+        self._option_set: FrozenSet[str] = frozenset()
+        self._expires_at: Optional[float] = -math.inf
+
+    def get(self) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+        ''' Get the options and their set, `option_fn` is called if they expired. '''
+        if self._expires_at is None or time.monotonic() < self._expires_at:
+            self.hits += 1
+        else:
+            self.misses += 1
+            options = tuple(self.option_fn())
+            self._options, self._option_set = options, frozenset(options)
+            self._expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        return self._options, self._option_set
+
+    def invalidate(self) -> None:
+        ''' Drop the cached options, so the next lookup calls `option_fn` again. '''
+        self._expires_at = -math.inf
+
+    def __repr__(self) -> str:
+        return f"OptionCache(ttl={self.ttl}, hits={self.hits}, misses={self.misses})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The cached options and the counters are not pickled, the options are fetched again after unpickling
+        return OptionCache, (self.option_fn, self.ttl)
+
+
+class OptionSpec(NamedTuple):
+    ''' The immutable settings of an `OptionArg`. '''
+    allow_none: bool = False
+    env_bind: Optional[str] = None
+    options: Tuple[str, ...] = ()
+    option_fn: Optional[Callable[..., List[str]]] = None
+    option_set: FrozenSet[str] = frozenset()
+    option_cache: Optional[OptionCache] = None
+
+
+class _SpecField:
+    ''' A setting read from the spec of an argument.
+
+    Subclasses written before the specs assign the settings in `__init__`, e.g. `self._allow_none = True`, such values
+    are kept in the instance `__dict__` and take precedence over the spec.
+    '''
+    __slots__ = ('name', 'field', 'default')
+
+    def __init__(self, field: str, default: Any):
+        self.field = field
+        self.default = default
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        state = getattr(obj, '__dict__', None)
+        if state and self.name in state:
+            return state[self.name]
+        spec = getattr(obj, '_spec', None)
+        return self.default if spec is None else getattr(spec, self.field)
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        state = getattr(obj, '__dict__', None)
+        if state is None:
+            raise AttributeError(f"'{type(obj).__name__}' object attribute '{self.name}' is read-only, it is set by "
+                                 "the spec")
+        state[self.name] = value
+
+
 class Arg(Generic[T]):
-    ''' Base class for all argument types. '''
+    ''' Base class for all argument types.
+
+    An argument is an immutable pair of a spec, shared by every value parsed from the same argument, and a value.
+    Parsing never modifies an argument, it returns a new one holding the parsed value.
+
+    The built-in arguments have no instance `__dict__`, so they are shared instead of copied. Subclasses with a
+    `__dict__`, i.e. without `__slots__`, may be modified in place, e.g. by `parse` methods that deep-copy the argument
+    and assign `_value`, so they are copied as usual.
+    '''
+    __slots__ = ('_spec', '_value')
+    _spec: Any
     _value: Optional[T]
-    _allow_none: bool
-    _env_bind: Optional[str]
+
+    _allow_none = _SpecField('allow_none', False)
+    _env_bind = _SpecField('env_bind', None)
+
+    def _new(self, value: Optional[T]) -> Self:
+        ''' Create an argument of the same type and spec that holds `value`. '''
+        if self.__class__.__dictoffset__:
+            result = self.__copy__()
+            result._value = value
+            return result
+        result = object.__new__(self.__class__)
+        result._spec = self._spec
+        result._value = value
+        return result
+
+    def __copy__(self) -> Self:
+        if not self.__class__.__dictoffset__:
+            # The built-in arguments are immutable, so copies can share the same object
+            return self
+        return _restore_arg(self.__class__, _arg_state(self))
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Self:
+        if not self.__class__.__dictoffset__:
+            return self
+        result = object.__new__(self.__class__)
+        memo[id(self)] = result
+        _set_arg_state(result, copy.deepcopy(_arg_state(self), memo))
+        return result
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        if self.__class__.__dictoffset__:
+            return _restore_arg, (self.__class__, _arg_state(self))
+        # Only the type, the spec and the value, the specs shared by several arguments are pickled once
+        return _new_arg, (self.__class__, self._spec, self._value)
 
     def value(self) -> Optional[T]:
         raise NotImplementedError(f'Please implement value method for {self.__class__.__name__}')
@@ -35,18 +177,62 @@ class Arg(Generic[T]):
     def parse(self, value: Any) -> Self:
         raise NotImplementedError(f'Please implement parse method for {self.__class__.__name__}')
 
+    def describe(self) -> Dict[str, JSON]:
+        ''' Describe the type, settings and value of the argument, e.g. for remote editors. '''
+        return {'type': self.__class__.__name__, 'value': self._value, 'allow_none': self._allow_none}
+
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(value={self._value}, allow_none={self._allow_none})"
 
     def __str__(self) -> str:
         return str(self._value)
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
         raise NotImplementedError(f'Please implement build_widget method for {self.__class__.__name__}')
 
 
+def _new_arg(arg_type: type, spec: Any, value: Any) -> Arg:
+    ''' Unpickle an argument pickled by `Arg.__reduce__`. '''
+    result = object.__new__(arg_type)
+    result._spec = spec
+    result._value = value
+    return result
+
+
+def _arg_state(arg: Arg) -> Dict[str, Any]:
+    ''' Get the slots that are set and the `__dict__` of an argument with a `__dict__`. '''
+    state = {}
+    for cls in arg.__class__.__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and name not in state and hasattr(arg, name):
+                state[name] = getattr(arg, name)
+    state['__dict__'] = dict(arg.__dict__)
+    return state
+
+
+def _set_arg_state(arg: Arg, state: Dict[str, Any]) -> None:
+    for name, value in state.items():
+        if name == '__dict__':
+            arg.__dict__.update(value)
+        else:
+            object.__setattr__(arg, name, value)
+
+
+def _restore_arg(arg_type: type, state: Dict[str, Any]) -> Arg:
+    ''' Copy or unpickle an argument with a `__dict__`. '''
+    result = object.__new__(arg_type)
+    _set_arg_state(result, state)
+    return result
+
+
 class IntArg(Arg[int]):
     ''' An argument that takes an integer value. '''
+    __slots__ = ()
+    _spec: NumberSpec
+
     def __init__(
         self, 
         default: Optional[int], 
@@ -55,23 +241,20 @@ class IntArg(Arg[int]):
         allow_none: bool = False,
         env_bind: Optional[str] = None
     ):
+        self._spec = NumberSpec(allow_none=allow_none, env_bind=env_bind, min_value=min_value, max_value=max_value)
         self._value = default
-        self._min_value = min_value
-        self._max_value = max_value
-        self._allow_none = allow_none
-        self._env_bind = env_bind
 
         if not allow_none:
             assert self._value is not None, "Default value cannot be None if allow_none is False"
-        assert (self._min_value is None or self._max_value is None or self._min_value <= self._max_value), \
+        assert (min_value is None or max_value is None or min_value <= max_value), \
             "min_value cannot be greater than max_value"
-        assert (self._value is None or self._min_value is None or self._value >= self._min_value), \
+        assert (self._value is None or min_value is None or self._value >= min_value), \
             "Value cannot be less than min_value"
-        assert (self._value is None or self._max_value is None or self._value <= self._max_value), \
+        assert (self._value is None or max_value is None or self._value <= max_value), \
             "Value cannot be greater than max_value"
 
-        if self._env_bind is not None:
-            env_value = os.getenv(self._env_bind)
+        if env_bind is not None:
+            env_value = os.getenv(env_bind)
             if env_value is not None:
                 self._value = self.parse(env_value)._value
 
@@ -80,50 +263,56 @@ class IntArg(Arg[int]):
         return self._value
 
     def parse(self, value: Any) -> Self:
+        spec = self._spec
         if isinstance(value, str):
             if value.lower().strip() in ('none', 'null'):
                 value = None
         if value is None:
-            if not self._allow_none:
+            if not spec.allow_none:
                 raise ValueError("Value cannot be None")
             else:
-                result = deepcopy(self)
-                result._value = value
-                return result
+                return self._new(None)
 
         try:
             value = int(value)
         except ValueError:
             raise ValueError(f"Cannot convert {value} to int")
 
-        if self._min_value is not None and value < self._min_value:
-            raise ValueError(f"Value {value} is less than minimum {self._min_value}")
-        if self._max_value is not None and value > self._max_value:
-            raise ValueError(f"Value {value} is greater than maximum {self._max_value}")
+        if spec.min_value is not None and value < spec.min_value:
+            raise ValueError(f"Value {value} is less than minimum {spec.min_value}")
+        if spec.max_value is not None and value > spec.max_value:
+            raise ValueError(f"Value {value} is greater than maximum {spec.max_value}")
 
-        result = deepcopy(self)
-        result._value = value
-        return result
+        return self._new(value)
+
+    def describe(self) -> Dict[str, JSON]:
+        return {**super().describe(), 'min_value': self._spec.min_value, 'max_value': self._spec.max_value}
 
     def __repr__(self) -> str:
-        return (f"IntArg(value={self._value}, min_value={self._min_value}, max_value={self._max_value}, "
+        return (f"IntArg(value={self._value}, min_value={self._spec.min_value}, max_value={self._spec.max_value}, "
                 f"allow_none={self._allow_none})")
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
-        label = (f'`int` **{key.split(".")[-1]}** *(min={self._min_value}, max={self._max_value}, '
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
+        label = (f'`int` **{key.split(".")[-1]}** *(min={self._spec.min_value}, max={self._spec.max_value}, '
                  f'allow_none={self._allow_none})*')
         container.number_input(
             label=label,
             value=self._value,
-            min_value=self._min_value,
-            max_value=self._max_value,
+            min_value=self._spec.min_value,
+            max_value=self._spec.max_value,
             key=f'{ST_TAG}.{key}',
+            on_change=on_change,
             step=1,
         )
 
 
 class FloatArg(Arg[float]):
     ''' An argument that takes a float value. '''
+    __slots__ = ()
+    _spec: NumberSpec
+
     def __init__(
         self, 
         default: Optional[float], 
@@ -132,23 +321,20 @@ class FloatArg(Arg[float]):
         allow_none: bool = False,
         env_bind: Optional[str] = None
     ):
+        self._spec = NumberSpec(allow_none=allow_none, env_bind=env_bind, min_value=min_value, max_value=max_value)
         self._value = default
-        self._min_value = min_value
-        self._max_value = max_value
-        self._allow_none = allow_none
-        self._env_bind = env_bind
 
         if not allow_none:
             assert self._value is not None, "Default value cannot be None if allow_none is False"
-        assert (self._min_value is None or self._max_value is None or self._min_value <= self._max_value), \
+        assert (min_value is None or max_value is None or min_value <= max_value), \
             "min_value cannot be greater than max_value"
-        assert (self._value is None or self._min_value is None or self._value >= self._min_value), \
+        assert (self._value is None or min_value is None or self._value >= min_value), \
             "Value cannot be less than min_value"
-        assert (self._value is None or self._max_value is None or self._value <= self._max_value), \
+        assert (self._value is None or max_value is None or self._value <= max_value), \
             "Value cannot be greater than max_value"
 
-        if self._env_bind is not None:
-            env_value = os.getenv(self._env_bind)
+        if env_bind is not None:
+            env_value = os.getenv(env_bind)
             if env_value is not None:
                 self._value = self.parse(env_value)._value
 
@@ -156,59 +342,64 @@ class FloatArg(Arg[float]):
         return self._value
 
     def parse(self, value: Any) -> Self:
+        spec = self._spec
         if isinstance(value, str):
             if value.lower().strip() in ('none', 'null'):
                 value = None
         if value is None:
-            if not self._allow_none:
+            if not spec.allow_none:
                 raise ValueError("Value cannot be None")
             else:
-                result = deepcopy(self)
-                result._value = value
-                return result
+                return self._new(None)
 
         try:
             value = float(value)
         except ValueError:
             raise ValueError(f"Cannot convert {value} to float")
 
-        if self._min_value is not None and value < self._min_value:
-            raise ValueError(f"Value {value} is less than minimum {self._min_value}")
-        if self._max_value is not None and value > self._max_value:
-            raise ValueError(f"Value {value} is greater than maximum {self._max_value}")
+        if spec.min_value is not None and value < spec.min_value:
+            raise ValueError(f"Value {value} is less than minimum {spec.min_value}")
+        if spec.max_value is not None and value > spec.max_value:
+            raise ValueError(f"Value {value} is greater than maximum {spec.max_value}")
 
-        result = deepcopy(self)
-        result._value = value
-        return result
+        return self._new(value)
+
+    def describe(self) -> Dict[str, JSON]:
+        return {**super().describe(), 'min_value': self._spec.min_value, 'max_value': self._spec.max_value}
 
     def __repr__(self) -> str:
-        return (f"FloatArg(value={self._value}, min_value={self._min_value}, max_value={self._max_value}, "
+        return (f"FloatArg(value={self._value}, min_value={self._spec.min_value}, max_value={self._spec.max_value}, "
                 f"allow_none={self._allow_none})")
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
-        label = (f'`float` **{key.split(".")[-1]}** *(min={self._min_value}, max={self._max_value}, '
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
+        label = (f'`float` **{key.split(".")[-1]}** *(min={self._spec.min_value}, max={self._spec.max_value}, '
                  f'allow_none={self._allow_none})*')
         container.number_input(
             label=label,
             value=self._value,
-            min_value=self._min_value,
-            max_value=self._max_value,
+            min_value=self._spec.min_value,
+            max_value=self._spec.max_value,
             key=f'{ST_TAG}.{key}',
+            on_change=on_change,
             format='%f'
         )
 
 
 class StrArg(Arg[str]):
     ''' An argument that takes a string value. '''
+    __slots__ = ()
+    _spec: ArgSpec
+
     def __init__(self, default: Optional[str], allow_none: bool = False, env_bind: Optional[str] = None):
+        self._spec = ArgSpec(allow_none=allow_none, env_bind=env_bind)
         self._value = default
-        self._allow_none = allow_none
-        self._env_bind = env_bind
         if not allow_none:
             assert self._value is not None, "Default value cannot be None if allow_none is False"
 
-        if self._env_bind is not None:
-            env_value = os.getenv(self._env_bind)
+        if env_bind is not None:
+            env_value = os.getenv(env_bind)
             if env_value is not None:
                 self._value = self.parse(env_value)._value
 
@@ -220,39 +411,41 @@ class StrArg(Arg[str]):
             if value.lower().strip() in ('none', 'null'):
                 value = None
         if value is None:
-            if not self._allow_none:
+            if not self._spec.allow_none:
                 raise ValueError("Value cannot be None")
             else:
-                result = deepcopy(self)
-                result._value = value
-                return result
+                return self._new(None)
 
         try:
             value = str(value)
         except ValueError:
             raise ValueError(f"Cannot convert {value} to str")
 
-        result = deepcopy(self)
-        result._value = value
-        return result
+        return self._new(value)
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
         label = (f'`str` **{key.split(".")[-1]}**')        
         container.text_input(
             label=label,
             value=self._value,
             key=f'{ST_TAG}.{key}',
+            on_change=on_change,
         )
 
 
 class BoolArg(Arg[bool]):
     ''' An argument that can take boolean values. '''
+    __slots__ = ()
+    _spec: ArgSpec
+
     def __init__(self, default: bool, env_bind: Optional[str] = None):
+        self._spec = ArgSpec(allow_none=False, env_bind=env_bind)
         self._value = default
-        self._env_bind = env_bind
 
-        if self._env_bind is not None:
-            env_value = os.getenv(self._env_bind)
+        if env_bind is not None:
+            env_value = os.getenv(env_bind)
             if env_value is not None:
                 self._value = self.parse(env_value)._value
 
@@ -279,18 +472,19 @@ class BoolArg(Arg[bool]):
         except ValueError:
             raise ValueError(f"Cannot convert {value} to bool")
 
-        result = deepcopy(self)
         assert isinstance(value, bool)
-        result._value = value
-        return result
+        return self._new(value)
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
         label = (f'`bool` **{key.split(".")[-1]}**')        
         assert isinstance(self._value, bool)
         container.checkbox(
             label=label,
             value=self._value,
             key=f'{ST_TAG}.{key}',
+            on_change=on_change,
         )
 
     def __repr__(self) -> str:
@@ -299,76 +493,104 @@ class BoolArg(Arg[bool]):
 
 class OptionArg(Arg[str]):
     ''' An argument that can take one of a predefined set of string options. '''
+    __slots__ = ()
+    _spec: OptionSpec
+
     def __init__(
         self, 
         default: Optional[str], 
         options: Optional[List[str]] = None, 
         allow_none: bool = False, 
         env_bind: Optional[str] = None,
-        option_fn: Optional[Callable[..., List[str]]] = None
+        option_fn: Optional[Callable[..., List[str]]] = None,
+        cache_options: Union[bool, float] = False
     ):
-        self._value = default
+        # `cache_options` caches the result of `option_fn`: False calls it on every lookup, True once per process,
+        # and a number of seconds refreshes the options after they are that old.
+        option_cache = None
+        if option_fn is not None:
+            ttl = None if cache_options is True else (0 if cache_options is False else cache_options)
+            option_cache = OptionCache(option_fn, ttl=ttl)
         if options is None:
-            assert option_fn is not None, "Options must be provided either directly or via option_fn"
-            self._options = option_fn()
-        else:
-            self._options = options
-        self._allow_none = allow_none
-        self._env_bind = env_bind
-        self.option_fn = option_fn
+            assert option_cache is not None, "Options must be provided either directly or via option_fn"
+            options = list(option_cache.get()[0])
+        self._spec = OptionSpec(allow_none=allow_none, env_bind=env_bind, options=tuple(options), option_fn=option_fn,
+                                option_set=frozenset(options), option_cache=option_cache)
+        self._value = default
 
         if not allow_none:
             assert self._value is not None, "Default value cannot be None if allow_none is False"
         if self._value is not None:
-            assert self._value in self._options, f"Default value {self._value} must be in options {self._options}"
-        assert len(self._options) > 0, "Options set cannot be empty"
+            assert self._value in options, f"Default value {self._value} must be in options {options}"
+        assert len(options) > 0, "Options set cannot be empty"
 
-        if self._env_bind is not None:
-            env_value = os.getenv(self._env_bind)
+        if env_bind is not None:
+            env_value = os.getenv(env_bind)
             if env_value is not None:
                 self._value = self.parse(env_value)._value
 
     def value(self) -> Optional[str]:
         return self._value
 
+    @property
+    def option_fn(self) -> Optional[Callable[..., List[str]]]:
+        return self._spec.option_fn
+
+    @property
+    def option_cache(self) -> Optional[OptionCache]:
+        ''' The cache of `option_fn`, to read its hit/miss counters or invalidate it. '''
+        return self._spec.option_cache
+
+    def _current_options(self) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+        ''' The current options and their set, from `option_fn` and its cache if it is provided. '''
+        if self._spec.option_cache is not None:
+            return self._spec.option_cache.get()
+        return self._spec.options, self._spec.option_set
+
+    @property
+    def _options(self) -> List[str]:
+        return list(self._current_options()[0])
+
+    @property
+    def _option_set(self) -> FrozenSet[str]:
+        return self._current_options()[1]
+
     def parse(self, value: Any) -> Self:
-        if self.option_fn is not None:
-            self._options = self.option_fn()
         if isinstance(value, str):
             if value.lower().strip() in ('none', 'null'):
                 value = None
         if value is None:
-            if not self._allow_none:
+            if not self._spec.allow_none:
                 raise ValueError("Value cannot be None")
             else:
-                result = deepcopy(self)
-                result._value = value
-                return result
+                return self._new(None)
 
         try:
             value = str(value)
         except ValueError:
             raise ValueError(f"Cannot convert {value} to str")
 
-        if value not in self._options:
-            raise ValueError(f"Value {value} is not in options {self._options}")
+        options, option_set = self._current_options()
+        if value not in option_set:
+            raise ValueError(f"Value {value} is not in options {list(options)}")
 
-        result = deepcopy(self)
-        result._value = value
-        return result
+        return self._new(value)
+
+    def describe(self) -> Dict[str, JSON]:
+        return {**super().describe(), 'options': self._options}
 
     def __repr__(self) -> str:
-        if self.option_fn is not None:
-            self._options = self.option_fn()
         return f"OptionArg(value={self._value}, options={self._options}, allow_none={self._allow_none})"
 
-    def build_widget(self, key: str, container: DeltaGenerator) -> None:
-        if self.option_fn is not None:
-            self._options = self.option_fn()
-        label = (f'`options` **{key.split(".")[-1]}** *(options: {self._options})*')
+    def build_widget(
+        self, key: str, container: 'DeltaGenerator', on_change: Optional[Callable[[], None]] = None
+    ) -> None:
+        options = self._options
+        label = (f'`options` **{key.split(".")[-1]}** *(options: {options})*')
         container.selectbox(
             label=label,
-            options=self._options,
-            index=self._options.index(self._value) if self._value is not None else None,
+            options=options,
+            index=options.index(self._value) if self._value is not None else None,
             key=f'{ST_TAG}.{key}',
+            on_change=on_change,
         )
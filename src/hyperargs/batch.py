@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/batch.py
+'''
+Validate many configuration records at once into columns of leaf values, without building an instance per record.
+
+The records are grouped by the values of the fields watched by the monitors of the root class. The monitors run once
+per group, on a template instance that gives the layout and the specs of the arguments of its records. The values of
+each leaf are then validated for the whole group with NumPy, only values of unusual types, e.g. strings for an IntArg,
+are parsed one by one with `Arg.parse`. Groups whose sub-configurations have monitors of their own are validated by
+`from_dict`, record by record.
+
+As with `from_dict`, unknown keys are ignored. Monitors must only depend on the fields they watch.
+'''
+
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Type
+import json
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("Validating batches of configurations requires NumPy, install it with `pip install numpy`") from e
+
+from .args import Arg, IntArg, FloatArg, StrArg, BoolArg, OptionArg, JSON
+from .conf import Conf, CONF_ITEM, _add_leaves, _get_item
+from .utils import PATH, format_path
+
+# A value missing from a record, the leaf keeps the value of the template
+_MISSING: Any = object()
+
+# The strings that `Arg.parse` reads as None
+_NONE_STRINGS = ('none', 'null')
+
+
+class BatchTable(NamedTuple):
+    """The validated leaves of a batch of records.
+
+    `columns` maps the flattened paths, e.g. 'optimizer_conf.lr', to arrays with one value per record. Integer, float
+    and boolean leaves are int64, float64 and bool arrays, strings are object arrays. A value is missing, NaN for
+    numbers and None otherwise, if the leaf does not exist in a record, e.g. 'optimizer_conf.beta1' when the optimizer
+    is SGD, or if it is invalid. Integer and boolean columns with missing values are float64 and object arrays.
+
+    `error_mask` is True for the invalid records, and `errors` maps their indexes to the first error found.
+    """
+    columns: Dict[str, Any]
+    error_mask: Any
+    errors: Dict[int, str]
+
+    def to_pandas(self) -> Any:
+        """The columns as a pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+    def to_arrow(self) -> Any:
+        """The columns as a pyarrow Table."""
+        import pyarrow as pa
+        return pa.table(self.columns)
+
+
+def validate_batch(conf_cls: Type[Conf], records: Sequence[Dict[str, JSON]]) -> BatchTable:
+    """Validate `records` like `conf_cls.from_dict` does, see the module docstring."""
+    builder = _TableBuilder(len(records))
+    key_fields = tuple(conf_cls._schema.monitors)
+
+    groups: Dict[Any, List[int]] = {}
+    for row, record in enumerate(records):
+        if type(record) is not dict:
+            builder.add_error(row, f"A record must be a dictionary, got {type(record).__name__}")
+            continue
+        # The fields present in a record decide when the monitors run, see `_overwritten_fields`
+        key = (frozenset(record), *(record.get(name, _MISSING) for name in key_fields))
+        try:
+            groups.setdefault(key, []).append(row)
+        except TypeError:
+            groups.setdefault(_json_key(key), []).append(row)
+
+    for rows in groups.values():
+        group_records = [records[row] for row in rows]
+        first = group_records[0]
+        try:
+            template = conf_cls.from_dict({name: first[name] for name in key_fields if name in first})
+        except Exception as e:
+            for row in rows:
+                builder.add_error(row, str(e))
+            continue
+
+        if _has_nested_monitors(template):
+            for row, record in zip(rows, group_records):
+                builder.add_instance(row, conf_cls, record)
+            continue
+
+        row_array = np.asarray(rows, dtype=np.intp)
+        overwritten = _overwritten_fields(template, first)
+        checker = _TableBuilder(len(records))
+        checker.errors = builder.errors
+        for name, value in template._iter_fields():
+            subs = [record.get(name, _MISSING) for record in group_records]
+            if name in overwritten:
+                # The values of the records are still validated, but the monitors replace them
+                checker.add_item(value, subs, (name,), row_array)
+                subs = [_MISSING] * len(subs)
+            builder.add_item(value, subs, (name,), row_array)
+
+    return builder.build()
+
+
+def _json_key(key: Tuple[Any, ...]) -> str:
+    """A hashable group key for unhashable values, e.g. lists."""
+    return json.dumps([[value is _MISSING, None if value is _MISSING else value] for value in key], sort_keys=True,
+                      default=repr)
+
+
+def _overwritten_fields(template: Conf, present: Collection[str]) -> Set[str]:
+    """The fields in `present` that the monitors assign after they are parsed, in the order of `Conf._update_fields`."""
+    schema = template._schema
+    parsed: Set[str] = set()
+    overwritten: Set[str] = set()
+    dirty: List[str] = []
+    for name in template._topological_order():
+        if name not in present:
+            continue
+        if dirty:
+            overwritten |= _monitor_writes(template, dirty) & parsed
+            dirty.clear()
+        parsed.add(name)
+        if name in schema.monitors:
+            dirty.append(name)
+    if dirty:
+        overwritten |= _monitor_writes(template, dirty) & parsed
+    return overwritten
+
+
+def _monitor_writes(template: Conf, fields: List[str]) -> Set[str]:
+    """The fields assigned by the monitors of `fields`, run on a copy of `template`."""
+    conf = template._shallow_copy()
+    before = dict(conf.__dict__)
+    conf._run_monitors(fields)
+    return {name for name in conf._schema.kinds if conf.__dict__.get(name) is not before.get(name)}
+
+
+def _has_nested_monitors(item: CONF_ITEM, root: bool = True) -> bool:
+    if isinstance(item, Conf):
+        if not root and item._schema.monitors:
+            return True
+        return any(_has_nested_monitors(value, root=False) for _, value in item._iter_fields())
+    if isinstance(item, list):
+        return any(_has_nested_monitors(sub_item, root=False) for sub_item in item)
+    return False
+
+
+class _Column:
+    __slots__ = ('arg_type', 'rows', 'values', 'missing')
+
+    def __init__(self, arg_type: type):
+        self.arg_type = arg_type
+        self.rows: List[Any] = []       # Arrays of row indexes
+        self.values: List[Any] = []     # The arrays of values of these rows
+        self.missing = False            # Whether some values are None or invalid
+
+
+class _TableBuilder:
+    def __init__(self, size: int):
+        self.size = size
+        self.columns: Dict[str, _Column] = {}
+        self.errors: Dict[int, str] = {}
+
+    def add_error(self, row: int, message: str) -> None:
+        self.errors.setdefault(row, message)
+
+    def column(self, path: PATH, arg: Arg) -> _Column:
+        key = format_path(path)
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = _Column(type(arg))
+        return column
+
+    def add_item(self, item: CONF_ITEM, subs: List[Any], path: PATH, rows: Any) -> None:
+        """Validate the values `subs` of the records `rows` against `item` of their template."""
+        if isinstance(item, Arg):
+            self.add_arg(item, subs, path, rows)
+        elif isinstance(item, Conf):
+            subs = self.check_types(subs, dict, rows, path, 'dict')
+            for name, value in item._iter_fields():
+                self.add_item(value, [_MISSING if sub is _MISSING else sub.get(name, _MISSING) for sub in subs],
+                              path + (name,), rows)
+        elif isinstance(item, list):
+            subs = self.check_types(subs, (list, tuple), rows, path, 'list/tuple')
+            for i, sub_item in enumerate(item):
+                self.add_item(sub_item, [sub[i] if sub is not _MISSING and i < len(sub) else _MISSING for sub in subs],
+                              path + (i,), rows)
+        else:
+            raise TypeError(f"Unsupported type: {type(item)}")
+
+    def check_types(self, subs: List[Any], types: Any, rows: Any, path: PATH, expected: str) -> List[Any]:
+        """Report the values that are not of `types`, and treat them as missing."""
+        bad = [i for i, sub in enumerate(subs) if sub is not _MISSING and not isinstance(sub, types)]
+        if not bad:
+            return subs
+        subs = list(subs)
+        for i in bad:
+            self.add_error(int(rows[i]), f"{format_path(path)}: Expected {expected}, got {type(subs[i])}")
+            subs[i] = _MISSING
+        return subs
+
+    def add_arg(self, arg: Arg, subs: List[Any], path: PATH, rows: Any) -> None:
+        column = self.column(path, arg)
+        present = [i for i, sub in enumerate(subs) if sub is not _MISSING]
+        if len(present) < len(subs):
+            # The leaves missing from the records keep the value of the template
+            absent = np.ones(len(subs), dtype=bool)
+            absent[present] = False
+            self.add_values(column, rows[absent], [arg.value()] * int(absent.sum()))
+        if not present:
+            return
+
+        present_rows = rows[present] if len(present) < len(subs) else rows
+        values = [subs[i] for i in present] if len(present) < len(subs) else subs
+        validated, bad, messages = _validate_values(arg, values)
+        for i, message in messages.items():
+            self.add_error(int(present_rows[i]), f"{format_path(path)}: {message}")
+        if bad is not None:
+            column.missing = True
+            validated = [value for value, is_bad in zip(validated, bad) if not is_bad]
+            present_rows = present_rows[~bad]
+        self.add_values(column, present_rows, validated)
+
+    def add_values(self, column: _Column, rows: Any, values: Any) -> None:
+        column.rows.append(rows)
+        column.values.append(values)
+        if not isinstance(values, np.ndarray) and any(value is None for value in values):
+            column.missing = True
+
+    def add_instance(self, row: int, conf_cls: Type[Conf], record: Dict[str, JSON]) -> None:
+        """Validate a record with `from_dict`, for the records whose layout depends on nested monitors."""
+        try:
+            conf = conf_cls.from_dict(record)
+        except Exception as e:
+            self.add_error(row, str(e))
+            return
+        leaves: Dict[PATH, JSON] = {}
+        _add_leaves(conf, (), leaves)
+        rows = np.asarray([row], dtype=np.intp)
+        for path, value in leaves.items():
+            column = self.column(path, _get_item(conf, path))
+            self.add_values(column, rows, [value])
+
+    def build(self) -> BatchTable:
+        error_mask = np.zeros(self.size, dtype=bool)
+        if self.errors:
+            error_mask[list(self.errors)] = True
+        columns = {key: self.build_column(column) for key, column in self.columns.items()}
+        return BatchTable(columns=columns, error_mask=error_mask, errors=dict(sorted(self.errors.items())))
+
+    def build_column(self, column: _Column) -> Any:
+        covered = sum(len(rows) for rows in column.rows)
+        complete = covered == self.size and not column.missing
+        if issubclass(column.arg_type, (IntArg, FloatArg)):
+            dtype: Any = np.int64 if complete and issubclass(column.arg_type, IntArg) else np.float64
+            result = np.full(self.size, np.nan if dtype is np.float64 else 0, dtype=dtype)
+        elif issubclass(column.arg_type, BoolArg) and complete:
+            result = np.zeros(self.size, dtype=bool)
+        else:
+            result = np.full(self.size, None, dtype=object)
+
+        for rows, values in zip(column.rows, column.values):
+            if result.dtype != object and not isinstance(values, np.ndarray):
+                values = [np.nan if value is None else value for value in values]
+            if result.dtype == object and not isinstance(values, np.ndarray):
+                # Keep lists and other JSON values of custom arguments as single cells
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                values = array
+            result[rows] = values
+        return result
+
+
+def _validate_values(arg: Arg, values: List[Any]) -> Tuple[Any, Optional[Any], Dict[int, str]]:
+    """Validate the values of a leaf.
+
+    Returns:
+        The validated values, an array if they are all valid, the mask of the invalid values or None if there are none,
+        and the error messages by position.
+    """
+    validate = _VALIDATORS.get(type(arg))
+    if validate is None or type(arg).parse is not _BASE_PARSE[type(arg)]:
+        # Custom arguments and parse methods are only run one by one
+        return _parse_values(arg, values)
+
+    fast_types = _FAST_TYPES[type(arg)]
+    if set(map(type, values)) <= fast_types:
+        positions: Sequence[int] = range(len(values))
+        fast_values = values
+    else:
+        positions = [i for i, value in enumerate(values) if type(value) in fast_types]
+        fast_values = [values[i] for i in positions]
+    try:
+        array, bad, slow = validate(arg, fast_values) if fast_values else (None, None, [])
+    except OverflowError:
+        return _parse_values(arg, values)
+    if len(fast_values) == len(values) and not slow and not bad.any():
+        return array, None, {}
+
+    # The values of other types, the invalid values, for their error messages, and those that may be None are parsed
+    result: List[Any] = [None] * len(values)
+    redo = set(range(len(values))).difference(positions)
+    if fast_values:
+        for position, value in zip(positions, array.tolist()):
+            result[position] = value
+        redo.update(positions[i] for i in slow)
+        redo.update(positions[i] for i in np.flatnonzero(bad))
+    redo_positions = sorted(redo)
+    parsed, parsed_bad, parsed_messages = _parse_values(arg, [values[i] for i in redo_positions])
+    for position, value in zip(redo_positions, parsed):
+        result[position] = value
+    if parsed_bad is None:
+        return result, None, {}
+    bad_mask = np.zeros(len(values), dtype=bool)
+    bad_mask[np.asarray(redo_positions, dtype=np.intp)[parsed_bad]] = True
+    return result, bad_mask, {redo_positions[i]: message for i, message in parsed_messages.items()}
+
+
+def _parse_values(arg: Arg, values: List[Any]) -> Tuple[List[Any], Optional[Any], Dict[int, str]]:
+    """Parse the values one by one, like `_validate_values`."""
+    parsed: List[Any] = []
+    messages: Dict[int, str] = {}
+    for i, value in enumerate(values):
+        try:
+            parsed.append(arg.parse(value).value())
+        except Exception as e:
+            parsed.append(None)
+            messages[i] = str(e)
+    if not messages:
+        return parsed, None, messages
+    bad = np.zeros(len(values), dtype=bool)
+    bad[list(messages)] = True
+    return parsed, bad, messages
+
+
+def _validate_numbers(arg: Any, values: List[Any], dtype: Any) -> Tuple[Any, Any, List[int]]:
+    array = np.asarray(values, dtype=dtype)
+    bad = np.zeros(len(array), dtype=bool)
+    if arg._spec.min_value is not None:
+        bad |= array < arg._spec.min_value
+    if arg._spec.max_value is not None:
+        bad |= array > arg._spec.max_value
+    return array, bad, []
+
+
+def _validate_ints(arg: IntArg, values: List[Any]) -> Tuple[Any, Any, List[int]]:
+    return _validate_numbers(arg, values, np.int64)
+
+
+def _validate_floats(arg: FloatArg, values: List[Any]) -> Tuple[Any, Any, List[int]]:
+    return _validate_numbers(arg, values, np.float64)
+
+
+def _validate_bools(arg: BoolArg, values: List[Any]) -> Tuple[Any, Any, List[int]]:
+    array = np.asarray(values, dtype=bool)
+    return array, np.zeros(len(array), dtype=bool), []
+
+
+def _none_strings(array: Any) -> List[int]:
+    """The positions of the strings that `Arg.parse` reads as None, they are parsed one by one."""
+    return np.flatnonzero(np.isin(np.char.lower(np.char.strip(array)), _NONE_STRINGS)).tolist()
+
+
+def _validate_strs(arg: StrArg, values: List[Any]) -> Tuple[Any, Any, List[int]]:
+    array = np.asarray(values, dtype=str)
+    return np.asarray(values, dtype=object), np.zeros(len(array), dtype=bool), _none_strings(array)
+
+
+def _validate_options(arg: OptionArg, values: List[Any]) -> Tuple[Any, Any, List[int]]:
+    array = np.asarray(values, dtype=str)
+    slow = _none_strings(array)
+    bad = ~np.isin(array, np.asarray(sorted(arg._option_set), dtype=str))
+    bad[slow] = False
+    return np.asarray(values, dtype=object), bad, slow
+
+
+# The vectorized validators return the validated values, the mask of the invalid values, and the positions of the
+# values that must be parsed one by one
+_VALIDATORS = {
+    IntArg: _validate_ints,
+    FloatArg: _validate_floats,
+    BoolArg: _validate_bools,
+    StrArg: _validate_strs,
+    OptionArg: _validate_options,
+}
+
+# The value types handled by the vectorized validators, the other values are parsed one by one
+_FAST_TYPES: Dict[type, Set[type]] = {
+    IntArg: {int},
+    FloatArg: {float, int},
+    BoolArg: {bool},
+    StrArg: {str},
+    OptionArg: {str},
+}
+
+_BASE_PARSE = {arg_type: arg_type.parse for arg_type in _VALIDATORS}
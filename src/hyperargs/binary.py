@@ -0,0 +1,692 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/binary.py
+'''
+A compact binary format for storing many configurations, with the `.hargs` extension.
+
+The field layout comes from the configuration classes, so a record only holds the values of the fields. A file is a
+header followed by entries, each a tag byte, a varint length and a payload:
+
+    header      b'HARG', the format version and the schema hash of the root class
+    b'C' entry  A class used by the following records: its schema hash, 'module:qualname' and the values of its
+                argument fields when the file was written
+    b'R' entry  A record: the configuration
+
+A configuration is stored as the index of its class, its argument block, then its sub-configurations and lists. The
+argument block is its length, a bitmap of the arguments that differ from the class attributes, and their values. The
+fields of each group are in the order of `ConfSchema.fields`.
+
+The schema hashes cover the field names, kinds and argument types, and loading fails if a class changed since the file
+was written. The arguments left out of a record get the values stored in the class entry, so changing the defaults of
+a class or the variables of `env_bind` arguments does not change the records already written. Records are restored
+straight from the stored values, without parsing them or running the monitors, as they were valid when written. The
+specs of the arguments, e.g. their bounds, come from the classes. Classes are found among the classes already loaded,
+reading a file never imports a module.
+'''
+
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
+import hashlib
+import json
+import math
+import struct
+
+from .args import Arg, IntArg, FloatArg, StrArg, BoolArg, OptionArg
+from .conf import Conf, ConfSchema, ARG_FIELD, CONF_FIELD, LIST_FIELD
+from .frozen import FrozenConf, _new_snapshot
+
+C = TypeVar('C', bound=Conf)
+
+# The extension of binary configuration files
+BINARY_EXTENSION = '.hargs'
+
+MAGIC = b'HARG'
+FORMAT_VERSION = 2
+
+_CLASS_TAG = ord('C')
+_RECORD_TAG = ord('R')
+
+# The tags of list items
+_ITEM_CONF = 0
+_ITEM_LIST = 1
+_ITEM_ARG = 2
+
+_DOUBLE = struct.Struct('<d')
+# Powers of ten that are exact doubles, so that dividing or multiplying by them rounds correctly
+_POW10 = tuple(10.0 ** i for i in range(23))
+_MAX_EXACT = 2 ** 53
+
+# The read codes of the fields, the values of arguments without a code are read by their codec
+_READ_INT = 0
+_READ_OPTION = 1
+_READ_BOOL = 2
+_READ_FLOAT = 3
+_READ_STR = 4
+_READ_OTHER = 5
+_READ_CODES = {
+    IntArg: _READ_INT, OptionArg: _READ_OPTION, BoolArg: _READ_BOOL, FloatArg: _READ_FLOAT, StrArg: _READ_STR,
+}
+
+# The number of distinct values per field, and of distinct argument blocks per class, shared by the records of a file
+_SHARED_ARGS = 1024
+
+_CHUNK_SIZE = 1 << 20
+# A tag byte and a 10-byte varint
+_MAX_ENTRY_HEADER = 11
+
+_READER = Callable[[bytes, int, Any], Tuple[Any, int]]
+_WRITER = Callable[[bytearray, Any, Any], None]
+# The layouts of the fields of the classes, see `_write_layout` and `_read_layout`
+_LAYOUT = Tuple[Tuple[str, Any, Any, Any], ...]
+
+# The caches of the classes hold the `ConfSchema` they were computed from, and are computed again with the schema,
+# e.g. after `add_dependency`. Class attributes reassigned without compiling the schema again are not seen.
+_SCHEMA_HASHES: Dict[type, Tuple[ConfSchema, bytes]] = {}
+_WRITE_LAYOUTS: Dict[type, Tuple[ConfSchema, Tuple[Tuple[Tuple[str, Arg, _WRITER], ...], _LAYOUT]]] = {}
+_READ_LAYOUTS: Dict[type, Tuple[ConfSchema, Tuple[_LAYOUT, _LAYOUT]]] = {}
+
+
+def schema_hash(conf_cls: Type[Conf]) -> bytes:
+    """The 8-byte hash of the field layout of `conf_cls`, it changes whenever its records would be read differently."""
+    schema = conf_cls._schema
+    cached = _SCHEMA_HASHES.get(conf_cls)
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    parts = [str(FORMAT_VERSION)]
+    for name in schema.fields:
+        kind = schema.kinds[name]
+        parts.append(f'{name}:{kind}')
+        if kind != CONF_FIELD:
+            parts.append(_item_layout(getattr(conf_cls, name)))
+    result = hashlib.blake2b('\n'.join(parts).encode('utf-8'), digest_size=8).digest()
+    _SCHEMA_HASHES[conf_cls] = (schema, result)
+    return result
+
+
+def _item_layout(item: Any) -> str:
+    """Describe the arguments whose specs are taken from the class, i.e. argument fields and items of class lists."""
+    if isinstance(item, list):
+        return '[' + ','.join(_item_layout(sub_item) for sub_item in item) + ']'
+    if not isinstance(item, Arg):
+        return ''
+    layout = f'{type(item).__module__}.{type(item).__qualname__}:{item._allow_none}'
+    if isinstance(item, OptionArg) and item.option_fn is None:
+        # Static options are stored by index
+        layout += ':' + '|'.join(item._spec.options)
+    return layout
+
+
+class BinaryWriter:
+    """Write configurations of `conf_cls` to a binary file, one record per `write` call.
+
+    Example:
+        with BinaryWriter('runs.hargs', TrainConf) as writer:
+            for conf in confs:
+                writer.write(conf)
+    """
+
+    def __init__(self, file: Union[str, BinaryIO], conf_cls: Type[Conf]):
+        self.conf_cls = conf_cls
+        self._own_file = isinstance(file, str)
+        self._file: BinaryIO = open(file, 'wb') if isinstance(file, str) else file
+        self._class_ids: Dict[type, int] = {}
+        self._file.write(MAGIC + bytes([FORMAT_VERSION]) + schema_hash(conf_cls))
+
+    def write(self, conf: Conf) -> None:
+        if not isinstance(conf, self.conf_cls):
+            raise TypeError(f"Expected an instance of {self.conf_cls.__name__}, got {type(conf).__name__}")
+        payload = bytearray()
+        new_classes: List[type] = []
+        try:
+            self._write_conf(payload, conf, new_classes)
+        except Exception:
+            # The classes first seen in a failed record are defined again by the next one
+            for cls in new_classes:
+                del self._class_ids[cls]
+            raise
+
+        out = bytearray()
+        for cls in new_classes:
+            definition = bytearray(schema_hash(cls))
+            _write_str(definition, f'{cls.__module__}:{cls.__qualname__}', None)
+            # The defaults of the records, which may change with the class or the environment before they are read
+            for _, prototype, write_arg in _write_layout(cls)[0]:
+                write_arg(definition, prototype._value, prototype)
+            _write_entry(out, _CLASS_TAG, definition)
+        _write_entry(out, _RECORD_TAG, payload)
+        self._file.write(out)
+
+    def close(self) -> None:
+        if self._own_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> 'BinaryWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _write_conf(self, out: bytearray, conf: Conf, new_classes: List[type]) -> None:
+        cls = type(conf)
+        class_id = self._class_ids.get(cls)
+        if class_id is None:
+            class_id = self._class_ids[cls] = len(self._class_ids)
+            new_classes.append(cls)
+        _write_varint(out, class_id)
+
+        extra = conf._extra_fields()
+        if extra:
+            raise ValueError(f"Fields added at runtime cannot be stored in the binary format: {extra}")
+        arg_layout, child_layout = _write_layout(cls)
+        # The arguments equal to the class attributes are only marked as defaults in the bitmap of the stored ones
+        block = bytearray()
+        stored = 0
+        for i, (name, prototype, write_arg) in enumerate(arg_layout):
+            arg = getattr(conf, name)
+            if type(arg) is not type(prototype):
+                raise TypeError(f"Field '{name}' of {cls.__name__} is a {type(arg).__name__}, "
+                                f"expected a {type(prototype).__name__}")
+            if arg is not prototype and not _same_value(arg._value, prototype._value):
+                stored |= 1 << i
+                write_arg(block, arg._value, prototype)
+        header = bytearray()
+        _write_varint(header, stored)
+        _write_varint(out, len(header) + len(block))
+        out += header
+        out += block
+
+        for name, kind, prototype, _ in child_layout:
+            if kind == CONF_FIELD:
+                self._write_conf(out, getattr(conf, name), new_classes)
+            else:
+                self._write_list(out, getattr(conf, name), prototype, new_classes)
+
+    def _write_list(self, out: bytearray, items: list, prototypes: list, new_classes: List[type]) -> None:
+        _write_varint(out, len(items))
+        for i, item in enumerate(items):
+            prototype = _item_prototype(prototypes, i)
+            if isinstance(item, Conf):
+                out.append(_ITEM_CONF)
+                self._write_conf(out, item, new_classes)
+            elif isinstance(item, list):
+                out.append(_ITEM_LIST)
+                self._write_list(out, item, prototype if isinstance(prototype, list) else [], new_classes)
+            elif isinstance(item, Arg):
+                # The spec of a list item comes from the item at the same position in the class list, or its last item
+                if type(item) is not type(prototype):
+                    raise TypeError(f"List item {i} is a {type(item).__name__} without a matching item in the "
+                                    "class list, it cannot be stored in the binary format")
+                out.append(_ITEM_ARG)
+                _arg_codec(prototype)[1](out, item._value, prototype)
+            else:
+                raise TypeError(f"Unsupported type: {type(item)}")
+
+
+def write_records(file: Union[str, BinaryIO], confs: Iterable[C], conf_cls: Optional[Type[C]] = None) -> int:
+    """Write `confs` to a binary file, `conf_cls` defaults to the class of the first one.
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    writer: Optional[BinaryWriter] = None
+    try:
+        for conf in confs:
+            if writer is None:
+                writer = BinaryWriter(file, conf_cls or type(conf))
+            writer.write(conf)
+            count += 1
+        if writer is None:
+            assert conf_cls is not None, "conf_cls is required to write an empty file"
+            writer = BinaryWriter(file, conf_cls)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def iter_records(file: Union[str, BinaryIO], conf_cls: Type[C]) -> Iterator[C]:
+    """Lazily read the records of a binary file, only one record is held in memory at a time."""
+    return _iter_records(file, conf_cls, _Decoder())
+
+
+def _iter_records(file: Union[str, BinaryIO], conf_cls: Type[Conf], decoder: '_Decoder') -> Iterator[Any]:
+    if isinstance(file, str):
+        with open(file, 'rb') as f:
+            yield from _iter_records(f, conf_cls, decoder)
+        return
+
+    header = file.read(len(MAGIC) + 9)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a HyperArgs binary configuration file")
+    if header[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary format version {header[len(MAGIC)]}, expected {FORMAT_VERSION}")
+    if header[len(MAGIC) + 1:] != schema_hash(conf_cls):
+        raise ValueError(f"The file was written with a different schema of {conf_cls.__name__}")
+
+    for tag, buf, start, end in _iter_entries(file):
+        if tag == _RECORD_TAG:
+            yield decoder.read_conf(buf, start)[0]
+        elif tag == _CLASS_TAG:
+            decoder.add_class(buf, start, conf_cls)
+        else:
+            raise ValueError(f"Corrupted binary configuration file, unknown entry {bytes([tag])!r}")
+
+
+def _iter_entries(file: BinaryIO) -> Iterator[Tuple[int, bytes, int, int]]:
+    """Iterate over the (tag, buffer, start, end) of the entries, the file is read in chunks."""
+    buf = file.read(_CHUNK_SIZE)
+    pos = 0
+    while pos < len(buf):
+        if len(buf) - pos < _MAX_ENTRY_HEADER:
+            buf = buf[pos:] + file.read(_CHUNK_SIZE)
+            pos = 0
+        tag = buf[pos]
+        try:
+            length, start = _read_varint(buf, pos + 1)
+        except IndexError:
+            raise ValueError("Corrupted binary configuration file, unexpected end of file") from None
+        end = start + length
+        if end > len(buf):
+            buf = buf[pos:] + file.read(end - len(buf) + _CHUNK_SIZE)
+            start, end, pos = start - pos, end - pos, 0
+            if end > len(buf):
+                raise ValueError("Corrupted binary configuration file, unexpected end of file")
+        yield tag, buf, start, end
+        pos = end
+        if pos == len(buf):
+            buf = file.read(_CHUNK_SIZE)
+            pos = 0
+
+
+def load_record(file: Union[str, BinaryIO], conf_cls: Type[C]) -> C:
+    """Read the first record of a binary file."""
+    for conf in iter_records(file, conf_cls):
+        return conf
+    raise ValueError("The binary configuration file has no records")
+
+
+def load_frozen_record(file: Union[str, BinaryIO], conf_cls: Type[Conf]) -> FrozenConf:
+    """Read the first record of a binary file as a `FrozenConf`, decoded straight into the snapshot."""
+    for conf in _iter_records(file, conf_cls, _FrozenDecoder()):
+        return conf
+    raise ValueError("The binary configuration file has no records")
+
+
+class _Decoder:
+    __slots__ = ('classes',)
+
+    def __init__(self) -> None:
+        # Class id -> (class, argument layout, child layout, shared argument blocks)
+        self.classes: List[Tuple[type, _LAYOUT, _LAYOUT, Dict[bytes, Dict[str, Arg]]]] = []
+
+    def add_class(self, buf: bytes, start: int, conf_cls: Type[Conf]) -> None:
+        """Read the class entry at `start`: the schema hash, the class name and the defaults of the records."""
+        name, pos = _read_str(buf, start + 8, None)
+        cls = _resolve_class(name, conf_cls)
+        if schema_hash(cls) != buf[start:start + 8]:
+            raise ValueError(f"The file was written with a different schema of {name}")
+        class_args, child_layout = _read_layout(cls)
+        arg_layout = []
+        for field, code, prototype, reader in class_args:
+            default, pos = _arg_codec(prototype)[0](buf, pos, prototype)
+            if not _same_value(default, prototype._value):
+                # The default changed since the file was written, with the class or an `env_bind` variable
+                prototype = prototype._new(default)
+            # The shared arguments of every field, or the readers of the arguments without a read code
+            arg_layout.append((field, code, prototype, {} if reader is None else reader))
+        self.classes.append((cls, tuple(arg_layout), child_layout, {}))
+
+    def read_conf(self, buf: bytes, pos: int) -> Tuple[Conf, int]:
+        class_id = buf[pos]
+        if class_id < 0x80:
+            pos += 1
+        else:
+            class_id, pos = _read_varint(buf, pos)
+        cls, arg_layout, child_layout, blocks = self.classes[class_id]
+
+        length = buf[pos]
+        if length < 0x80:
+            pos += 1
+        else:
+            length, pos = _read_varint(buf, pos)
+        # Arguments are immutable, so the records share the arguments decoded from the same bytes
+        block = buf[pos:pos + length]
+        args = blocks.get(block)
+        if args is None:
+            args = self.read_args(buf, pos, arg_layout)
+            if len(blocks) < _SHARED_ARGS:
+                blocks[block] = args
+        pos += length
+
+        if not child_layout:
+            return self.new_conf(cls, args), pos
+        state = dict(args)
+        for name, kind, prototype, _ in child_layout:
+            if kind == CONF_FIELD:
+                state[name], pos = self.read_conf(buf, pos)
+            else:
+                state[name], pos = self.read_list(buf, pos, prototype)
+        return self.new_conf(cls, state), pos
+
+    def new_conf(self, cls: type, state: Dict[str, Any]) -> Any:
+        result = object.__new__(cls)
+        result.__dict__.update(state)
+        return result
+
+    def read_args(self, buf: bytes, pos: int, arg_layout: _LAYOUT) -> Dict[str, Arg]:
+        # The common cases are inlined, this loop runs for every argument of the records
+        result = {}
+        stored = buf[pos]
+        if stored < 0x80:
+            pos += 1
+        else:
+            stored, pos = _read_varint(buf, pos)
+        for name, code, prototype, args in arg_layout:
+            if not stored & 1:
+                result[name] = prototype
+                stored >>= 1
+                continue
+            stored >>= 1
+            if code <= _READ_BOOL:
+                n = buf[pos]
+                if n < 0x80:
+                    pos += 1
+                else:
+                    n, pos = _read_varint(buf, pos)
+                if code == _READ_INT:
+                    value = (n >> 1) if not n & 1 else -((n + 1) >> 1)
+                elif code == _READ_OPTION:
+                    if n:
+                        value = prototype._spec.options[n - 1]
+                    else:
+                        value, pos = _read_str(buf, pos, None)
+                else:
+                    value = n == 1
+            elif code == _READ_FLOAT:
+                value, pos = _read_float(buf, pos, None)
+                if not value:
+                    # 0.0 and -0.0 are equal keys of `args`
+                    result[name] = prototype._new(value)
+                    continue
+            elif code == _READ_STR:
+                value, pos = _read_str(buf, pos, None)
+            else:
+                value, pos = args(buf, pos, prototype)
+                result[name] = prototype._new(value)
+                continue
+
+            arg = args.get(value)
+            if arg is None:
+                arg = prototype._new(value)
+                if len(args) < _SHARED_ARGS:
+                    args[value] = arg
+            result[name] = arg
+        return result
+
+    def read_list(self, buf: bytes, pos: int, prototypes: list) -> Tuple[list, int]:
+        count, pos = _read_varint(buf, pos)
+        items = []
+        for i in range(count):
+            tag = buf[pos]
+            pos += 1
+            if tag == _ITEM_CONF:
+                item, pos = self.read_conf(buf, pos)
+            elif tag == _ITEM_LIST:
+                prototype = _item_prototype(prototypes, i)
+                item, pos = self.read_list(buf, pos, prototype if isinstance(prototype, list) else [])
+            elif tag == _ITEM_ARG:
+                prototype = _item_prototype(prototypes, i)
+                value, pos = _arg_codec(prototype)[0](buf, pos, prototype)
+                item = prototype._new(value)
+            else:
+                raise ValueError(f"Corrupted binary configuration file, unknown list item tag {tag}")
+            items.append(item)
+        return items, pos
+
+
+class _FrozenDecoder(_Decoder):
+    """Decode the records into `FrozenConf`s, without building the configurations first."""
+    __slots__ = ('snapshots',)
+
+    def __init__(self) -> None:
+        super().__init__()
+        # The snapshots of the configurations without children, by the argument block they were created from
+        self.snapshots: Dict[int, Tuple[Dict[str, Any], FrozenConf]] = {}
+
+    def new_conf(self, cls: type, state: Dict[str, Any]) -> FrozenConf:
+        # Snapshots are immutable, so the configurations decoded from the same bytes share the same one
+        cached = self.snapshots.get(id(state))
+        if cached is not None and cached[0] is state:
+            return cached[1]
+        result = _new_snapshot(cls, cls._schema.fields, [state[name] for name in cls._schema.fields])
+        if not _read_layout(cls)[1] and len(self.snapshots) < _SHARED_ARGS:
+            self.snapshots[id(state)] = (state, result)
+        return result
+
+    def read_list(self, buf: bytes, pos: int, prototypes: list) -> Tuple[Any, int]:
+        items, pos = super().read_list(buf, pos, prototypes)
+        return tuple(items), pos
+
+
+def _resolve_class(name: str, conf_cls: Type[Conf]) -> type:
+    """Find the class `name` among the loaded configuration classes, the subclasses of `conf_cls` first.
+
+    Nothing is imported, so that a file cannot import modules: the classes of the records must be imported before.
+    """
+    module_name, _, qualname = name.partition(':')
+    for root in (conf_cls, Conf):
+        pending = [root]
+        while pending:
+            cls = pending.pop()
+            if cls.__module__ == module_name and cls.__qualname__ == qualname:
+                return cls
+            pending.extend(cls.__subclasses__())
+    raise ValueError(f"Unknown configuration class {name}, the module defining it must be imported first")
+
+
+def _item_prototype(prototypes: list, index: int) -> Any:
+    if index < len(prototypes):
+        return prototypes[index]
+    return prototypes[-1] if prototypes else None
+
+
+def _write_layout(cls: type) -> Tuple[Tuple[Tuple[str, Arg, _WRITER], ...], _LAYOUT]:
+    """The (name, class attribute, writer) of the argument fields of `cls`, and the (name, kind, class attribute, None)
+    of its other fields, in the stored order."""
+    cached = _WRITE_LAYOUTS.get(cls)
+    if cached is not None and cached[0] is cls._schema:
+        return cached[1]
+    arg_layout, child_layout = _read_layout(cls)
+    result = (tuple((name, prototype, _arg_codec(prototype)[1]) for name, _, prototype, _ in arg_layout), child_layout)
+    _WRITE_LAYOUTS[cls] = (cls._schema, result)
+    return result
+
+
+def _read_layout(cls: type) -> Tuple[_LAYOUT, _LAYOUT]:
+    """The (name, read code, class attribute, reader) of the argument fields of `cls`, the reader is None if the code
+    is not _READ_OTHER, and the (name, kind, class attribute, None) of its other fields, in the stored order."""
+    schema = cls._schema
+    cached = _READ_LAYOUTS.get(cls)
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    arg_layout = []
+    child_layout = []
+    for name in schema.fields:
+        kind = schema.kinds[name]
+        prototype = getattr(cls, name)
+        if kind == ARG_FIELD:
+            code = _READ_OTHER if prototype._allow_none else _READ_CODES.get(type(prototype), _READ_OTHER)
+            arg_layout.append((name, code, prototype, _arg_codec(prototype)[0] if code == _READ_OTHER else None))
+        else:
+            child_layout.append((name, kind, prototype, None))
+    result = (tuple(arg_layout), tuple(child_layout))
+    _READ_LAYOUTS[cls] = (schema, result)
+    return result
+
+
+# Values
+
+
+def _same_value(value: Any, default: Any) -> bool:
+    if type(value) is not type(default) or value != default:
+        return False
+    # 0.0 == -0.0
+    return not isinstance(value, float) or math.copysign(1.0, value) == math.copysign(1.0, default)
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_entry(out: bytearray, tag: int, payload: Union[bytes, bytearray]) -> None:
+    out.append(tag)
+    _write_varint(out, len(payload))
+    out += payload
+
+
+def _write_int(out: bytearray, value: int, _: Any) -> None:
+    # Zigzag encoding, so that small negative integers stay small
+    _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def _read_int(buf: bytes, pos: int, _: Any) -> Tuple[int, int]:
+    n = buf[pos]
+    if n < 0x80:
+        pos += 1
+    else:
+        n, pos = _read_varint(buf, pos)
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+
+
+def _write_float(out: bytearray, value: float, _: Any) -> None:
+    """Store a float as a decimal mantissa and exponent when it is shorter, e.g. 3 bytes for 0.001 instead of 8.
+
+    The first zigzag varint is 0 for a raw double, or the exponent, shifted by one if it is not negative, followed by
+    the zigzag mantissa.
+    """
+    value = float(value)
+    if math.isfinite(value) and (value != 0.0 or math.copysign(1.0, value) > 0):
+        digits, _, exponent = float.__repr__(value).partition('e')
+        whole, _, fraction = digits.partition('.')
+        fraction = fraction.rstrip('0')
+        mantissa = int(whole + fraction)
+        exponent_value = (int(exponent) if exponent else 0) - len(fraction)
+        while mantissa and mantissa % 10 == 0:
+            mantissa //= 10
+            exponent_value += 1
+        if abs(mantissa) < 2 ** 48:
+            _write_int(out, exponent_value + 1 if exponent_value >= 0 else exponent_value, None)
+            _write_int(out, mantissa, None)
+            return
+    out.append(0)
+    out += _DOUBLE.pack(value)
+
+
+def _read_float(buf: bytes, pos: int, _: Any) -> Tuple[float, int]:
+    exponent, pos = _read_int(buf, pos, None)
+    if exponent == 0:
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + 8
+    if exponent > 0:
+        exponent -= 1
+    mantissa, pos = _read_int(buf, pos, None)
+    if abs(mantissa) < _MAX_EXACT:
+        if 0 <= exponent < 23:
+            return mantissa * _POW10[exponent], pos
+        if -23 < exponent < 0:
+            return mantissa / _POW10[-exponent], pos
+    return float(f'{mantissa}e{exponent}'), pos
+
+
+def _write_str(out: bytearray, value: str, _: Any) -> None:
+    data = value.encode('utf-8')
+    _write_varint(out, len(data))
+    out += data
+
+
+def _read_str(buf: bytes, pos: int, _: Any) -> Tuple[str, int]:
+    length = buf[pos]
+    if length < 0x80:
+        pos += 1
+    else:
+        length, pos = _read_varint(buf, pos)
+    return buf[pos:pos + length].decode('utf-8'), pos + length
+
+
+def _write_bool(out: bytearray, value: bool, _: Any) -> None:
+    out.append(1 if value else 0)
+
+
+def _read_bool(buf: bytes, pos: int, _: Any) -> Tuple[bool, int]:
+    return buf[pos] == 1, pos + 1
+
+
+def _write_option(out: bytearray, value: str, prototype: OptionArg) -> None:
+    # The index in the static options plus one, or 0 followed by the option itself
+    options = prototype._spec.options
+    if prototype.option_fn is None and value in prototype._spec.option_set:
+        _write_varint(out, options.index(value) + 1)
+    else:
+        out.append(0)
+        _write_str(out, value, None)
+
+
+def _read_option(buf: bytes, pos: int, prototype: OptionArg) -> Tuple[str, int]:
+    index, pos = _read_varint(buf, pos)
+    if index == 0:
+        return _read_str(buf, pos, None)
+    return prototype._spec.options[index - 1], pos
+
+
+def _write_json(out: bytearray, value: Any, _: Any) -> None:
+    _write_str(out, json.dumps(value, ensure_ascii=False), None)
+
+
+def _read_json(buf: bytes, pos: int, _: Any) -> Tuple[Any, int]:
+    content, pos = _read_str(buf, pos, None)
+    return json.loads(content), pos
+
+
+_CODECS: Dict[type, Tuple[_READER, _WRITER]] = {
+    IntArg: (_read_int, _write_int),
+    FloatArg: (_read_float, _write_float),
+    StrArg: (_read_str, _write_str),
+    BoolArg: (_read_bool, _write_bool),
+    OptionArg: (_read_option, _write_option),
+}
+
+
+def _arg_codec(arg: Arg) -> Tuple[_READER, _WRITER]:
+    """The (reader, writer) of the values of `arg`, argument types without a codec are stored as JSON."""
+    read, write = next((_CODECS[cls] for cls in type(arg).__mro__ if cls in _CODECS), (_read_json, _write_json))
+    if not arg._allow_none:
+        return read, write
+
+    def read_optional(buf: bytes, pos: int, prototype: Any) -> Tuple[Any, int]:
+        if buf[pos] == 0:
+            return None, pos + 1
+        return read(buf, pos + 1, prototype)
+
+    def write_optional(out: bytearray, value: Any, prototype: Any) -> None:
+        if value is None:
+            out.append(0)
+        else:
+            out.append(1)
+            write(out, value, prototype)
+
+    return read_optional, write_optional
@@ -1,26 +1,26 @@
-from typing import Any, Dict, Union, Optional, Type, Callable, TypeVar, ParamSpec, Set, List, overload
+from typing import (Any, Dict, Union, Optional, Type, Callable, TypeVar, ParamSpec, Set, List, Tuple, Mapping,
+                    NamedTuple, Iterator, Iterable, Sequence, overload, TYPE_CHECKING)
 from typing_extensions import Self
 from collections import defaultdict
+from contextlib import contextmanager
+from types import MappingProxyType
 import copy
-import json
+import functools
+import hashlib
 import logging
 import sys
-import __main__
-import tempfile
-import subprocess
 import os
-import time
-import psutil
-
-import networkx as nx
-import tomli
-import tomli_w
-import yaml
-import streamlit as st
-from streamlit.delta_generator import DeltaGenerator
 
 from .args import Arg, JSON, ST_TAG, JSON_VALUE
-from .utils import is_running_in_streamlit, get_conf_dict_from_session, find_chaned_values, is_dict_different
+from .utils import PATH, parse_path, format_path
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from .batch import BatchTable
+    from .frozen import FrozenConf
+
+# NOTE: networkx, tomli, tomli_w, yaml and streamlit are imported on first use, so that `import hyperargs`
+# only loads the standard library. Headless workers never pay for the web GUI or the unused format backends.
 
 logger = logging.getLogger(__name__)
 
@@ -28,16 +28,48 @@ C = TypeVar('C', bound='Conf')
 P = ParamSpec('P')
 R = TypeVar('R')
 
+# Field kinds of a compiled configuration schema
+ARG_FIELD = 'arg'
+CONF_FIELD = 'conf'
+LIST_FIELD = 'list'
+
+
+class ConfSchema(NamedTuple):
+    """The frozen layout of a configuration class, compiled once when the class is created."""
+    fields: Tuple[str, ...]                     # Field names, in the order they are serialized
+    kinds: Mapping[str, str]                    # Field name -> ARG_FIELD, CONF_FIELD or LIST_FIELD
+    monitors: Mapping[str, Tuple[str, ...]]     # Field name -> names of the monitor methods watching it
+    parse_order: Tuple[str, ...]                # Field names sorted so that parents come before their children
+
+
+class RecordError(ValueError):
+    """A record of a multi-record file is invalid, yielded by `Conf.iter_from_file` in place of the configuration.
+
+    `index` is the position of the record in the file, `line` its line number when known and `error` the cause.
+    """
+
+    def __init__(self, file_path: str, index: int, line: Optional[int], error: BaseException):
+        location = f"record {index}" if line is None else f"record {index} (line {line})"
+        super().__init__(f"Invalid {location} of {file_path}: {error}")
+        self.index = index
+        self.line = line
+        self.error = error
+
+
 class Conf:
     """Base class for configuration objects."""
 
-    _dep_graph: nx.DiGraph = nx.DiGraph()
+    # The dependency graph is kept as plain nodes and edges, networkx is only involved once edges exist
+    _dep_nodes: Dict[str, None] = {}
+    _dep_edges: List[Tuple[str, str]] = []
     _monitors: Dict[str, Set[str]] = defaultdict(set)
+    _schema: ConfSchema
 
     def __init_subclass__(cls) -> None:
         super().__init_subclass__()
         # Add a node for the subclass in the dependency graph
-        cls._dep_graph = copy.deepcopy(cls._dep_graph)
+        cls._dep_nodes = copy.deepcopy(cls._dep_nodes)
+        cls._dep_edges = copy.deepcopy(cls._dep_edges)
         cls._monitors = copy.deepcopy(cls._monitors)
 
         for name in dir(cls):
@@ -55,9 +87,40 @@ class Conf:
                 raise TypeError((f"Unsupported type for field '{name}': {value}({type(value)}), only Arg, list, "
                                  "tuple, or Conf are allowed"))
 
-            cls._dep_graph.add_node(name)
+            cls._dep_nodes[name] = None
             setattr(cls, name, copy.deepcopy(value))
 
+        cls._schema = cls._compile_schema()
+
+    @classmethod
+    def _compile_schema(cls) -> ConfSchema:
+        """Compile the field layout, monitor table and parse order of the class."""
+        kinds: Dict[str, str] = {}
+        for name in cls._dep_nodes:
+            kind = _field_kind(getattr(cls, name, None))
+            if kind is not None:
+                kinds[name] = kind
+        fields = tuple(sorted(kinds))
+
+        if cls._dep_edges:
+            dep_graph = _build_dep_graph(cls._dep_nodes, cls._dep_edges)
+            parse_order = tuple(name for name in _nx().topological_sort(dep_graph) if name in kinds)
+        else:
+            parse_order = fields
+
+        return ConfSchema(
+            fields=fields,
+            kinds=MappingProxyType(kinds),
+            monitors=MappingProxyType({k: tuple(sorted(v)) for k, v in cls._monitors.items() if v}),
+            parse_order=parse_order,
+        )
+
+    def __init__(self) -> None:
+        # Monitors may extend or truncate lists in place, so every instance owns copies of the class lists
+        for name, kind in self._schema.kinds.items():
+            if kind == LIST_FIELD:
+                self.__dict__[name] = _copy_lists(getattr(self.__class__, name))
+
     @staticmethod
     def check_conf_type(value: Any) -> bool:
         if isinstance(value, Arg):
@@ -68,55 +131,99 @@ class Conf:
             return True
         return False
 
-    def to_dict(self) -> Dict[str, JSON]:
-        """Convert the configuration to a dictionary."""
-        values: Dict[str, JSON] = {}
-        for name in dir(self):
-            if name.startswith('_'):
-                continue
-            value = getattr(self, name)
-            if callable(value):
-                continue
+    def _iter_fields(self) -> Iterator[Tuple[str, Union[Arg, 'Conf', list]]]:
+        """Iterate over the (name, value) pairs of the fields, following the compiled schema."""
+        fields = self._schema.fields
+        extra = self._extra_fields()
+        if extra:
+            fields = tuple(sorted(fields + extra))
 
-            if not self.check_conf_type(value):
+        for name in fields:
+            value = getattr(self, name)
+            if name in extra and not self.check_conf_type(value):
                 raise TypeError((f"Unsupported type for field '{name}': {type(value)}, only Arg, list, tuple, or Conf "
                                  "are allowed"))
+            yield name, value
 
-            values[name] = _to_json_dict(value)
+    def _extra_fields(self) -> Tuple[str, ...]:
+        """Get the fields assigned on this instance only, which are not part of the class schema."""
+        dynamic_fields = self.__dict__.get('_dynamic_fields')
+        if not dynamic_fields:
+            return ()
+        return tuple(name for name in dynamic_fields if not callable(self.__dict__[name]))
 
-        return values
+    def to_dict(self) -> Dict[str, JSON]:
+        """Convert the configuration to a dictionary."""
+        return {name: _to_json_dict(value) for name, value in self._iter_fields()}
 
     def field_names(self) -> List[str]:
         """Get the names of all fields in the configuration."""
-        return list(self.to_dict().keys())
+        return [name for name, _ in self._iter_fields()]
 
-    def to_json(self, indent: Optional[Union[str, int]] = None) -> str:
-        """Convert the configuration to a JSON string."""
-        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+    def to_json(self, indent: Optional[Union[str, int]] = None, canonical: bool = False) -> str:
+        """Convert the configuration to a JSON string, with the backend of `hyperargs.jsonio`.
+
+        The canonical JSON is compact, with sorted keys, and is the same whatever the backend, see
+        `hyperargs.jsonio.encode_canonical`.
+        """
+        from . import jsonio
+        if canonical:
+            assert indent is None, "Canonical JSON is compact, it cannot be indented"
+            return jsonio.encode_canonical(self)
+        return jsonio.dumps(self.to_dict(), indent=indent)
 
     def to_toml(self) -> str:
         """Convert the configuration to a TOML string."""
+        import tomli_w
         return tomli_w.dumps(self.to_dict())
 
     def to_yaml(self) -> str:
         """Convert the configuration to a YAML string."""
+        import yaml
         return yaml.dump(self.to_dict(), sort_keys=False)
 
+    def fingerprint(self) -> str:
+        """Get a stable SHA-256 hex digest of the configuration values.
+
+        The digest is computed from a canonical encoding of the field names and values, so it is stable across
+        processes, platforms and Python versions. Digests are cached per field and per sub-configuration, so after a
+        change only the changed values and the configurations containing them are rehashed.
+        """
+        return self._digest().hex()
+
+    def _digest(self) -> bytes:
+        """Get the digest of this configuration, reusing the cached digests of the unchanged fields."""
+        cache: Dict[Optional[str], Any] = self.__dict__.get('_digest_cache')  # type: ignore[assignment]
+        if cache is None:
+            cache = self.__dict__['_digest_cache'] = {}
+
+        # Every field is cached as (the value or its digest, the encoded name followed by the digest of the value)
+        parts = []
+        for name, value in self._iter_fields():
+            cached = cache.get(name)
+            if isinstance(value, Conf):
+                digest = value._digest()
+                if cached is None or cached[0] != digest:
+                    cached = cache[name] = (digest, _length_prefixed(name.encode('utf-8')) + digest)
+            elif isinstance(value, list):
+                list_cache = _list_digest(value, cached[0] if cached is not None else None)
+                if cached is None or cached[0][2] != list_cache[2]:
+                    cached = (list_cache, _length_prefixed(name.encode('utf-8')) + list_cache[2])
+                cached = cache[name] = (list_cache, cached[1])
+            elif cached is None or cached[0] is not value:
+                cached = cache[name] = (value, _length_prefixed(name.encode('utf-8')) + _item_digest(value))
+            parts.append(cached[1])
+
+        parts_key = tuple(parts)
+        cached = cache.get(None)
+        if cached is None or cached[0] != parts_key:
+            cached = cache[None] = (parts_key, hashlib.sha256(b'C' + b''.join(parts)).digest())
+        return cached[1]
+
     @staticmethod
     def add_dependency(parent: str, child: str) -> Callable[[Type[C]], Type[C]]:
         """Add a dependency relationship from parent to child in the graph."""
-        def decorator(cls: Type[C]) -> Type[C]:
-            assert isinstance(cls._dep_graph, nx.DiGraph), "_dep_graph must be a networkx DiGraph"
-            assert parent != child, "Parent and child cannot be the same"
-            assert not nx.has_path(cls._dep_graph, child, parent), (f"Adding dependency from '{parent}' to '{child}' "
-                                                                    "would create a conf dependency cycle")
-            assert hasattr(cls, parent), f"Parent attribute '{parent}' does not exist in class '{cls.__name__}'"
-            assert hasattr(cls, child), f"Child attribute '{child}' does not exist in class '{cls.__name__}'"
-            assert not cls._dep_graph.has_edge(parent, child), f"Dependency from '{parent}' to '{child}' already exists"
-
-            cls._dep_graph.add_edge(parent, child)
-            return cls
-        return decorator
+        return add_dependency(parent, child)
 
     @staticmethod
     def monitor_on(depend_fields: Union[str, List[str]]) -> Callable[[Callable[P, R]], Callable[P, R]]:
@@ -132,70 +239,344 @@ class Conf:
 
     def __setattr__(self, name: str, value: Any) -> None:
         super().__setattr__(name, value)
-        if name in self._monitors:
-            for monitor in self._monitors[name]:
+        digest_cache = self.__dict__.get('_digest_cache')
+        if digest_cache:
+            digest_cache.pop(name, None)
+        if name not in self._schema.kinds and not name.startswith('_'):
+            # Fields added at runtime are tracked by the instance, the class schema is shared and never modified
+            dynamic_fields = self.__dict__.get('_dynamic_fields')
+            if dynamic_fields is None:
+                dynamic_fields = self.__dict__['_dynamic_fields'] = {}
+            dynamic_fields[name] = None
+
+        if name in self._schema.monitors:
+            dirty_fields = self.__dict__.get('_dirty_fields')
+            if dirty_fields is not None:
+                dirty_fields[name] = None
+            else:
+                self._run_monitors((name,))
+
+    def _run_monitors(self, fields: Iterable[str]) -> None:
+        """Run the monitors watching `fields`, every monitor runs at most once."""
+        done: Set[str] = set()
+        for field in fields:
+            for monitor in self._schema.monitors.get(field, ()):
+                if monitor in done:
+                    continue
+                done.add(monitor)
                 if hasattr(self, monitor):
                     method = getattr(self, monitor)
                     if callable(method):
                         method()
 
-        if name not in self._dep_graph:
-            self._dep_graph.add_node(name)
+    @contextmanager
+    def batch_update(self) -> Iterator[Self]:
+        """Defer the monitors of the fields assigned inside the block until the block exits.
+
+        The assigned fields are recorded as dirty, and every affected monitor runs once at the end, in dependency
+        order. Fields assigned by the monitors themselves are processed the same way until nothing is left dirty.
+        Nested blocks are merged into the outermost one.
+
+        Example:
+            with conf.batch_update():
+                conf.optimizer_type = conf.optimizer_type.parse('sgd')
+                conf.int_arg = conf.int_arg.parse(3)
+        """
+        if self.__dict__.get('_dirty_fields') is not None:
+            yield self
+            return
+
+        self.__dict__['_dirty_fields'] = {}
+        try:
+            yield self
+            self._flush_monitors()
+        finally:
+            self.__dict__['_dirty_fields'] = None
+
+    def _flush_monitors(self) -> None:
+        """Run the monitors of the dirty fields in dependency order, until no field is left dirty."""
+        dirty_fields = self.__dict__['_dirty_fields']
+        # Every round clears at least one field for good unless the monitors form a cycle
+        for _ in range(len(self._schema.monitors) + 1):
+            if not dirty_fields:
+                return
+            positions = {name: i for i, name in enumerate(self._topological_order())}
+            fields = sorted(dirty_fields, key=lambda name: positions.get(name, len(positions)))
+            dirty_fields.clear()
+            self._run_monitors(fields)
+
+        raise RuntimeError(f"Monitors of {self.__class__.__name__} keep changing the fields {list(dirty_fields)}, "
+                           "please check the monitors for cycles")
 
     @classmethod
     def from_dict(cls: Type[C], data: Dict[str, JSON], strict: bool = False) -> C:
-        """Create a configuration instance from a dictionary. TODO"""
-        instance = cls()
-        data_ = copy.deepcopy(data)
+        """Create a configuration instance from a dictionary."""
+        return cls()._parse_dict(data, strict=strict)
 
-        for name in nx.topological_sort(instance._dep_graph):
-            if name in data_:
-                value = data_[name]
-                attr = getattr(cls, name)
+    def parse_dict(self, data: Dict[str, JSON], strict: bool = False) -> Self:
+        """Update the configuration instance from a dictionary."""
+        return self._parse_dict(data, strict=strict)
 
-                parsed_value = _parse_attr(value, attr)
-                setattr(instance, name, parsed_value)
+    def _parse_dict(self, data: Dict[str, JSON], strict: bool) -> Self:
+        """Parse `data` into this instance in a single pass over the fields, in dependency order.
 
-                data_.pop(name)
+        Sub-configurations are never modified in place, the parsed ones are copies. `data` is never modified.
+        """
+        unexpected = self._update_fields(data, _parse_attr)
 
-        if strict and data_:
-            raise ValueError(f"Unexpected fields in data: {list(data_.keys())}")
-        elif data_:
-            logger.warning(f"Ignored unexpected fields in data: {list(data_.keys())}")
+        if unexpected:
+            if strict:
+                raise ValueError(f"Unexpected fields in data: {unexpected}")
+            logger.warning(f"Ignored unexpected fields in data: {unexpected}")
 
-        return instance.parse_dict(data, strict=strict)
+        return self
 
-    def parse_dict(self, data: Dict[str, JSON], strict: bool = False) -> Self:
-        """Create a configuration instance from a dictionary. TODO"""
-        data = copy.deepcopy(data)
+    def _apply_updates(self, updates: Mapping[PATH, Any]) -> Self:
+        """Update the leaves at the given paths of this instance.
 
-        for name in nx.topological_sort(self._dep_graph):
-            if name in data:
-                value = data[name]
-                attr = getattr(self, name)
+        A callable value is called with the current value at its path when the path is updated, i.e. after the
+        monitors of its parents ran, and its result is parsed.
 
-                parsed_value = _update_parse_attr(value, attr)
-                setattr(self, name, parsed_value)
+        Only the sub-configurations and lists on the updated paths are copied, the rest is shared with the previous
+        values. Monitors and the dependency order apply as in `parse_dict`.
+        """
+        unknown = self._update_fields(_group_updates(updates), _update_attr)
+        if unknown:
+            raise KeyError(f"Unknown fields in {self.__class__.__name__}: {unknown}")
+        return self
 
-                data.pop(name)
+    def _update_fields(self, values: Mapping[str, Any], update: Callable[[Any, Any], Any]) -> List[str]:
+        """Assign `update(values[name], current_value)` to the fields in `values`, as one batch in dependency order.
+
+        The monitors of a field run once it is updated, before the next field in `values` is updated, so a value given
+        in `values` always wins over a monitor of an earlier field, as with immediate monitors. The monitors of the
+        fields assigned by monitors are deferred and run once each, in dependency order.
+
+        Returns:
+            List[str]: The names in `values` that are not fields of this instance.
+        """
+        updated: Set[str] = set()
+        schema = self._schema
+        state = self.__dict__
+        with self.batch_update():
+            dirty_fields = state['_dirty_fields']
+            for name in self._topological_order():
+                if name in values:
+                    if dirty_fields:
+                        self._flush_monitors()
+
+                    current = getattr(self, name)
+                    value = update(values[name], current)
+                    if value is current:
+                        pass
+                    elif name in schema.kinds and name not in schema.monitors:
+                        # The shortcut of `__setattr__` for the fields of the schema that nothing monitors
+                        state[name] = value
+                        digest_cache = state.get('_digest_cache')
+                        if digest_cache:
+                            digest_cache.pop(name, None)
+                    else:
+                        setattr(self, name, value)
+                    updated.add(name)
+
+        if len(updated) < len(values):
+            return [name for name in values if name not in updated]
+        return []
+
+    def freeze(self) -> 'FrozenConf':
+        """Get an immutable, hashable snapshot of the configuration, which can be shared between threads.
+
+        The snapshot shares the Args of the configuration, `thaw` it to get a mutable copy. See `hyperargs.frozen`.
+        """
+        from .frozen import freeze
+        return freeze(self)
+
+    def _shallow_copy(self) -> Self:
+        """Copy the instance, sharing its Args and sub-configurations with the copy.
+
+        Lists are copied, since monitors may extend or truncate them in place. Sharing the rest is safe because the
+        parse engine replaces sub-configurations with updated copies instead of modifying them.
+        """
+        result = object.__new__(self.__class__)
+        state = result.__dict__
+        state.update(self.__dict__)
+        for name, kind in self._schema.kinds.items():
+            if kind == LIST_FIELD:
+                state[name] = _copy_lists(getattr(self, name))
+        if '_dynamic_fields' in state:
+            state['_dynamic_fields'] = dict(state['_dynamic_fields'])
+        if '_digest_cache' in state:
+            state['_digest_cache'] = dict(state['_digest_cache'])
+        state.pop('_dirty_fields', None)
+        return result
 
-        if strict and data:
-            raise ValueError(f"Unexpected fields in data: {list(data.keys())}")
-        elif data:
-            logger.warning(f"Ignored unexpected fields in data: {list(data.keys())}")
+    def __copy__(self) -> Self:
+        return self._shallow_copy()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Self:
+        """Copy the sub-configurations and lists, the immutable Args are shared with the copy."""
+        result = object.__new__(self.__class__)
+        memo[id(self)] = result
+        state = result.__dict__
+        for name, value in self.__dict__.items():
+            if name in _INSTANCE_STATE:
+                if value is not None and name != '_dirty_fields':
+                    state[name] = dict(value)
+            else:
+                state[name] = _deepcopy_item(value, memo)
+        return result
 
-        return self
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the class and the values of the fields.
+
+        The Args that share the spec of their class attribute are pickled as their values, and restored from the
+        class attribute, so the specs are neither pickled nor copied. The fields that are still the class attributes
+        and the caches are not pickled.
+        """
+        cls = self.__class__
+        state = self.__dict__
+        values = []
+        stored = raw = 0
+        for i, name in enumerate(self._schema.fields):
+            if name not in state:
+                continue
+            value = state[name]
+            stored |= 1 << i
+            if isinstance(value, Arg) and not value.__class__.__dictoffset__:
+                # The arguments with a `__dict__` may hold more than their spec and value, they are pickled whole
+                prototype = getattr(cls, name)
+                if type(value) is type(prototype) and value._spec is prototype._spec:
+                    value = value._value
+                    raw |= 1 << i
+            values.append(value)
+
+        attributes = {name: value for name, value in state.items()
+                      if name not in self._schema.kinds and name not in _INSTANCE_STATE}
+        if attributes:
+            return _restore_conf, (cls, stored, raw, tuple(values), attributes)
+        return _restore_conf, (cls, stored, raw, tuple(values))
+
+    def _topological_order(self) -> Tuple[str, ...]:
+        """Get the field names sorted so that every parent comes before its dependent children."""
+        order = self._schema.parse_order
+        extra = self._extra_fields()
+        if extra:
+            # Fields added at runtime have no dependencies, they are parsed after the schema fields
+            order = order + extra
+        return order
+
+    def diff(self, other: 'Conf') -> Dict[str, JSON]:
+        """Get the patch turning this configuration into `other`, as {flattened leaf path: value in `other`}.
+
+        Sub-configurations and lists shared by both sides are skipped without being walked. Fields that only exist in
+        this configuration are not part of the patch. Apply the patch with `apply_patch`.
+        """
+        changes: Dict[PATH, JSON] = {}
+        _diff_items(self, other, (), changes)
+        return {format_path(path): value for path, value in changes.items()}
+
+    def apply_patch(self, patch: Mapping[str, JSON]) -> Self:
+        """Apply a patch of {flattened leaf path: value}, e.g. from `diff`, to this configuration.
+
+        Only the patched fields are parsed and assigned, so only their monitors are triggered. The patch is applied
+        in dependency order, e.g. a new 'optimizer_type' is applied, and its monitor run, before the
+        'optimizer_conf.*' leaves.
+        """
+        return self._apply_updates({parse_path(path): value for path, value in patch.items()})
+
+    def apply_env(self, prefix: Optional[str] = None, environ: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+        """Update this configuration from environment variables, in a single pass over the fields.
+
+        With a `prefix`, e.g. 'TRAIN', the leaf at 'optimizer_conf.lr' is read from TRAIN__OPTIMIZER_CONF__LR and
+        'lst.[0].lr' from TRAIN__LST__0__LR. The `env_bind` variables of the arguments are read too, a prefixed
+        variable takes precedence. The variables are read from a snapshot of `environ`, `os.environ` by default.
+        Monitors and the dependency order apply as in `parse_dict`, e.g. TRAIN__OPTIMIZER_TYPE=sgd is applied first,
+        so TRAIN__OPTIMIZER_CONF__MOMENTUM can set a field of the SGD configuration.
+
+        Returns:
+            Dict[str, str]: {flattened path: variable name} of the fields whose final value comes from the environment.
+                A field set from a variable and then overwritten by a monitor is left out.
+        """
+        environ = dict(os.environ if environ is None else environ)
+        root = _EnvNode()
+        if prefix is not None:
+            head = f'{prefix}__'
+            for var, value in environ.items():
+                if var.startswith(head):
+                    node = root
+                    for key in var[len(head):].split('__'):
+                        node = node.children.setdefault(key, _EnvNode())
+                    node.var, node.value = var, value
+
+        applied: Dict[PATH, Tuple[str, Arg]] = {}
+        _update_from_env(self, root, (), environ, applied)
+        unused = sorted(set(root.variables()) - {var for var, _ in applied.values()})
+        if unused:
+            logger.warning(f"Ignored environment variables that match no field: {unused}")
+
+        report: Dict[str, str] = {}
+        for path, (var, arg) in applied.items():
+            try:
+                final = _get_item(self, path)
+            except (KeyError, IndexError):
+                continue
+            if not isinstance(final, Arg):
+                continue
+            # A monitor may have written the same value again
+            final_value, value = final.value(), arg.value()
+            if final is arg or (final_value == value and type(final_value) is type(value)):
+                report[format_path(path)] = var
+        return report
+
+    def sweep(
+        self,
+        grid: Optional[Mapping[str, Sequence[JSON]]] = None,
+        random: Optional[Mapping[str, Any]] = None,
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> Iterator[Self]:
+        """Lazily yield variants of this configuration over a grid and/or random samples.
+
+        Args:
+            grid: Flattened paths, e.g. 'optimizer_conf.lr', mapped to the values to try. Every combination is used.
+            random: Flattened paths mapped to how to sample them: None for the whole domain of the Arg, a list of
+                values, a (low, high) range or a (low, high, 'log') range.
+            n: The number of random samples for each grid combination, defaults to 1 when `random` is given.
+            seed: The seed of the random generator.
+
+        Unchanged sub-configurations are shared between the variants, see `hyperargs.sweep.iter_sweep`.
+        """
+        from .sweep import iter_sweep
+        return iter_sweep(self, grid=grid, random=random, n=n, seed=seed)
+
+    @classmethod
+    def load(cls: Type[C], layers: Sequence[Union[str, 'os.PathLike[str]', Mapping[str, JSON]]],
+             strict: bool = False) -> C:
+        """Create a configuration instance from layered sources, e.g. a base file, a site overlay and overrides.
+
+        A layer is the path to a .json, .toml, .yaml or .yml file, or a dictionary. The layers are deep-merged into
+        one dictionary, later layers taking precedence, which is parsed once. Dictionaries are merged by key and lists
+        by index. Files are cached by path, modification time and size, so loading them again in the same process
+        skips reading and decoding them. Environment variables can be applied to the result with `apply_env`.
+        """
+        data: Dict[str, JSON] = {}
+        for layer in layers:
+            layer_data = layer if isinstance(layer, Mapping) else _read_cached_config_file(os.fspath(layer))
+            data = _merge_layers(data, layer_data)
+        return cls.from_dict(data, strict=strict)
 
     @classmethod
     def from_json(cls: Type[C], json_str: str, strict: bool = False) -> C:
         """Create a configuration instance from a JSON string."""
-        data = json.loads(json_str)
+        from . import jsonio
+        data = jsonio.loads(json_str)
         assert isinstance(data, dict), "JSON string must represent a dictionary"
         return cls.from_dict(data, strict=strict)
 
     @classmethod
     def from_toml(cls: Type[C], toml_str: str, strict: bool = False) -> C:
         """Create a configuration instance from a TOML string."""
+        import tomli
         data = tomli.loads(toml_str)
         assert isinstance(data, dict), "TOML string must represent a dictionary"
         return cls.from_dict(data, strict=strict)
@@ -203,183 +584,164 @@ class Conf:
     @classmethod
     def from_yaml(cls: Type[C], yaml_str: str, strict: bool = False) -> C:
         """Create a configuration instance from a YAML string."""
+        import yaml
         data = yaml.safe_load(yaml_str)
         assert isinstance(data, dict), "YAML string must represent a dictionary"
         return cls.from_dict(data, strict=strict)
 
     @classmethod
-    def parse_command_line(cls: Type[C], strict: bool = False) -> C:
-        """Parse configuration file according to command line arguments."""
+    def load_from_file(cls: Type[C], file_path: str, strict: bool = False) -> C:
+        """Load a configuration saved by `save_to_file`, the format is chosen by the file extension.
+
+        A .hargs binary file holds many records, this loads the first one, see `hyperargs.binary.iter_records` for
+        the others. Binary records are restored without parsing, so `strict` only applies to the text formats.
+        """
+        if file_path.lower().endswith('.hargs'):
+            from .binary import load_record
+            return load_record(file_path, cls)
+        return cls.from_dict(_read_config_file(file_path), strict=strict)
+
+    @classmethod
+    def iter_from_file(
+        cls: Type[C], file_path: str, strict: bool = False, use_mmap: bool = False
+    ) -> Iterator[Union[C, RecordError]]:
+        """Lazily load the records of a multi-document .yaml/.yml file, a JSON Lines .jsonl/.ndjson file, or a .hargs
+        binary file, other formats hold a single record.
+
+        Only one record is held in memory at a time. An invalid record yields a `RecordError` instead of stopping the
+        iteration, except YAML syntax errors, which end it since the following documents cannot be found.
+
+        Args:
+            use_mmap: Read JSON Lines through a read-only memory map instead of buffered reads, which is faster for
+                large files. The mapped pages count in the resident memory but belong to the page cache.
+        """
+        lower_path = file_path.lower()
+        if lower_path.endswith('.hargs'):
+            from .binary import iter_records
+            yield from iter_records(file_path, cls)
+            return
+        if lower_path.endswith(('.jsonl', '.ndjson')):
+            from . import jsonio
+            documents = _iter_json_lines(file_path, use_mmap)
+            loads: Callable[[Any], Any] = jsonio.loads
+        elif lower_path.endswith(('.yaml', '.yml')):
+            documents = _iter_yaml_documents(file_path)
+            loads = _identity
+        elif lower_path.endswith(('.json', '.toml')):
+            documents = iter([(None, file_path)])
+            loads = _read_config_file
+        else:
+            raise ValueError("Unsupported file format. Supported formats: .jsonl, .ndjson, .yaml, .yml, .hargs, .json, "
+                             ".toml")
+
+        for index, (line, document) in enumerate(documents):
+            if isinstance(document, _YamlError):
+                yield RecordError(file_path, index, line, document.error)
+                if document.fatal:
+                    return
+                continue
+            try:
+                data = loads(document)
+                assert isinstance(data, dict), f"A record must represent a dictionary, got {type(data).__name__}"
+                yield cls.from_dict(data, strict=strict)
+            except Exception as e:
+                yield RecordError(file_path, index, line, e)
+
+    @classmethod
+    def validate_batch(cls, records: Sequence[Dict[str, JSON]]) -> 'BatchTable':
+        """Validate many records like `from_dict`, into NumPy columns of leaf values instead of instances.
+
+        Returns:
+            BatchTable: The columns by flattened path, e.g. 'optimizer_conf.lr', and the mask and messages of the
+                invalid records, see `hyperargs.batch` for details. Requires NumPy.
+        """
+        from .batch import validate_batch
+        return validate_batch(cls, records)
+
+    @classmethod
+    def from_web(cls: Type[C], strict: bool = False) -> 'Future[C]':
+        """Start the web GUI in the background, and get a future of the configuration set by the user.
+
+        The main script is run by `streamlit run <script> web_mode <address>` without blocking, so the program can
+        prepare other things, e.g. datasets, while the user edits the settings. The settings are sent back over a
+        local socket when the user clicks 'Finish & Run', then the server is stopped.
+        """
+        from .launcher import launch_web
+        return launch_web(cls, strict=strict)
 
-        if len(sys.argv) <= 2:
-            if len(sys.argv) == 1:
+    @classmethod
+    def parse_command_line(cls: Type[C], strict: bool = False) -> C:
+        """Parse configuration file according to command line arguments.
+
+        The `--set <path>=<value>` overrides, e.g. `--set optimizer_conf.lr=3e-4` or `--set lst[0].lr=0.1`, are
+        applied to the leaves after the other source, or to the defaults if there is none.
+        """
+        if len(sys.argv) > 1 and sys.argv[1] == 'web_mode':
+            from .web import run_web_mode
+            run_web_mode(cls)
+            raise RuntimeError("Web mode should never return, the Streamlit script is stopped by the web GUI.")
+
+        argv, overrides = _split_overrides(sys.argv[1:])
+        if len(argv) <= 1:
+            if len(argv) == 0:
+                if overrides:
+                    return cls()._apply_updates(overrides)
                 raise ValueError("No command line arguments provided. Use --help for usage information.")
-            if sys.argv[1] in ('--help', '-h'):
+            if argv[0] in ('--help', '-h'):
                 print("Usage:")
                 print("  --parse_json <json_string>    Parse configuration from JSON string")
                 print("  --parse_toml <toml_string>    Parse configuration from TOML string")
                 print("  --parse_yaml <yaml_string>    Parse configuration from YAML string")
-                print("  --config_path <file_path>     Parse configuration from file (supports .json, .toml, .yaml, .yml)")
+                print("  --config_path <file_path>     Parse configuration from file (supports .json, .toml, .yaml, .yml,")
+                print("                                .hargs)")
                 print("  --from_web                    Run configuration in web mode")
+                print("  --set <path>=<value>          Override a field after the source above, e.g. --set lst[0].lr=0.1,")
+                print("                                can be repeated")
                 sys.exit(0)
-            elif sys.argv[1] in ('--from_web', '--from-web'):
+            elif argv[0] in ('--from_web', '--from-web'):
                 print('Running configuration in web mode...')
             else:
                 raise ValueError("No command line arguments provided. Use --help for usage information.")
 
-        # assert len(sys.argv) >= 3, "Insufficient command line arguments, please refer to --help for usage information"
-        config_type = sys.argv[1]
+        config_type = argv[0]
 
         if config_type == '--parse_json':
-            assert len(sys.argv) == 3, "JSON string must be provided as a command line argument"
-            return cls.from_json(sys.argv[2], strict=strict)
+            assert len(argv) == 2, "JSON string must be provided as a command line argument"
+            instance = cls.from_json(argv[1], strict=strict)
         elif config_type == '--parse_toml':
-            assert len(sys.argv) == 3, "TOML string must be provided as a command line argument"
-            return cls.from_toml(sys.argv[2], strict=strict)
+            assert len(argv) == 2, "TOML string must be provided as a command line argument"
+            instance = cls.from_toml(argv[1], strict=strict)
         elif config_type == '--parse_yaml':
-            assert len(sys.argv) == 3, "YAML string must be provided as a command line argument"
-            return cls.from_yaml(sys.argv[2], strict=strict)
+            assert len(argv) == 2, "YAML string must be provided as a command line argument"
+            instance = cls.from_yaml(argv[1], strict=strict)
         elif config_type == '--config_path':
-            assert len(sys.argv) == 3, "Configuration file path must be provided as a command line argument"
-            file_path = sys.argv[2]
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            if file_path.lower().endswith('.json'):
-                return cls.from_json(content, strict=strict)
-            elif file_path.lower().endswith('.toml'):
-                return cls.from_toml(content, strict=strict)
-            elif file_path.lower().endswith(('.yaml', '.yml')):
-                return cls.from_yaml(content, strict=strict)
-            else:
-                raise ValueError("Unsupported configuration file format. Supported formats: .json, .toml, .yaml, .yml")
-        elif config_type == '--from_web':
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                tmp_path = temp_file.name
-            cmd = f'streamlit run {__main__.__file__} web_mode {tmp_path}'
-            web_proc = subprocess.Popen(cmd, shell=True)
-            web_proc.wait()
-
-            with open(tmp_path, 'r') as f:
-                content = f.read()
-            try:
-                instance = cls.from_json(content, strict=strict)
-            except Exception as e:
-                raise Exception(f"Config from web failed! Error: {e}")
-
-            # delete the temp file
-            os.remove(tmp_path)
-
-            return instance
-
-        elif config_type == 'web_mode':
-            assert is_running_in_streamlit(), ("Web mode can only be used by the program it self. You should never "
-                                               "run it manually.")
-            st.set_page_config(layout="wide")
-            st.sidebar.markdown("## HyperArgs - Web")
-            st.markdown("# Program Arguments")
-
-            st.markdown(f"Please set the parameters in the table, then click **'Finish & Run'** to run the "
-                                "program.")
-            assert len(sys.argv) == 3, "Web mode file path must be provided as a command line argument"
-            file_path = sys.argv[2]
-
-            if 'previous_instance' in st.session_state:
-                instance = st.session_state['previous_instance']
-            else:
-                instance = cls()
-
-            for k in list(st.session_state.keys()):
-                if not isinstance(k, str):
-                    continue
-                if k.startswith(f'_{ST_TAG}.'):
-                    key = f"{ST_TAG}.{k.split('.')[-1]}"
-                    st.session_state[key] = st.session_state[k]
-                    del st.session_state[k]
-
-            instance.build_widgets()
-            settings = get_conf_dict_from_session()
-            instance = instance.parse_dict(settings)
-
-            st.markdown("## Current settings")
-            left, mid, right = st.columns(3)
-            left.markdown("**JSON**")
-            left.code(
-                body=instance.to_json(indent=2),
-                language='json',
-                line_numbers=True,
-            )
-            mid.markdown("**TOML**")
-            try:
-                mid.code(
-                    body=instance.to_toml(),
-                    language='toml',
-                    line_numbers=True,
-                )
-            except Exception as e:
-                st.error(f"Failed to generate TOML: {e}")
-            right.markdown("**YAML**")
-            try:
-                right.code(
-                    body=instance.to_yaml(),
-                    language='yaml',
-                    line_numbers=True,
-                )
-            except Exception as e:
-                st.error(f"Failed to generate YAML: {e}")
-
-            with open(file_path, 'w') as f:
-                f.write(instance.to_json(indent=2))
-
-            default_path = os.getcwd()
-            save_path = st.sidebar.text_input("Input folder to save config file:", default_path)
-            st.sidebar.selectbox(label='File format:', options=['JSON', 'TOML', 'YAML'], index=0, key='file_format')
-            if st.sidebar.button("Save config"):
-                if os.path.isdir(save_path):
-                    file_name = os.path.join(
-                        save_path, 
-                        f"{instance.__class__.__name__}.{st.session_state['file_format'].lower()}"
-                    )
-                    instance.save_to_file(file_name)
-                    st.sidebar.success(f"Config file has been saved to: {file_name}")
-                else:
-                    st.sidebar.error("Invalid path. Please enter a valid directory.")
-
-            exit_app = st.sidebar.button("Finish & Run", help="Click to run the program with the current parameters.", type='primary')
-            if exit_app:
-                @st.dialog(title='Continue running in 5 seconds...')
-                def end_program():
-                    st.write("### The connection breaks in 5 seconds, you can now close this tab.")
-                end_program()
-
-                time.sleep(5)
-                pid = os.getpid()
-                p = psutil.Process(pid)
-                p.terminate()
-
-            st.session_state['previous_instance'] = instance
-
-            gui_states = get_conf_dict_from_session()
-            if is_dict_different(instance.to_dict(), gui_states):
-                changed_values = find_chaned_values(gui_states, instance.to_dict())
-                for k, v in changed_values.items():
-                    st.session_state[f'_{ST_TAG}.{k}'] = v
-                st.rerun()
-
-            st.stop()
+            assert len(argv) == 2, "Configuration file path must be provided as a command line argument"
+            instance = cls.load_from_file(argv[1], strict=strict)
+        elif config_type in ('--from_web', '--from-web'):
+            instance = cls.from_web(strict=strict).result()
         else:
-            raise ValueError("Unsupported command line argument. Use --parse_json, --parse_toml, --parse_yaml, or --config_path")
+            raise ValueError("Unsupported command line argument. Use --parse_json, --parse_toml, --parse_yaml, "
+                             "--config_path or --set")
+
+        if overrides:
+            instance._apply_updates(overrides)
+        return instance
 
     def save_to_file(self, file_path: str) -> None:
         """Save the configuration to a file in the appropriate format based on the file extension."""
         content = ""
-        if file_path.lower().endswith('.json'):
+        if file_path.lower().endswith('.hargs'):
+            from .binary import write_records
+            write_records(file_path, [self])
+            return
+        elif file_path.lower().endswith('.json'):
             content = self.to_json(indent=2)
         elif file_path.lower().endswith('.toml'):
             content = self.to_toml()
         elif file_path.lower().endswith(('.yaml', '.yml')):
             content = self.to_yaml()
         else:
-            raise ValueError("Unsupported file format. Supported formats: .json, .toml, .yaml, .yml")
+            raise ValueError("Unsupported file format. Supported formats: .json, .toml, .yaml, .yml, .hargs")
 
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
@@ -388,47 +750,25 @@ class Conf:
         return f"{self.__class__.__name__}({self.to_dict()})"
 
     def build_widgets(self) -> None:
+        from .web import build_widgets
         build_widgets(self)
 
+Conf._schema = ConfSchema(fields=(), kinds=MappingProxyType({}), monitors=MappingProxyType({}), parse_order=())
+
 CONF_ITEM = Union[Conf, Arg, List['CONF_ITEM']]
 
-def build_widgets(item: CONF_ITEM, prefix: Optional[str] = None, container: Optional[DeltaGenerator] = None) -> None:
-    if isinstance(item, Arg):
-        assert prefix is not None and container is not None, "prefix and container must be provided for Arg"
-        item.build_widget(key=prefix, container=container)
-    elif isinstance(item, Conf):
-        if container is None:
-            next_contaier = st.container(border=True)
-            next_contaier.write(prefix.split('.')[-1] if prefix is not None else item.__class__.__name__)
-        else:
-            next_contaier = container.container(border=True)
-            next_contaier.write(prefix.split('.')[-1] if prefix is not None else item.__class__.__name__)
-        for name in item.field_names():
-            value = getattr(item, name)
+# The bookkeeping entries of the instance dicts, which are not fields
+_INSTANCE_STATE = frozenset(('_dynamic_fields', '_dirty_fields', '_digest_cache'))
 
-            build_widgets(value, prefix=f"{prefix}.{name}" if prefix else name, container=next_contaier)
-    elif isinstance(item, list):
-        assert prefix is not None and container is not None, "prefix and container must be provided for list"
-        next_container = container.container(border=True)
-        next_container.write(prefix.split('.')[-1])
-        for i, sub_item in enumerate(item):
-            build_widgets(sub_item, prefix=f"{prefix}.[{i}]", container=next_container)
-    else:
-        raise TypeError(f"Unsupported type: {type(item)}")
-
-def update_widgets(settings: JSON, prefix: Optional[str] = None) -> None:
-    """Update the widgets according to the settings."""
-    if prefix is None:
-        prefix = ST_TAG
-    if isinstance(settings, dict):
-        for name, value in settings.items():
-            update_widgets(value, prefix=f"{prefix}.{name}")
-    elif isinstance(settings, list):
-        for i, item in enumerate(settings):
-            update_widgets(item, prefix=f"{prefix}.[{i}]")
-    else:
-        if prefix in st.session_state and st.session_state[prefix] != settings:
-            st.session_state[prefix] = settings
+def _field_kind(value: Any) -> Optional[str]:
+    """Get the schema kind of a class attribute, or None if it is not a configuration field."""
+    if isinstance(value, Arg):
+        return ARG_FIELD
+    if isinstance(value, Conf):
+        return CONF_FIELD
+    if isinstance(value, list):
+        return LIST_FIELD
+    return None
 
 def _to_json_dict(value: Union[Arg, Conf, list]) -> JSON:
     if isinstance(value, Arg):
@@ -441,49 +781,265 @@ def _to_json_dict(value: Union[Arg, Conf, list]) -> JSON:
         raise TypeError(f"Unsupported type: {type(value)}")
 
 def _parse_attr(value: JSON, attr: Union[Arg, Conf, list]) -> Union[Arg, Conf, list]:
+    """Parse `value` against the current value `attr` of a field, `attr` itself is left unchanged."""
     if isinstance(attr, Arg):
         return attr.parse(value)
     elif isinstance(attr, Conf):
         assert isinstance(value, dict), f"Expected dict for Conf attribute, got {type(value)}"
-        return attr.from_dict(value)
+        return attr._shallow_copy()._parse_dict(value, strict=False)
     elif isinstance(attr, (list, tuple)):
         assert isinstance(value, (list, tuple)), f"Expected list/tuple for attribute, got {type(value)}"
         # assert len(value) <= len(attr), f"Length of value and attribute list must match, but got {len(value)} and {len(attr)}"
         result = [_parse_attr(v, a) for v, a in zip(value, attr)]
         if len(attr) > len(value):
-            result.extend([copy.deepcopy(a) for a in attr[len(value):]])
+            result.extend(_copy_lists(a) for a in attr[len(value):])
         return result
     else:
         raise TypeError(f"Unsupported attribute type: {type(attr)}")
 
-def _update_parse_attr(value: JSON, attr: Union[Arg, Conf, list]) -> Union[Arg, Conf, list]:
-    if isinstance(attr, Arg):
-        return attr.parse(value)
+def _deepcopy_item(value: Any, memo: Dict[int, Any]) -> Any:
+    if isinstance(value, Arg) and not value.__class__.__dictoffset__:
+        return value
+    elif isinstance(value, list):
+        return [_deepcopy_item(v, memo) for v in value]
+    return copy.deepcopy(value, memo)
+
+def _restore_conf(cls: Type[C], stored: int, raw: int, values: Tuple[Any, ...],
+                  attributes: Optional[Dict[str, Any]] = None) -> C:
+    """Unpickle a configuration pickled by `Conf.__reduce__`.
+
+    The bits of `stored` mark the fields in `values`, by their index in the schema, and those of `raw` the Args
+    pickled as their values.
+    """
+    fields = cls._schema.fields
+    if stored >> len(fields):
+        raise ValueError(f"Cannot unpickle {cls.__name__}, its fields changed since it was pickled")
+    result = object.__new__(cls)
+    state = result.__dict__
+    items = iter(values)
+    for i, name in enumerate(fields):
+        if stored >> i & 1:
+            value = next(items)
+            state[name] = getattr(cls, name)._new(value) if raw >> i & 1 else value
+    if attributes:
+        state.update(attributes)
+        dynamic_fields = [name for name in attributes if not name.startswith('_')]
+        if dynamic_fields:
+            state['_dynamic_fields'] = dict.fromkeys(dynamic_fields)
+    return result
+
+def _update_attr(updates: Dict[PATH, Any], attr: Union[Arg, Conf, list]) -> Union[Arg, Conf, list]:
+    """Apply updates keyed by paths relative to `attr`, `attr` itself is left unchanged."""
+    if () in updates:
+        if len(updates) > 1:
+            raise ValueError(f"Conflicting updates for a value and its children: {list(updates)}")
+        value = updates[()]
+        if callable(value):
+            # A deferred value is computed from the current value of the field, e.g. sampled from its Arg
+            value = value(attr)
+        return _parse_attr(value, attr)
     elif isinstance(attr, Conf):
-        assert isinstance(value, dict), f"Expected dict for Conf attribute, got {type(value)}"
-        return attr.parse_dict(value)
-    elif isinstance(attr, (list, tuple)):
-        assert isinstance(value, (list, tuple)), f"Expected list/tuple for attribute, got {type(value)}"
-        # assert len(value) <= len(attr), f"Length of value and attribute list must match, but got {len(value)} and {len(attr)}"
-        result = [_update_parse_attr(v, a) for v, a in zip(value, attr)]
-        if len(attr) > len(value):
-            result.extend([copy.deepcopy(a) for a in attr[len(value):]])
+        return attr._shallow_copy()._apply_updates(updates)
+    elif isinstance(attr, list):
+        result = list(attr)
+        for index, sub_updates in _group_updates(updates).items():
+            if not isinstance(index, int):
+                raise KeyError(f"Expected a list index, got '{index}'")
+            result[index] = _update_attr(sub_updates, result[index])
         return result
     else:
-        raise TypeError(f"Unsupported attribute type: {type(attr)}")
+        raise KeyError(f"Cannot update the children of {type(attr).__name__}")
+
+class _EnvNode:
+    """A node of the tree of the prefixed environment variables, keyed by the upper-case path keys."""
+    __slots__ = ('var', 'value', 'children')
+
+    def __init__(self) -> None:
+        self.var: Optional[str] = None
+        self.value: Optional[str] = None
+        self.children: Dict[str, '_EnvNode'] = {}
+
+    def variables(self) -> Iterator[str]:
+        if self.var is not None:
+            yield self.var
+        for child in self.children.values():
+            yield from child.variables()
+
+_NO_ENV = _EnvNode()
+
+def _update_from_env(
+    item: CONF_ITEM, node: _EnvNode, path: PATH, environ: Mapping[str, str], applied: Dict[PATH, Tuple[str, Arg]]
+) -> CONF_ITEM:
+    """Get `item` updated from the environment, `item` itself if no variable applies to it.
+
+    Configurations are updated in place, the callers pass copies or the root instance. The variable and the Arg parsed
+    from it are added to `applied` by path.
+    """
+    if isinstance(item, Arg):
+        if node.var is not None:
+            var = node.var
+        elif item._env_bind is not None and item._env_bind in environ:
+            var = item._env_bind
+        else:
+            return item
+        result = item.parse(environ[var])
+        applied[path] = (var, result)
+        return result
+    elif isinstance(item, Conf):
+        values = {name: (node.children.get(name.upper(), _NO_ENV), path + (name,)) for name in item.field_names()}
+        item._update_fields(values, lambda entry, value: _update_copy_from_env(value, *entry, environ, applied))
+        return item
+    elif isinstance(item, list):
+        result = [
+            _update_copy_from_env(sub_item, node.children.get(str(i), _NO_ENV), path + (i,), environ, applied)
+            for i, sub_item in enumerate(item)
+        ]
+        return item if all(new is old for new, old in zip(result, item)) else result
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+def _update_copy_from_env(
+    item: CONF_ITEM, node: _EnvNode, path: PATH, environ: Mapping[str, str], applied: Dict[PATH, Tuple[str, Arg]]
+) -> CONF_ITEM:
+    """Like `_update_from_env`, but configurations are copied if any of their fields is set."""
+    if not isinstance(item, Conf):
+        return _update_from_env(item, node, path, environ, applied)
+    count = len(applied)
+    result = _update_from_env(item._shallow_copy(), node, path, environ, applied)
+    return result if len(applied) > count else item
+
+def _group_updates(updates: Mapping[PATH, Any]) -> Dict[Union[str, int], Dict[PATH, Any]]:
+    """Group path updates by their first key, the keys of the groups are the remaining paths."""
+    groups: Dict[Union[str, int], Dict[PATH, Any]] = {}
+    for path, value in updates.items():
+        assert len(path) > 0, "Update paths cannot be empty"
+        groups.setdefault(path[0], {})[path[1:]] = value
+    return groups
+
+def _diff_items(old: CONF_ITEM, new: CONF_ITEM, path: PATH, changes: Dict[PATH, JSON]) -> None:
+    """Add the paths and values of the leaves of `new` that differ from `old` to `changes`."""
+    if old is new:
+        return
+    if isinstance(old, Arg) and isinstance(new, Arg):
+        old_value, new_value = old.value(), new.value()
+        if old_value != new_value or type(old_value) is not type(new_value):
+            changes[path] = new_value
+    elif isinstance(old, Conf) and isinstance(new, Conf):
+        old_fields = set(old.field_names())
+        for name, value in new._iter_fields():
+            if name in old_fields:
+                _diff_items(getattr(old, name), value, path + (name,), changes)
+            else:
+                _add_leaves(value, path + (name,), changes)
+    elif isinstance(old, list) and isinstance(new, list):
+        for i, item in enumerate(new):
+            if i < len(old):
+                _diff_items(old[i], item, path + (i,), changes)
+            else:
+                _add_leaves(item, path + (i,), changes)
+    else:
+        _add_leaves(new, path, changes)
+
+def _add_leaves(item: CONF_ITEM, path: PATH, changes: Dict[PATH, JSON]) -> None:
+    """Add the paths and values of all the leaves of `item` to `changes`."""
+    if isinstance(item, Arg):
+        changes[path] = item.value()
+    elif isinstance(item, Conf):
+        for name, value in item._iter_fields():
+            _add_leaves(value, path + (name,), changes)
+    elif isinstance(item, list):
+        for i, sub_item in enumerate(item):
+            _add_leaves(sub_item, path + (i,), changes)
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+def _item_digest(item: CONF_ITEM) -> bytes:
+    """Get the digest of an Arg, Conf or list."""
+    if isinstance(item, Arg):
+        return hashlib.sha256(b'A' + _encode_json_value(item.value())).digest()
+    elif isinstance(item, Conf):
+        return item._digest()
+    elif isinstance(item, list):
+        return _list_digest(item)[2]
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+def _list_digest(items: list, cached: Optional[Tuple[list, Tuple[bytes, ...], bytes]] = None
+                 ) -> Tuple[list, Tuple[bytes, ...], bytes]:
+    """Get the digest of a list, as a (copy of the items, digests of the items, digest) cache entry.
+
+    `cached` is the entry of a previous call for the same list. Lists can be modified in place, so the digest of an
+    Arg is only reused if the same Arg is still at the same index. Configurations always compute their digest, which
+    they cache themselves.
+    """
+    digests = []
+    for i, item in enumerate(items):
+        if (cached is not None and i < len(cached[0]) and item is cached[0][i]
+                and not isinstance(item, (Conf, list))):
+            digests.append(cached[1][i])
+        else:
+            digests.append(_item_digest(item))
+
+    item_digests = tuple(digests)
+    if cached is not None and cached[1] == item_digests:
+        return list(items), item_digests, cached[2]
+    digest = hashlib.sha256(b'L' + len(digests).to_bytes(8, 'big') + b''.join(digests)).digest()
+    return list(items), item_digests, digest
+
+def _encode_json_value(value: JSON_VALUE) -> bytes:
+    """Encode a value canonically, the encoding does not depend on the platform or the Python version."""
+    if value is None:
+        return b'n'
+    elif value is True:
+        return b't'
+    elif value is False:
+        return b'f'
+    elif isinstance(value, int):
+        return b'i' + str(value).encode('ascii')
+    elif isinstance(value, float):
+        return b'd' + value.hex().encode('ascii')
+    elif isinstance(value, str):
+        return b's' + value.encode('utf-8')
+    else:
+        raise TypeError(f"Unsupported value type: {type(value)}")
+
+def _length_prefixed(data: bytes) -> bytes:
+    return len(data).to_bytes(8, 'big') + data
+
+def _get_item(item: CONF_ITEM, path: PATH) -> CONF_ITEM:
+    """Get the Arg, Conf or list at `path` relative to `item`."""
+    for key in path:
+        if isinstance(item, list):
+            if not isinstance(key, int):
+                raise KeyError(f"Expected a list index, got '{key}'")
+            item = item[key]
+        elif isinstance(item, Conf):
+            if not isinstance(key, str) or (key not in item._schema.kinds and key not in item._extra_fields()):
+                raise KeyError(f"'{key}' is not a field of {item.__class__.__name__}")
+            item = getattr(item, key)
+        else:
+            raise KeyError(f"Cannot get '{key}' from {type(item).__name__}")
+    return item
+
+def _copy_lists(value: Any) -> Any:
+    """Copy nested lists, the items that are not lists are shared."""
+    if isinstance(value, list):
+        return [_copy_lists(v) for v in value]
+    return value
 
 def add_dependency(parent: str, child: str) -> Callable[[Type[C]], Type[C]]:
     """Add a dependency relationship from parent to child in the graph."""
     def decorator(cls: Type[C]) -> Type[C]:
-        assert isinstance(cls._dep_graph, nx.DiGraph), "_dep_graph must be a networkx DiGraph"
         assert parent != child, "Parent and child cannot be the same"
-        assert not nx.has_path(cls._dep_graph, child, parent), (f"Adding dependency from '{parent}' to '{child}' "
-                                                                "would create a conf dependency cycle")
         assert hasattr(cls, parent), f"Parent attribute '{parent}' does not exist in class '{cls.__name__}'"
         assert hasattr(cls, child), f"Child attribute '{child}' does not exist in class '{cls.__name__}'"
-        assert not cls._dep_graph.has_edge(parent, child), f"Dependency from '{parent}' to '{child}' already exists"
+        assert (parent, child) not in cls._dep_edges, f"Dependency from '{parent}' to '{child}' already exists"
+        dep_graph = _build_dep_graph(cls._dep_nodes, cls._dep_edges)
+        assert not (child in dep_graph and parent in dep_graph and _nx().has_path(dep_graph, child, parent)), \
+            f"Adding dependency from '{parent}' to '{child}' would create a conf dependency cycle"
 
-        cls._dep_graph.add_edge(parent, child)
+        cls._dep_edges.append((parent, child))
+        cls._schema = cls._compile_schema()
         return cls
     return decorator
 
@@ -497,3 +1053,137 @@ def monitor_on(depend_fields: Union[str, List[str]]) -> Callable[[Callable[P, R]
         return func
 
     return decorator
+
+def _split_overrides(argv: List[str]) -> Tuple[List[str], Dict[PATH, str]]:
+    """Separate the `--set <path>=<value>` overrides from the other command line arguments."""
+    rest: List[str] = []
+    overrides: Dict[PATH, str] = {}
+    args = iter(argv)
+    for arg in args:
+        if arg == '--set':
+            override = next(args, None)
+            if override is None:
+                raise ValueError("--set requires a <path>=<value> argument")
+        elif arg.startswith('--set='):
+            override = arg[len('--set='):]
+        else:
+            rest.append(arg)
+            continue
+        path, sep, value = override.partition('=')
+        if not sep:
+            raise ValueError(f"Expected <path>=<value> after --set, got '{override}'")
+        overrides[parse_path(path.strip())] = value
+    return rest, overrides
+
+def _read_config_file(file_path: str) -> Dict[str, JSON]:
+    """Read a configuration dictionary from a .json, .toml, .yaml or .yml file."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if file_path.lower().endswith('.json'):
+        from . import jsonio
+        data = jsonio.loads(content)
+    elif file_path.lower().endswith('.toml'):
+        import tomli
+        data = tomli.loads(content)
+    elif file_path.lower().endswith(('.yaml', '.yml')):
+        import yaml
+        data = yaml.safe_load(content)
+    else:
+        raise ValueError("Unsupported configuration file format. Supported formats: .json, .toml, .yaml, .yml")
+    assert isinstance(data, dict), f"Configuration file {file_path} must represent a dictionary"
+    return data
+
+def _read_cached_config_file(file_path: str) -> Dict[str, JSON]:
+    """Read a configuration file like `_read_config_file`, cached until the file changes.
+
+    The cached dictionary is shared by all readers, so it must not be modified.
+    """
+    stat = os.stat(file_path)
+    return _read_config_file_version(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=64)
+def _read_config_file_version(file_path: str, mtime_ns: int, size: int) -> Dict[str, JSON]:
+    return _read_config_file(file_path)
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _iter_json_lines(file_path: str, use_mmap: bool) -> Iterator[Tuple[int, bytes]]:
+    """Iterate over the (line number, line) of the non-blank lines of a file."""
+    with open(file_path, 'rb') as f:
+        if not use_mmap:
+            for line_number, line in enumerate(f, 1):
+                if not line.isspace():
+                    yield line_number, line
+            return
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        import mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for line_number, line in enumerate(iter(mapped.readline, b''), 1):
+                if not line.isspace():
+                    yield line_number, line
+
+class _YamlError(NamedTuple):
+    error: Exception
+    fatal: bool     # Whether the following documents cannot be found
+
+def _iter_yaml_documents(file_path: str) -> Iterator[Tuple[Optional[int], Any]]:
+    """Iterate over the (line number, data) of the non-empty documents of a YAML stream, parsed one at a time.
+
+    Invalid documents are returned as `_YamlError`.
+    """
+    import yaml
+    with open(file_path, 'r', encoding='utf-8') as f:
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)(f)
+        try:
+            while True:
+                try:
+                    if not loader.check_node():
+                        return
+                    node = loader.get_node()
+                except yaml.YAMLError as e:
+                    line = e.problem_mark.line + 1 if getattr(e, 'problem_mark', None) else None
+                    yield line, _YamlError(e, fatal=True)
+                    return
+                line = node.start_mark.line + 1
+                try:
+                    data = loader.construct_document(node)
+                except yaml.YAMLError as e:
+                    yield line, _YamlError(e, fatal=False)
+                    continue
+                if data is not None:
+                    yield line, data
+        finally:
+            loader.dispose()
+
+def _merge_layers(base: JSON, overlay: JSON) -> JSON:
+    """Deep-merge `overlay` into `base` without modifying either, dictionaries are merged by key and lists by index."""
+    if isinstance(base, Mapping) and isinstance(overlay, Mapping):
+        merged = dict(base)
+        for key, value in overlay.items():
+            merged[key] = _merge_layers(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(base, list) and isinstance(overlay, list):
+        merged_list = list(base)
+        for i, value in enumerate(overlay):
+            if i < len(merged_list):
+                merged_list[i] = _merge_layers(merged_list[i], value)
+            else:
+                merged_list.append(value)
+        return merged_list
+    return overlay
+
+def _nx() -> Any:
+    """Import networkx on first use, it is only needed by configurations with dependencies."""
+    import networkx
+    return networkx
+
+def _build_dep_graph(nodes: Dict[str, None], edges: List[Tuple[str, str]]) -> Any:
+    """Build a networkx DiGraph from the dependency nodes and edges of a configuration class."""
+    graph = _nx().DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    return graph
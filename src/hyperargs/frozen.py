@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/frozen.py
+'''
+Immutable snapshots of configurations, to share one configuration between threads without copying it.
+
+`Conf.freeze` turns a configuration into a `FrozenConf`: the fields are stored in the slots of a class generated once
+per configuration class, sub-configurations are frozen too and lists become tuples. Args are immutable already, so
+they are shared with the configuration instead of being copied. A snapshot never changes, no monitor runs on it and
+it is hashable, it can be read from any thread without locks. `FrozenConf.thaw` returns a mutable copy.
+'''
+
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Tuple, Type, Union
+import hashlib
+
+from .args import Arg, JSON
+from .conf import Conf, _item_digest, _length_prefixed
+
+FROZEN_ITEM = Union['FrozenConf', Arg, Tuple['FROZEN_ITEM', ...]]
+
+
+class FrozenConf:
+    """An immutable snapshot of a configuration, see the module docstring.
+
+    Fields are read as on the configuration, e.g. `frozen.optimizer_conf.lr.value()`, sub-configurations are
+    `FrozenConf`s and lists are tuples. Snapshots are equal if they freeze the same class with the same values.
+    """
+    __slots__ = ('_digest_bytes',)
+    _conf_cls: ClassVar[Type[Conf]]
+    _fields: ClassVar[Tuple[str, ...]]
+    _slot_setters: ClassVar[Tuple[Callable[['FrozenConf', FROZEN_ITEM], None], ...]]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is frozen, use thaw() to get a mutable copy")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is frozen, use thaw() to get a mutable copy")
+
+    def _iter_fields(self) -> Iterator[Tuple[str, FROZEN_ITEM]]:
+        for name in self._fields:
+            yield name, getattr(self, name)
+
+    def field_names(self) -> List[str]:
+        return list(self._fields)
+
+    def thaw(self) -> Conf:
+        """Get a mutable copy of the configuration, which shares the Args of the snapshot."""
+        result = object.__new__(self._conf_cls)
+        state = result.__dict__
+        kinds = self._conf_cls._schema.kinds
+        for name in self._fields:
+            state[name] = _thaw_item(getattr(self, name))
+            if name not in kinds:
+                state.setdefault('_dynamic_fields', {})[name] = None
+        return result
+
+    def to_dict(self) -> Dict[str, JSON]:
+        return {name: _to_json_dict(value) for name, value in self._iter_fields()}
+
+    def to_json(self, indent: Optional[Union[str, int]] = None) -> str:
+        from . import jsonio
+        return jsonio.dumps(self.to_dict(), indent=indent)
+
+    def fingerprint(self) -> str:
+        """Get the SHA-256 hex digest of the values, the same as `Conf.fingerprint` of the frozen configuration."""
+        return self._digest().hex()
+
+    def _digest(self) -> bytes:
+        digest = self._digest_bytes
+        if digest is None:
+            parts = [_length_prefixed(name.encode('utf-8')) + _frozen_digest(value)
+                     for name, value in self._iter_fields()]
+            digest = hashlib.sha256(b'C' + b''.join(parts)).digest()
+            # Threads computing the digest at the same time store the same bytes
+            object.__setattr__(self, '_digest_bytes', digest)
+        return digest
+
+    def __hash__(self) -> int:
+        return hash(self._digest())
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, FrozenConf):
+            return NotImplemented
+        return self.__class__ is other.__class__ and self._digest() == other._digest()
+
+    def __copy__(self) -> 'FrozenConf':
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'FrozenConf':
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The generated classes cannot be pickled by reference, the configuration is pickled and frozen again
+        return freeze, (self.thaw(),)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+# The generated snapshot classes, by configuration class and field names
+_FROZEN_CLASSES: Dict[Tuple[Type[Conf], Tuple[str, ...]], Type[FrozenConf]] = {}
+
+
+def freeze(conf: Conf) -> FrozenConf:
+    """Get an immutable snapshot of `conf`, see `Conf.freeze`."""
+    if conf._extra_fields():
+        fields = tuple(name for name, _ in conf._iter_fields())
+    else:
+        fields = conf._schema.fields
+    state = conf.__dict__
+    values = []
+    for name in fields:
+        value = state[name] if name in state else getattr(conf, name)
+        values.append(value if isinstance(value, Arg) else _freeze_item(value))
+    return _new_snapshot(conf.__class__, fields, values)
+
+
+def _new_snapshot(conf_cls: Type[Conf], fields: Tuple[str, ...], values: List[FROZEN_ITEM]) -> FrozenConf:
+    """Create the snapshot of `conf_cls` with the frozen `values` of `fields`."""
+    cls = _FROZEN_CLASSES.get((conf_cls, fields)) or _frozen_class(conf_cls, fields)
+    result = object.__new__(cls)
+    for set_slot, value in zip(cls._slot_setters, values):
+        set_slot(result, value)
+    FrozenConf._digest_bytes.__set__(result, None)  # type: ignore[attr-defined]
+    return result
+
+
+def _frozen_class(conf_cls: Type[Conf], fields: Tuple[str, ...]) -> Type[FrozenConf]:
+    namespace = {'__slots__': fields, '__module__': __name__, '_conf_cls': conf_cls, '_fields': fields}
+    cls = type(f'Frozen{conf_cls.__name__}', (FrozenConf,), namespace)
+    cls._slot_setters = tuple(cls.__dict__[name].__set__ for name in fields)
+    # Another thread may have created the class first, every snapshot of the same layout uses the same class
+    return _FROZEN_CLASSES.setdefault((conf_cls, fields), cls)
+
+
+def _freeze_item(item: Any) -> FROZEN_ITEM:
+    if isinstance(item, Arg):
+        return item
+    elif isinstance(item, Conf):
+        return freeze(item)
+    elif isinstance(item, (list, tuple)):
+        return tuple(_freeze_item(sub_item) for sub_item in item)
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+
+def _thaw_item(item: FROZEN_ITEM) -> Any:
+    if isinstance(item, Arg):
+        return item
+    elif isinstance(item, FrozenConf):
+        return item.thaw()
+    else:
+        return [_thaw_item(sub_item) for sub_item in item]
+
+
+def _to_json_dict(item: FROZEN_ITEM) -> JSON:
+    if isinstance(item, Arg):
+        return item.value()
+    elif isinstance(item, FrozenConf):
+        return item.to_dict()
+    else:
+        return [_to_json_dict(sub_item) for sub_item in item]
+
+
+def _frozen_digest(item: FROZEN_ITEM) -> bytes:
+    """The digest of an item, as `_item_digest` of the thawed item."""
+    if isinstance(item, Arg):
+        return _item_digest(item)
+    elif isinstance(item, FrozenConf):
+        return item._digest()
+    else:
+        digests = [_frozen_digest(sub_item) for sub_item in item]
+        return hashlib.sha256(b'L' + len(digests).to_bytes(8, 'big') + b''.join(digests)).digest()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/jsonio.py
+'''
+The JSON backends of HyperArgs.
+
+`orjson` or `msgspec` is used when installed, the standard library `json` otherwise. The backend can be chosen with
+`set_json_backend` or the HYPERARGS_JSON_BACKEND environment variable. The compact output of `dumps` is always that of
+the standard library, with its ", " and ": " separators, the backends encode the indented output and differ in details
+such as the formatting of floats, use the canonical encoding of `encode_canonical` for byte-identical output.
+'''
+
+from json.encoder import encode_basestring
+from typing import Any, Callable, List, NamedTuple, Optional, Union
+import json
+import math
+import os
+
+from .args import Arg
+from .conf import Conf
+
+# The environment variable choosing the JSON backend, e.g. 'json' to always use the standard library
+JSON_BACKEND_ENV = 'HYPERARGS_JSON_BACKEND'
+
+# The supported backends, in order of preference
+JSON_BACKENDS = ('orjson', 'msgspec', 'json')
+
+
+class JsonBackend(NamedTuple):
+    name: str
+    dumps: Callable[[Any, Optional[int]], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+_backend: Optional[JsonBackend] = None
+
+
+def get_json_backend() -> JsonBackend:
+    """Get the current JSON backend, it is chosen on first use if `set_json_backend` was not called."""
+    global _backend
+    if _backend is None:
+        name = os.environ.get(JSON_BACKEND_ENV)
+        if name:
+            _backend = _load_backend(name)
+        else:
+            for name in JSON_BACKENDS:
+                try:
+                    _backend = _load_backend(name)
+                    break
+                except ImportError:
+                    continue
+    assert _backend is not None
+    return _backend
+
+
+def set_json_backend(name: Optional[str]) -> JsonBackend:
+    """Use the backend `name` from `JSON_BACKENDS`, or choose the backend again on next use if `name` is None."""
+    global _backend
+    _backend = None if name is None else _load_backend(name)
+    return get_json_backend()
+
+
+def dumps(obj: Any, indent: Optional[Union[str, int]] = None) -> str:
+    """Encode `obj` with the current backend, the compact output and the indents that are not integers use `json`."""
+    if not isinstance(indent, int):
+        return _json_dumps(obj, indent)
+    return get_json_backend().dumps(obj, indent)
+
+
+def loads(content: Union[str, bytes]) -> Any:
+    return get_json_backend().loads(content)
+
+
+def encode_canonical(obj: Any) -> str:
+    """Encode a configuration, or its values, as canonical JSON.
+
+    The output is compact, keys are sorted, strings are not ASCII-escaped and floats use the shortest representation
+    that round-trips, as by `repr`. It is encoded straight from the configuration, without building its dictionary,
+    and is the same whatever the backend.
+    """
+    parts: List[str] = []
+    _encode_canonical(obj, parts)
+    return ''.join(parts)
+
+
+def _encode_canonical(obj: Any, parts: List[str]) -> None:
+    if isinstance(obj, Arg):
+        obj = obj.value()
+    if obj is None:
+        parts.append('null')
+    elif obj is True:
+        parts.append('true')
+    elif obj is False:
+        parts.append('false')
+    elif isinstance(obj, int):
+        parts.append(int.__repr__(obj))
+    elif isinstance(obj, float):
+        if not math.isfinite(obj):
+            raise ValueError(f"Out of range float values are not JSON compliant: {obj}")
+        parts.append(float.__repr__(obj))
+    elif isinstance(obj, str):
+        parts.append(encode_basestring(obj))
+    elif isinstance(obj, Conf):
+        items = sorted(obj._iter_fields()) if obj._extra_fields() else obj._iter_fields()
+        _encode_canonical_object(items, parts)
+    elif isinstance(obj, dict):
+        _encode_canonical_object(sorted(obj.items()), parts)
+    elif isinstance(obj, (list, tuple)):
+        parts.append('[')
+        for i, item in enumerate(obj):
+            if i:
+                parts.append(',')
+            _encode_canonical(item, parts)
+        parts.append(']')
+    else:
+        raise TypeError(f"Unsupported type: {type(obj)}")
+
+
+def _encode_canonical_object(items: Any, parts: List[str]) -> None:
+    parts.append('{')
+    for i, (key, value) in enumerate(items):
+        if i:
+            parts.append(',')
+        parts.append(encode_basestring(key))
+        parts.append(':')
+        _encode_canonical(value, parts)
+    parts.append('}')
+
+
+def _json_dumps(obj: Any, indent: Optional[Union[str, int]]) -> str:
+    return json.dumps(obj, indent=indent, ensure_ascii=False)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Whether `obj` holds an infinite or NaN float, which the fast backends would encode as null."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    elif isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(item) for item in obj)
+    return False
+
+
+def _with_json_fallback(fast_loads: Callable[[Union[str, bytes]], Any]) -> Callable[[Union[str, bytes]], Any]:
+    def loads(content: Union[str, bytes]) -> Any:
+        try:
+            return fast_loads(content)
+        except ValueError:
+            # e.g. Infinity and NaN, which only the standard library reads, it also raises the errors of invalid JSON
+            return json.loads(content)
+    return loads
+
+
+def _load_backend(name: str) -> JsonBackend:
+    if name == 'json':
+        return JsonBackend('json', _json_dumps, json.loads)
+    elif name == 'orjson':
+        import orjson
+
+        def orjson_dumps(obj: Any, indent: Optional[int]) -> str:
+            if indent not in (None, 2):
+                return _json_dumps(obj, indent)
+            try:
+                content = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+            except TypeError:
+                # e.g. integers out of the 64-bit range
+                return _json_dumps(obj, indent)
+            if b'null' in content and _has_non_finite(obj):
+                return _json_dumps(obj, indent)
+            return content.decode('utf-8')
+
+        return JsonBackend('orjson', orjson_dumps, _with_json_fallback(orjson.loads))
+    elif name == 'msgspec':
+        import msgspec
+
+        def msgspec_dumps(obj: Any, indent: Optional[int]) -> str:
+            try:
+                content = msgspec.json.encode(obj)
+            except (TypeError, OverflowError):
+                return _json_dumps(obj, indent)
+            if b'null' in content and _has_non_finite(obj):
+                return _json_dumps(obj, indent)
+            if indent is not None:
+                content = msgspec.json.format(content, indent=indent)
+            return content.decode('utf-8')
+
+        return JsonBackend('msgspec', msgspec_dumps, _with_json_fallback(msgspec.json.decode))
+    else:
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of {JSON_BACKENDS}")
+
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/launcher.py
+'''
+Launch the web GUI of a configuration class in the background.
+
+The Streamlit server runs the main script in `web_mode`. When the user clicks 'Finish & Run', the web GUI sends the
+settings back over a local socket, and the launcher resolves its future and stops the server.
+'''
+
+from concurrent.futures import Future
+from typing import Type, TypeVar
+import hmac
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import __main__
+
+from .conf import Conf
+
+C = TypeVar('C', bound=Conf)
+
+# The environment variable holding the token the web GUI sends with the settings
+WEB_TOKEN_ENV = 'HYPERARGS_WEB_TOKEN'
+
+# Seconds between checks that the server is still alive while waiting for the settings
+_POLL_INTERVAL = 0.2
+
+
+def launch_web(conf_cls: Type[C], strict: bool = False) -> 'Future[C]':
+    """Start the web GUI of `conf_cls` in a background process.
+
+    Returns:
+        Future[C]: Resolves to the configuration submitted in the web GUI, or fails if the server exits before the
+            settings are submitted. Cancelling the future before it resolves stops the server.
+    """
+    token = secrets.token_hex(16)
+    server = socket.create_server(('127.0.0.1', 0))
+    server.settimeout(_POLL_INTERVAL)
+    host, port = server.getsockname()[:2]
+
+    cmd = [sys.executable, '-m', 'streamlit', 'run', __main__.__file__, 'web_mode', f'{host}:{port}']
+    proc = subprocess.Popen(cmd, env={**os.environ, WEB_TOKEN_ENV: token})
+
+    future: 'Future[C]' = Future()
+    threading.Thread(
+        target=_wait_for_result,
+        args=(conf_cls, strict, server, proc, token, future),
+        name=f'hyperargs-web-{proc.pid}',
+        daemon=True,
+    ).start()
+    return future
+
+
+def send_result(address: str, content: str) -> None:
+    """Send the settings from the web GUI to the launcher listening at `address`, i.e. 'host:port'."""
+    host, port = address.rsplit(':', 1)
+    with socket.create_connection((host, int(port))) as conn:
+        conn.sendall(os.environ[WEB_TOKEN_ENV].encode() + b'\n' + content.encode())
+
+
+def _wait_for_result(
+    conf_cls: Type[C], strict: bool, server: socket.socket, proc: subprocess.Popen, token: str, future: 'Future[C]'
+) -> None:
+    try:
+        with server:
+            content = _receive(server, proc, token, future)
+        if content is None:
+            return
+        try:
+            future.set_result(conf_cls.from_json(content, strict=strict))
+        except Exception as e:
+            future.set_exception(Exception(f"Config from web failed! Error: {e}"))
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+    finally:
+        _stop(proc)
+
+
+def _receive(server: socket.socket, proc: subprocess.Popen, token: str, future: 'Future[C]') -> 'str | None':
+    """Wait for the settings sent by `send_result`, connections without the token are ignored.
+
+    Returns None if the future was cancelled.
+    """
+    expected = token.encode()
+    while True:
+        if future.cancelled():
+            return None
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"The web GUI exited with code {proc.returncode} before the settings were submitted")
+            continue
+
+        try:
+            with conn:
+                conn.settimeout(10)
+                chunks = []
+                while chunk := conn.recv(65536):
+                    chunks.append(chunk)
+        except OSError:
+            continue
+        received_token, _, content = b''.join(chunks).partition(b'\n')
+        if hmac.compare_digest(received_token, expected):
+            return content.decode()
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/server.py
+'''
+A headless JSON-over-HTTP service to edit configurations, a lightweight alternative to the Streamlit web GUI.
+
+One server holds the configurations of many jobs. Every job starts as a shallow copy of one default instance and
+patches only copy the updated paths, so idle jobs share their Args and sub-configurations. Only the standard library
+is used.
+
+Endpoints, all bodies are JSON:
+    GET    /schema             The default configuration, with the type, settings and value of every field
+    GET    /jobs               The ids of the jobs
+    POST   /jobs               Create a job, the optional body is a patch applied to the defaults
+    GET    /jobs/<id>          The configuration of a job
+    GET    /jobs/<id>/schema   The schema of the configuration of a job, which depends on its values
+    PATCH  /jobs/<id>          Apply a patch, e.g. {"optimizer_conf.lr": 0.1}, and run the monitors
+    DELETE /jobs/<id>          Delete a job
+
+A patch maps flattened paths to values, as returned by `Conf.diff`. An invalid patch is rejected with status 422 and
+{"errors": {path: message}}, and the job keeps its previous configuration.
+'''
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Mapping, Optional, Tuple, Type
+import json
+import logging
+import threading
+import uuid
+
+from .args import Arg, JSON
+from .conf import Conf, CONF_ITEM
+from .utils import parse_path
+
+logger = logging.getLogger(__name__)
+
+# The errors raised by parsing invalid values or unknown paths
+_PATCH_ERRORS = (ValueError, TypeError, KeyError, IndexError, AssertionError)
+
+
+class PatchError(ValueError):
+    """A patch is invalid, `errors` maps the flattened paths to their error messages."""
+
+    def __init__(self, errors: Dict[str, str]):
+        super().__init__(f"Invalid patch: {errors}")
+        self.errors = errors
+
+
+class UnknownJob(KeyError):
+    """No job has the requested id."""
+
+
+def describe(item: CONF_ITEM) -> Dict[str, JSON]:
+    """Describe the fields of a configuration, with the type, settings and value of every argument."""
+    if isinstance(item, Arg):
+        return item.describe()
+    elif isinstance(item, Conf):
+        return {
+            'type': 'Conf',
+            'class': item.__class__.__name__,
+            'fields': {name: describe(value) for name, value in item._iter_fields()},
+        }
+    elif isinstance(item, list):
+        return {'type': 'list', 'items': [describe(sub_item) for sub_item in item]}
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+
+class _Job:
+    __slots__ = ('conf', 'lock')
+
+    def __init__(self, conf: Conf):
+        self.conf = conf
+        self.lock = threading.Lock()
+
+
+class ConfServer(ThreadingHTTPServer):
+    """Serve the configurations of many jobs of `conf_cls`, see the module docstring for the endpoints.
+
+    The job methods can also be called directly, e.g. by an in-process launcher.
+    """
+    daemon_threads = True
+
+    def __init__(self, conf_cls: Type[Conf], address: Tuple[str, int] = ('127.0.0.1', 8000)):
+        super().__init__(address, _ConfRequestHandler)
+        self.conf_cls = conf_cls
+        self._defaults = conf_cls()
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+
+    def schema(self) -> Dict[str, JSON]:
+        return describe(self._defaults)
+
+    def job_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._jobs)
+
+    def create_job(self, patch: Optional[Mapping[str, JSON]] = None) -> Tuple[str, Conf]:
+        conf = self._defaults._shallow_copy()
+        if patch:
+            conf = _apply_patch(conf, patch)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = _Job(conf)
+        return job_id, conf
+
+    def get_job(self, job_id: str) -> Conf:
+        return self._job(job_id).conf
+
+    def patch_job(self, job_id: str, patch: Mapping[str, JSON]) -> Tuple[Conf, Dict[str, JSON]]:
+        """Apply `patch` to the configuration of a job.
+
+        Returns:
+            Tuple[Conf, Dict[str, JSON]]: The new configuration, and the leaves changed by the patch and its monitors.
+        """
+        job = self._job(job_id)
+        with job.lock:
+            old = job.conf
+            new = job.conf = _apply_patch(old, patch)
+        return new, old.diff(new)
+
+    def delete_job(self, job_id: str) -> None:
+        with self._lock:
+            if self._jobs.pop(job_id, None) is None:
+                raise UnknownJob(job_id)
+
+    def _job(self, job_id: str) -> _Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise UnknownJob(job_id)
+        return job
+
+
+def _apply_patch(conf: Conf, patch: Mapping[str, JSON]) -> Conf:
+    """Apply `patch` to a copy of `conf`, and collect the error of every invalid path if it fails."""
+    if not isinstance(patch, Mapping):
+        raise PatchError({'': f"A patch must be a JSON object, got {type(patch).__name__}"})
+    try:
+        return conf._shallow_copy().apply_patch(patch)
+    except _PATCH_ERRORS as e:
+        error = e
+
+    errors: Dict[str, str] = {}
+    for path, value in patch.items():
+        try:
+            conf._shallow_copy()._apply_updates({parse_path(path): value})
+        except _PATCH_ERRORS as e:
+            errors[path] = str(e)
+    # The paths are only invalid together, e.g. a path that only exists after the monitors of another one
+    if not errors:
+        errors[''] = str(error)
+    raise PatchError(errors)
+
+
+class _ConfRequestHandler(BaseHTTPRequestHandler):
+    server: ConfServer
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        self._handle('GET')
+
+    def do_POST(self) -> None:
+        self._handle('POST')
+
+    def do_PATCH(self) -> None:
+        self._handle('PATCH')
+
+    def do_DELETE(self) -> None:
+        self._handle('DELETE')
+
+    def _handle(self, method: str) -> None:
+        parts = [part for part in self.path.split('?', 1)[0].split('/') if part]
+        try:
+            body = self._read_body()
+            status, response = self._route(method, parts, body)
+        except PatchError as e:
+            status, response = HTTPStatus.UNPROCESSABLE_ENTITY, {'errors': e.errors}
+        except UnknownJob as e:
+            status, response = HTTPStatus.NOT_FOUND, {'error': f"Unknown job: {e}"}
+        except json.JSONDecodeError as e:
+            status, response = HTTPStatus.BAD_REQUEST, {'error': f"Invalid JSON body: {e}"}
+        except Exception as e:
+            # e.g. a cycle of monitors, the client still gets a response instead of waiting on the connection
+            logger.exception("Failed to handle %s %s", method, self.path)
+            status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}
+        self._send(status, response)
+
+    def _route(self, method: str, parts: List[str], body: JSON) -> Tuple[HTTPStatus, JSON]:
+        server = self.server
+        if parts == ['schema'] and method == 'GET':
+            return HTTPStatus.OK, server.schema()
+        if parts == ['jobs']:
+            if method == 'GET':
+                return HTTPStatus.OK, {'jobs': server.job_ids()}
+            if method == 'POST':
+                job_id, conf = server.create_job(body)
+                return HTTPStatus.CREATED, {'id': job_id, 'config': conf.to_dict()}
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job_id = parts[1]
+            if parts[2:] == ['schema'] and method == 'GET':
+                return HTTPStatus.OK, describe(server.get_job(job_id))
+            if len(parts) == 2:
+                if method == 'GET':
+                    return HTTPStatus.OK, {'id': job_id, 'config': server.get_job(job_id).to_dict()}
+                if method == 'PATCH':
+                    conf, changes = server.patch_job(job_id, body if body is not None else {})
+                    return HTTPStatus.OK, {'id': job_id, 'config': conf.to_dict(), 'changes': changes}
+                if method == 'DELETE':
+                    server.delete_job(job_id)
+                    return HTTPStatus.OK, {'id': job_id}
+        return HTTPStatus.NOT_FOUND, {'error': f"No endpoint {method} {self.path}"}
+
+    def _read_body(self) -> JSON:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length == 0:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, status: HTTPStatus, response: JSON) -> None:
+        content = json.dumps(response, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(conf_cls: Type[Conf], host: str = '127.0.0.1', port: int = 8000) -> None:
+    """Serve the configurations of `conf_cls` until interrupted."""
+    with ConfServer(conf_cls, (host, port)) as server:
+        logger.info("Serving %s on http://%s:%d", conf_cls.__name__, *server.server_address[:2])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/shared.py
+'''
+Share a configuration between processes through `multiprocessing.shared_memory`, instead of pickling it per worker.
+
+`publish` encodes the configuration once in the binary format of `hyperargs.binary` and stores it in a shared memory
+block. Workers get the name of the block, e.g. as an argument of the worker function, and `attach` to it: the values
+are decoded straight into a `FrozenConf`, without building a `Conf` first, the specs of the arguments come from the
+classes already imported by the worker, and nothing is unpickled.
+
+Example:
+    with publish(conf) as shared:
+        pool.map(functools.partial(train, config_name=shared.name), shards)
+
+    def train(shard, config_name):
+        conf = attach(config_name, TrainConf)
+'''
+
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Optional, Set, Type, Union
+import io
+import multiprocessing
+import os
+import sys
+import threading
+
+from .binary import BinaryWriter, load_frozen_record
+from .conf import Conf
+from .frozen import FrozenConf
+
+# The block starts with the length of the encoded configuration, the block itself may be larger
+_LENGTH_SIZE = 8
+
+# Names of the blocks published by this process, and the lock pairing the registrations of the blocks attached with
+# their removal from the resource tracker
+_published: Set[str] = set()
+_tracker_lock = threading.Lock()
+
+
+class SharedConf:
+    """A configuration published to a shared memory block by `publish`.
+
+    The publishing process owns the block: `unlink` it, or use the instance as a context manager, once the workers
+    have attached.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, conf_cls: Type[Conf]):
+        self.block = block
+        self.conf_cls = conf_cls
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    def attach(self) -> FrozenConf:
+        return attach(self.name, self.conf_cls)
+
+    def close(self) -> None:
+        self.block.close()
+
+    def unlink(self) -> None:
+        """Close and remove the block, the configurations already attached stay valid."""
+        self.block.close()
+        self.block.unlink()
+        _published.discard(self.name)
+
+    def __enter__(self) -> 'SharedConf':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.unlink()
+
+
+def publish(conf: Union[Conf, FrozenConf], name: Optional[str] = None) -> SharedConf:
+    """Store `conf` in a new shared memory block, named `name` or a random name.
+
+    Fields added at runtime cannot be published, as in the binary format.
+    """
+    if isinstance(conf, FrozenConf):
+        conf = conf.thaw()
+    out = io.BytesIO()
+    with BinaryWriter(out, type(conf)) as writer:
+        writer.write(conf)
+    data = out.getvalue()
+
+    block = shared_memory.SharedMemory(name=name, create=True, size=_LENGTH_SIZE + len(data))
+    try:
+        block.buf[:_LENGTH_SIZE] = len(data).to_bytes(_LENGTH_SIZE, 'little')
+        block.buf[_LENGTH_SIZE:_LENGTH_SIZE + len(data)] = data
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    _published.add(block.name)
+    return SharedConf(block, type(conf))
+
+
+def attach(name: str, conf_cls: Type[Conf]) -> FrozenConf:
+    """Read the configuration of `conf_cls` published in the block `name`.
+
+    The block is only mapped while decoding. The snapshot does not depend on it, and the block stays registered only to
+    the resource tracker of the publisher, so it is not unlinked when a worker exits.
+    """
+    return load_frozen_record(io.BytesIO(_read_block(name)), conf_cls)
+
+
+def _read_block(name: str) -> bytes:
+    if sys.version_info >= (3, 13):
+        block = shared_memory.SharedMemory(name=name, track=False)
+    elif os.name != 'posix' or name in _published or multiprocessing.parent_process() is not None:
+        # The publisher and the processes it starts share one resource tracker, it already knows the block and only
+        # unlinks it once they all exit
+        block = shared_memory.SharedMemory(name=name)
+    else:
+        # Before Python 3.13, `SharedMemory` always registers the blocks it opens to the tracker of this process
+        with _tracker_lock:
+            block = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(block._name, 'shared_memory')
+    try:
+        return _read_data(block.buf)
+    finally:
+        block.close()
+
+
+def _read_data(buf: memoryview) -> bytes:
+    length = int.from_bytes(buf[:_LENGTH_SIZE], 'little')
+    if length > len(buf) - _LENGTH_SIZE:
+        raise ValueError("Not a shared configuration block")
+    return bytes(buf[_LENGTH_SIZE:_LENGTH_SIZE + length])
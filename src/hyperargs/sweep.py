@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/sweep.py
+'''
+Grid and random hyperparameter sweeps over a base configuration.
+'''
+
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, TypeVar, Union
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from random import Random
+import json
+import math
+import os
+
+from .args import Arg, IntArg, FloatArg, BoolArg, OptionArg, JSON
+from .conf import Conf, _get_item, _to_json_dict, _read_config_file
+from .utils import PATH, parse_path, format_path
+
+C = TypeVar('C', bound=Conf)
+
+# How a value is sampled:
+#   None                                 -> the whole domain of the Arg: options, True/False, or [min_value, max_value]
+#   [v1, v2, ...] / {'choices': [...]}   -> one of the listed values
+#   (low, high) / {'low': l, 'high': h}  -> uniformly in [low, high], clipped to the bounds of the Arg
+#   (low, high, 'log') / {'low': l, 'high': h, 'log': True}
+#                                        -> log-uniformly in [low, high], clipped to the bounds of the Arg
+# The mapping forms can be written in JSON, TOML or YAML sweep spec files.
+DISTRIBUTION = Union[None, List[JSON], Tuple[float, float], Tuple[float, float, str], Mapping[str, Any]]
+
+
+class SweepPlan:
+    """An indexed sweep: the variant at a given index can be built independently of the others.
+
+    The variants are ordered like `itertools.product` over the grid values, with the `n` random samples of each grid
+    combination next to each other. The random samples of a variant only depend on the seed and its index.
+    """
+
+    def __init__(
+        self,
+        grid: Optional[Mapping[str, Sequence[JSON]]] = None,
+        random: Optional[Mapping[str, DISTRIBUTION]] = None,
+        n: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.grid_paths: List[PATH] = [parse_path(path) for path in grid] if grid else []
+        self.grid_values: List[List[JSON]] = [list(values) for values in grid.values()] if grid else []
+        self.random_items: List[Tuple[PATH, DISTRIBUTION]] = (
+            [(parse_path(path), distribution) for path, distribution in random.items()] if random else []
+        )
+        if self.random_items:
+            n = 1 if n is None else n
+            assert n >= 0, "The number of random samples must be non-negative"
+        elif n is not None:
+            raise ValueError("n is the number of random samples per grid combination, it requires random")
+        self.samples_per_point = n if self.random_items else 1
+        # Without a seed, one is drawn here so that every worker of a parallel sweep uses the same one
+        self.seed = seed if seed is not None else Random().getrandbits(64)
+
+    def __len__(self) -> int:
+        return math.prod(len(values) for values in self.grid_values) * self.samples_per_point
+
+    @property
+    def paths(self) -> List[PATH]:
+        """The swept paths."""
+        return self.grid_paths + [path for path, _ in self.random_items]
+
+    def grid_updates(self, grid_index: int) -> Dict[PATH, JSON]:
+        """Get the grid values of the combination at `grid_index`, the last path varies the fastest."""
+        updates: Dict[PATH, JSON] = {}
+        for path, values in zip(reversed(self.grid_paths), reversed(self.grid_values)):
+            grid_index, value_index = divmod(grid_index, len(values))
+            updates[path] = values[value_index]
+        return updates
+
+    def iter_variants(self, base: C, start: int = 0, stop: Optional[int] = None
+                      ) -> Iterator[Tuple[int, Union[C, Exception]]]:
+        """Yield (index, variant) for the indices in [start, stop), or (index, error) when a variant is invalid."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        point_index: Optional[int] = None
+        point: Union[C, Exception, None] = None
+        for index in range(start, stop):
+            grid_index, _ = divmod(index, self.samples_per_point)
+            if grid_index != point_index:
+                point_index = grid_index
+                try:
+                    point = base._shallow_copy()._apply_updates(self.grid_updates(grid_index))
+                except (ValueError, TypeError, KeyError, IndexError, AssertionError) as e:
+                    point = e
+
+            if isinstance(point, Exception) or not self.random_items:
+                yield index, point
+                continue
+
+            # The values are sampled when their paths are updated, against the Args left by the monitors
+            rng = Random((self.seed << 64) + index)
+            samplers: Dict[PATH, Any] = {
+                path: partial(sample_value, distribution=distribution, rng=rng)
+                for path, distribution in self.random_items
+            }
+            try:
+                yield index, point._shallow_copy()._apply_updates(samplers)
+            except (ValueError, TypeError, KeyError, IndexError, AssertionError) as e:
+                yield index, e
+
+
+def iter_sweep(
+    base: C,
+    grid: Optional[Mapping[str, Sequence[JSON]]] = None,
+    random: Optional[Mapping[str, DISTRIBUTION]] = None,
+    n: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Iterator[C]:
+    """Lazily yield the variants of `base` over a grid and/or random samples.
+
+    Every combination of the `grid` values is yielded, and when `random` is given, `n` random samples (default 1) are
+    drawn for each grid combination. Paths use the flattened key notation, e.g. 'optimizer_conf.lr' or 'lst.[0].lr'.
+
+    Variants share the sub-configurations they do not change with `base` and with each other, so only the paths
+    being swept are copied and reparsed. Values are parsed by the Args, so bounds and options are validated, and the
+    monitors and the dependency order apply as in `Conf.parse_dict`. Random values are sampled in dependency order,
+    against the Args left by the monitors of the fields applied before, so they follow structure changes.
+
+    Variants should be treated as read-only: modifying a shared sub-configuration in place would affect the others.
+    Use `parse_dict` or assign new values to update a variant.
+    """
+    for _, variant in SweepPlan(grid=grid, random=random, n=n, seed=seed).iter_variants(base):
+        if isinstance(variant, Exception):
+            raise variant
+        yield variant
+
+
+def materialize_sweep(
+    conf_cls: Type[Conf],
+    spec: Union[str, Mapping[str, Any]],
+    out_dir: str,
+    base: Union[str, Dict[str, JSON], None] = None,
+    file_format: str = 'json',
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+) -> str:
+    """Validate and save every variant of a sweep to `out_dir`, using a process pool.
+
+    Args:
+        conf_cls: The configuration class, it must be importable by the worker processes.
+        spec: A dictionary, or the path of a .json, .toml or .yaml file, with the `grid`, `random`, `n` and `seed`
+            arguments of `Conf.sweep`.
+        out_dir: The output directory, one file is written per valid variant, named after its index.
+        base: The base configuration as a dictionary or a file path, the defaults of `conf_cls` are used if None.
+        file_format: The format of the variant files: 'json', 'toml', 'yaml' or the binary 'hargs'.
+        workers: The number of worker processes, None uses all CPUs and 1 runs in the current process.
+        chunk_size: The number of variants handled by a worker task.
+
+    Returns:
+        str: The path of the manifest, listing the file and the swept values, or the error, of every variant.
+
+    The output only depends on the inputs and the seed, not on the number of workers or the chunk size. If the spec has
+    no seed, the drawn seed is recorded in the manifest.
+    """
+    assert file_format in ('json', 'toml', 'yaml', 'hargs'), f"Unsupported file format: {file_format}"
+    assert chunk_size > 0, "chunk_size must be positive"
+    spec = _read_config_file(spec) if isinstance(spec, str) else dict(spec)
+    unknown = set(spec) - {'grid', 'random', 'n', 'seed'}
+    assert not unknown, f"Unknown keys in the sweep spec: {sorted(unknown)}"
+    base_data = _read_config_file(base) if isinstance(base, str) else (base or {})
+    plan = SweepPlan(grid=spec.get('grid'), random=spec.get('random'), n=spec.get('n'), seed=spec.get('seed'))
+
+    size = len(plan)
+    width = max(6, len(str(size - 1)))
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    task = partial(_materialize_chunk, conf_cls, base_data, plan, out_dir=out_dir, file_format=file_format,
+                   width=width)
+
+    entries: List[Dict[str, Any]] = []
+    if workers == 1:
+        for start, stop in chunks:
+            entries.extend(task(start, stop))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            starts, stops = [start for start, _ in chunks], [stop for _, stop in chunks]
+            for chunk_entries in executor.map(task, starts, stops):
+                entries.extend(chunk_entries)
+
+    manifest = {
+        'conf': f'{conf_cls.__module__}:{conf_cls.__qualname__}',
+        'format': file_format,
+        'grid': spec.get('grid'),
+        'random': spec.get('random'),
+        'n': spec.get('n'),
+        'seed': plan.seed,
+        'count': size,
+        'errors': sum('error' in entry for entry in entries),
+        'variants': entries,
+    }
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest_path
+
+
+def _materialize_chunk(conf_cls: Type[Conf], base_data: Dict[str, JSON], plan: SweepPlan, start: int, stop: int,
+                       out_dir: str, file_format: str, width: int) -> List[Dict[str, Any]]:
+    """Build, validate and save the variants in [start, stop), this runs in the worker processes."""
+    base = conf_cls.from_dict(base_data)
+    entries: List[Dict[str, Any]] = []
+    for index, variant in plan.iter_variants(base, start, stop):
+        if isinstance(variant, Exception):
+            entries.append({'index': index, 'error': f'{type(variant).__name__}: {variant}'})
+            continue
+        file_name = f'{index:0{width}d}.{file_format}'
+        variant.save_to_file(os.path.join(out_dir, file_name))
+        entries.append({
+            'index': index,
+            'file': file_name,
+            'values': {format_path(path): _to_json_dict(_get_item(variant, path)) for path in plan.paths},
+        })
+    return entries
+
+
+def sample_value(arg: Arg, distribution: DISTRIBUTION, rng: Random) -> JSON:
+    """Sample a value for `arg`, respecting its bounds and options."""
+    if not isinstance(arg, Arg):
+        raise TypeError(f"Can only sample values for Args, got {type(arg).__name__}")
+    if isinstance(distribution, Mapping):
+        if set(distribution) == {'choices'}:
+            distribution = list(distribution['choices'])
+        elif set(distribution) in ({'low', 'high'}, {'low', 'high', 'log'}):
+            distribution = ((distribution['low'], distribution['high'], 'log') if distribution.get('log')
+                            else (distribution['low'], distribution['high']))
+        else:
+            raise ValueError(f"Unsupported distribution: {distribution!r}")
+
+    if isinstance(distribution, list):
+        return rng.choice(distribution)
+
+    if distribution is None:
+        if isinstance(arg, OptionArg):
+            return rng.choice(arg._options)
+        if isinstance(arg, BoolArg):
+            return rng.random() < 0.5
+        if isinstance(arg, (IntArg, FloatArg)):
+            if arg._spec.min_value is None or arg._spec.max_value is None:
+                raise ValueError(f"Cannot sample the whole domain of {arg!r}, please provide a (low, high) range")
+            return _sample_range(arg, arg._spec.min_value, arg._spec.max_value, False, rng)
+        raise ValueError(f"Cannot sample the whole domain of {arg!r}, please provide the values to choose from")
+
+    if isinstance(distribution, tuple) and len(distribution) in (2, 3):
+        if not isinstance(arg, (IntArg, FloatArg)):
+            raise ValueError(f"A (low, high) range can only be sampled for IntArg or FloatArg, got {arg!r}")
+        log = len(distribution) == 3
+        if log and distribution[2] != 'log':
+            raise ValueError(f"Unsupported range scale '{distribution[2]}', only 'log' is supported")
+        return _sample_range(arg, distribution[0], distribution[1], log, rng)
+
+    raise ValueError(f"Unsupported distribution: {distribution!r}")
+
+
+def _sample_range(arg: Union[IntArg, FloatArg], low: float, high: float, log: bool, rng: Random) -> Union[int, float]:
+    """Sample uniformly or log-uniformly in [low, high] clipped to the bounds of `arg`."""
+    if arg._spec.min_value is not None:
+        low = max(low, arg._spec.min_value)
+    if arg._spec.max_value is not None:
+        high = min(high, arg._spec.max_value)
+    if isinstance(arg, IntArg):
+        low, high = math.ceil(low), math.floor(high)
+    if low > high:
+        raise ValueError(f"The sampling range [{low}, {high}] is empty for {arg!r}")
+    if log and low <= 0:
+        raise ValueError(f"Log-uniform sampling requires a positive range, got [{low}, {high}]")
+
+    if isinstance(arg, IntArg):
+        if log:
+            return min(high, max(low, round(math.exp(rng.uniform(math.log(low), math.log(high))))))
+        return rng.randint(low, high)
+    if log:
+        return min(high, max(low, math.exp(rng.uniform(math.log(low), math.log(high)))))
+    return rng.uniform(low, high)
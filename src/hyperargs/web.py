@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# File: src/hyperargs/web.py
+'''
+The Streamlit web GUI of HyperArgs.
+
+This module imports Streamlit at module level, so it is only imported on first use by `Conf.build_widgets` and the
+`web_mode` branch of `Conf.parse_command_line`, i.e. in the server started by `Conf.from_web`.
+'''
+
+from functools import partial
+from typing import Dict, Optional, Set, Type, TypeVar
+import os
+import sys
+
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+from .args import Arg, JSON, ST_TAG
+from .conf import Conf, CONF_ITEM, _diff_items, _get_item
+from .launcher import send_result
+from .utils import PATH, format_path, get_widget_index, is_running_in_streamlit, parse_path
+
+C = TypeVar('C', bound=Conf)
+
+# Session state and fragment keys of the web mode, they must not start with ST_TAG which marks the widget keys
+_INSTANCE_KEY = 'hyperargs_instance'
+_PREVIEW_KEY = 'hyperargs_preview'
+
+
+
+def build_widgets(item: CONF_ITEM, prefix: Optional[str] = None, container: Optional[DeltaGenerator] = None) -> None:
+    if isinstance(item, Arg):
+        assert prefix is not None and container is not None, "prefix and container must be provided for Arg"
+        index = get_widget_index()
+        if f'{ST_TAG}.{prefix}' not in index:
+            index.add(parse_path(prefix))
+        item.build_widget(key=prefix, container=container)
+    elif isinstance(item, Conf):
+        if container is None:
+            next_contaier = st.container(border=True)
+            next_contaier.write(prefix.split('.')[-1] if prefix is not None else item.__class__.__name__)
+        else:
+            next_contaier = container.container(border=True)
+            next_contaier.write(prefix.split('.')[-1] if prefix is not None else item.__class__.__name__)
+        for name in item.field_names():
+            value = getattr(item, name)
+
+            build_widgets(value, prefix=f"{prefix}.{name}" if prefix else name, container=next_contaier)
+    elif isinstance(item, list):
+        assert prefix is not None and container is not None, "prefix and container must be provided for list"
+        next_container = container.container(border=True)
+        next_container.write(prefix.split('.')[-1])
+        for i, sub_item in enumerate(item):
+            build_widgets(sub_item, prefix=f"{prefix}.[{i}]", container=next_container)
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+
+def _render_item(item: CONF_ITEM, path: PATH, container: DeltaGenerator) -> None:
+    """Render the widgets of the item at `path` of the web mode instance, each sub-configuration in a fragment."""
+    if isinstance(item, Arg):
+        get_widget_index().add(path)
+        item.build_widget(key=format_path(path), container=container, on_change=partial(_on_widget_change, path))
+    elif isinstance(item, Conf):
+        st.fragment(_render_conf, key=_fragment_key(path))(path, container)
+    elif isinstance(item, list):
+        next_container = container.container(border=True)
+        next_container.write(format_path(path[-1:]))
+        for i, sub_item in enumerate(item):
+            _render_item(sub_item, path + (i,), next_container)
+    else:
+        raise TypeError(f"Unsupported type: {type(item)}")
+
+
+def _render_conf(path: PATH, container: DeltaGenerator) -> None:
+    """The fragment of the sub-configuration at `path`, it is rerun alone when one of its widgets changes."""
+    conf = _get_item(st.session_state[_INSTANCE_KEY], path)
+    assert isinstance(conf, Conf)
+    next_container = container.container(border=True)
+    next_container.write(format_path(path[-1:]) if path else conf.__class__.__name__)
+    for name, value in conf._iter_fields():
+        _render_item(value, path + (name,), next_container)
+
+
+def _fragment_key(path: PATH) -> str:
+    return f'hyperargs_fragment:{format_path(path)}'
+
+
+def _on_widget_change(path: PATH) -> None:
+    """Apply the new value of the widget at `path`, then rerun only the fragments whose widgets are out of date."""
+    state = st.session_state
+    old = state[_INSTANCE_KEY]
+    index = get_widget_index()
+    new = old._shallow_copy()._apply_updates({path: state[index.key(path)]})
+    state[_INSTANCE_KEY] = new
+
+    # Push the values changed by monitors to the existing widgets, new widgets start from the values of `new`
+    changes: Dict[PATH, JSON] = {}
+    _diff_items(old, new, (), changes)
+    for changed_path, value in changes.items():
+        key = index.key(changed_path)
+        if key is not None and key in state and state[key] != value:
+            state[key] = value
+
+    stale: Set[str] = set()
+    _find_stale_fragments(old, new, (), (), path, stale)
+    st.rerun(sorted(stale) + [_PREVIEW_KEY])
+
+
+def _find_stale_fragments(
+    old: CONF_ITEM, new: CONF_ITEM, path: PATH, conf_path: PATH, edited_path: PATH, stale: Set[str]
+) -> None:
+    """Add the keys of the fragments rendering a changed part of `new` to `stale`.
+
+    The fragment of a sub-configuration is stale if one of its own widgets changed, except the widget edited by the
+    user which already shows its value, or if its structure changed, e.g. a sub-configuration of another class.
+    """
+    if old is new:
+        return
+    if isinstance(old, Arg) and isinstance(new, Arg):
+        if path != edited_path and (old.value() != new.value() or type(old.value()) is not type(new.value())):
+            stale.add(_fragment_key(conf_path))
+    elif isinstance(old, Conf) and type(old) is type(new) and old.field_names() == new.field_names():
+        for name in new.field_names():
+            _find_stale_fragments(getattr(old, name), getattr(new, name), path + (name,), path, edited_path, stale)
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            _find_stale_fragments(old_item, new_item, path + (i,), conf_path, edited_path, stale)
+    else:
+        stale.add(_fragment_key(conf_path))
+
+
+def _render_preview() -> None:
+    """The fragment of the settings preview, only the selected format is generated."""
+    instance = st.session_state[_INSTANCE_KEY]
+    tabs = st.tabs(['JSON', 'TOML', 'YAML'], on_change='rerun', key='hyperargs_preview_format')
+    for tab, (language, dump) in zip(tabs, (
+        ('json', lambda: instance.to_json(indent=2)),
+        ('toml', instance.to_toml),
+        ('yaml', instance.to_yaml),
+    )):
+        if not tab.open:
+            continue
+        try:
+            tab.code(body=dump(), language=language, line_numbers=True)
+        except Exception as e:
+            tab.error(f"Failed to generate {language.upper()}: {e}")
+
+
+def run_web_mode(cls: Type[C]) -> None:
+    """Render the configuration page of `cls`, this is the script body executed by `streamlit run`."""
+    assert is_running_in_streamlit(), ("Web mode can only be used by the program it self. You should never "
+                                       "run it manually.")
+    st.set_page_config(layout="wide")
+    st.sidebar.markdown("## HyperArgs - Web")
+    st.markdown("# Program Arguments")
+
+    st.markdown(f"Please set the parameters in the table, then click **'Finish & Run'** to run the "
+                        "program.")
+    assert len(sys.argv) == 3, "Web mode launcher address must be provided as a command line argument"
+
+    if _INSTANCE_KEY not in st.session_state:
+        st.session_state[_INSTANCE_KEY] = cls()
+
+    _render_item(st.session_state[_INSTANCE_KEY], (), st.container())
+
+    st.markdown("## Current settings")
+    st.fragment(_render_preview, key=_PREVIEW_KEY)()
+    instance = st.session_state[_INSTANCE_KEY]
+
+    default_path = os.getcwd()
+    save_path = st.sidebar.text_input("Input folder to save config file:", default_path)
+    st.sidebar.selectbox(label='File format:', options=['JSON', 'TOML', 'YAML'], index=0, key='file_format')
+    if st.sidebar.button("Save config"):
+        if os.path.isdir(save_path):
+            file_name = os.path.join(
+                save_path,
+                f"{instance.__class__.__name__}.{st.session_state['file_format'].lower()}"
+            )
+            instance.save_to_file(file_name)
+            st.sidebar.success(f"Config file has been saved to: {file_name}")
+        else:
+            st.sidebar.error("Invalid path. Please enter a valid directory.")
+
+    exit_app = st.sidebar.button("Finish & Run", help="Click to run the program with the current parameters.", type='primary')
+    if exit_app:
+        @st.dialog(title='Continue running...')
+        def end_program():
+            st.write("### The program continues with these settings, you can now close this tab.")
+        end_program()
+
+        # The launcher stops this server once it receives the settings
+        send_result(sys.argv[2], instance.to_json())
+
+    st.stop()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_batch.py
+'''
+Tests of `Conf.validate_batch`: every record is accepted or rejected, and has the leaf values, as with `from_dict`.
+'''
+
+import math
+import random
+
+import pytest
+
+from example import TrainConf
+from hyperargs import Conf, IntArg, monitor_on
+from hyperargs.conf import _add_leaves
+from hyperargs.utils import format_path
+
+np = pytest.importorskip('numpy')
+
+_VALUES = {
+    'int': [1, 5, 0, -3, '7', 'x', None, 2.5, True, 10 ** 30],
+    'float': [0.1, 1e-7, 2.0, 1, '0.5', 'bad', None, -1.0, 1e-3, math.inf],
+    'bool': [True, False, 'yes', 'no', 1, 0, 'maybe', None],
+    'option': ['adam', 'sgd', 'rmsprop', None, 'None'],
+    'str': ['hi', 'None', 5, None, ''],
+}
+
+
+def _random_record(rng: random.Random) -> dict:
+    def value(kind):
+        return rng.choice(_VALUES[kind])
+
+    record = {}
+    for name, kind, probability in [('batch_size', 'int', 0.5), ('num_epochs', 'int', 0.3),
+                                    ('optimizer_type', 'option', 0.5), ('use_gpu', 'bool', 0.3),
+                                    ('message', 'str', 0.3), ('int_arg', 'int', 0.3), ('conditioned_arg', 'int', 0.2)]:
+        if rng.random() < probability:
+            record[name] = value(kind)
+    if rng.random() < 0.4:
+        record['len_lst'] = rng.choice([0, 1, 2, -1, '3'])
+    if rng.random() < 0.3:
+        record['lst'] = rng.choice([[{'lr': value('float')}], [], 'x', [{'momentum': value('float')}, {}]])
+    if rng.random() < 0.6:
+        record['optimizer_conf'] = rng.choice([{'lr': value('float')}, {'momentum': value('float'), 'beta1': 0.5}, 3])
+    return record
+
+
+def _assert_matches_from_dict(conf_cls, records) -> None:
+    table = conf_cls.validate_batch(records)
+    for row, record in enumerate(records):
+        try:
+            conf = conf_cls.from_dict(record)
+        except Exception:
+            assert table.error_mask[row] and row in table.errors, (row, record)
+            continue
+        assert not table.error_mask[row], (row, record, table.errors.get(row))
+
+        leaves: dict = {}
+        _add_leaves(conf, (), leaves)
+        expected = {format_path(path): value for path, value in leaves.items()}
+        for path, column in table.columns.items():
+            value = column[row]
+            if path not in expected:
+                assert value is None or (isinstance(value, float) and math.isnan(value)), (row, path)
+            elif expected[path] is None:
+                assert value is None or math.isnan(value), (row, path)
+            else:
+                assert value == expected[path], (row, path, value, expected[path])
+        assert set(expected) <= set(table.columns)
+
+
+def test_matches_from_dict() -> None:
+    rng = random.Random(1)
+    _assert_matches_from_dict(TrainConf, [_random_record(rng) for _ in range(2000)])
+
+
+def test_column_types() -> None:
+    records = [{'batch_size': 8, 'optimizer_type': 'sgd', 'optimizer_conf': {'lr': 0.1}},
+               {'batch_size': '16', 'use_gpu': False},
+               {'batch_size': 0}]
+    table = TrainConf.validate_batch(records)
+    assert table.error_mask.tolist() == [False, False, True]
+    assert table.columns['num_epochs'].dtype == np.int64
+    assert table.columns['use_gpu'].dtype == np.bool_
+    assert table.columns['batch_size'][:2].tolist() == [8, 16]
+    # Missing in the Adam records, and in the invalid one
+    assert np.isnan(table.columns['optimizer_conf.momentum']).tolist() == [False, True, True]
+
+
+def test_non_dictionary_records() -> None:
+    table = TrainConf.validate_batch([{'batch_size': 8}, 'not a dict', None])
+    assert table.error_mask.tolist() == [False, True, True]
+
+
+class _Inner(Conf):
+    a = IntArg(1)
+    b = IntArg(0)
+
+    @monitor_on('a')
+    def scale(self):
+        self.b = self.b.parse(self.a.value() * 10)
+
+
+class _Outer(Conf):
+    inner = _Inner()
+    c = IntArg(0, min_value=0)
+
+
+def test_monitored_sub_configurations() -> None:
+    records = [{'inner': {'a': 2}}, {'inner': {'a': 3, 'b': 7}}, {'c': -1}, {'inner': {'a': 'x'}}, {}]
+    _assert_matches_from_dict(_Outer, records)
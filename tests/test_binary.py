@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_binary.py
+'''
+Regression tests of the `.hargs` format: records keep the values they were written with.
+'''
+
+import io
+import sys
+
+import pytest
+
+from hyperargs import Conf, IntArg, StrArg, binary
+
+
+class _Run(Conf):
+    batch_size = IntArg(32)
+    master_addr = StrArg('127.0.0.1', env_bind='HYPERARGS_TEST_MASTER_ADDR')
+    seed = IntArg(0)
+
+
+def _write(*confs: Conf) -> io.BytesIO:
+    out = io.BytesIO()
+    binary.write_records(out, confs, _Run)
+    out.seek(0)
+    return out
+
+
+@pytest.fixture
+def reload_class(monkeypatch: pytest.MonkeyPatch):
+    """Change a class attribute of `_Run` as if the class was imported again, e.g. by the process reading the file."""
+    def reload(name, arg):
+        monkeypatch.setattr(_Run, name, arg)
+        for cache in ('_SCHEMA_HASHES', '_WRITE_LAYOUTS', '_READ_LAYOUTS'):
+            monkeypatch.setattr(binary, cache, {})
+    return reload
+
+
+def test_round_trip() -> None:
+    confs = [_Run(), _Run.from_dict({'batch_size': 8, 'seed': -3}), _Run.from_dict({'master_addr': '10.0.0.1'})]
+    loaded = list(binary.iter_records(_write(*confs), _Run))
+    assert [conf.to_dict() for conf in loaded] == [conf.to_dict() for conf in confs]
+
+
+def test_changed_default_keeps_written_value(reload_class) -> None:
+    data = _write(_Run(), _Run.from_dict({'seed': 1}))
+    reload_class('batch_size', IntArg(64))
+
+    assert [conf.batch_size.value() for conf in binary.iter_records(data, _Run)] == [32, 32]
+    data.seek(0)
+    assert binary.load_frozen_record(data, _Run).batch_size.value() == 32
+
+
+def test_env_bind_at_load_keeps_written_value(reload_class, monkeypatch: pytest.MonkeyPatch) -> None:
+    data = _write(_Run())
+    monkeypatch.setenv('HYPERARGS_TEST_MASTER_ADDR', '10.9.9.9')
+    reload_class('master_addr', StrArg('127.0.0.1', env_bind='HYPERARGS_TEST_MASTER_ADDR'))
+
+    assert binary.load_record(data, _Run).master_addr.value() == '127.0.0.1'
+    assert _Run().master_addr.value() == '10.9.9.9'
+
+
+def test_unknown_class_is_not_imported() -> None:
+    # A class name of the same length, so that the entry stays well formed
+    forged = _write(_Run()).getvalue().replace(b'test_binary:_Run', b'tabnanny:_RunXYZ')
+    assert 'tabnanny' not in sys.modules
+    with pytest.raises(ValueError, match='Unknown configuration class tabnanny:_RunXYZ'):
+        binary.load_record(io.BytesIO(forged), _Run)
+    assert 'tabnanny' not in sys.modules
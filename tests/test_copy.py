@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_copy.py
+'''
+Tests of `copy.copy`, `copy.deepcopy` and `pickle` for configurations and arguments: the built-in Args are shared,
+the Args with a `__dict__` are copied, and the copies are independent where the parse engine modifies in place.
+'''
+
+import copy
+import pickle
+
+import pytest
+
+from example import TrainConf
+from hyperargs import Conf, IntArg
+
+
+def _conf() -> TrainConf:
+    return TrainConf.from_dict({'optimizer_type': 'sgd', 'len_lst': 2, 'lst': [{'lr': 0.5}, {'momentum': 0.3}],
+                                'batch_size': 8})
+
+
+class _Legacy(IntArg):
+    ''' An argument written before the specs: no `__slots__`, settings assigned in `__init__`. '''
+
+    def __init__(self, default: int, note: str = ''):
+        super().__init__(default)
+        self._allow_none = True
+        self.note = note
+        self.history = []
+
+
+class _WithLegacy(Conf):
+    legacy = _Legacy(1, note='a')
+    count = IntArg(0)
+
+
+@pytest.mark.parametrize('copy_fn', [copy.copy, copy.deepcopy, lambda conf: pickle.loads(pickle.dumps(conf))])
+def test_round_trips(copy_fn) -> None:
+    conf = _conf()
+    result = copy_fn(conf)
+    assert type(result) is TrainConf and result is not conf
+    assert result.to_dict() == conf.to_dict()
+    assert result.fingerprint() == conf.fingerprint()
+
+
+def test_builtin_args_are_shared() -> None:
+    arg = IntArg(3, min_value=0)
+    assert copy.copy(arg) is arg and copy.deepcopy(arg) is arg
+    loaded = pickle.loads(pickle.dumps(arg))
+    assert loaded.value() == 3 and loaded._spec == arg._spec
+
+    conf = _conf()
+    assert copy.copy(conf).batch_size is conf.batch_size
+    assert copy.deepcopy(conf).batch_size is conf.batch_size
+
+
+def test_shared_specs_are_restored_from_the_class() -> None:
+    loaded = pickle.loads(pickle.dumps(_conf()))
+    assert loaded.batch_size._spec is TrainConf.batch_size._spec
+    assert loaded.batch_size.value() == 8
+
+
+def test_deepcopy_is_independent() -> None:
+    conf = _conf()
+    result = copy.deepcopy(conf)
+    assert result.optimizer_conf is not conf.optimizer_conf
+    assert result.lst is not conf.lst and result.lst[0] is not conf.lst[0]
+
+    result.lst[0].lr = result.lst[0].lr.parse(0.1)
+    result.lst.append(result.lst[0])
+    assert conf.lst[0].lr.value() == 0.5 and len(conf.lst) == 2
+
+
+def test_copy_lists_are_independent() -> None:
+    conf = _conf()
+    result = copy.copy(conf)
+    result.len_lst = result.len_lst.parse(3)
+    assert len(result.lst) == 3 and len(conf.lst) == 2
+
+
+def test_runtime_fields_are_kept() -> None:
+    conf = _conf()
+    conf.extra = conf.batch_size.parse(5)
+    for result in (copy.copy(conf), copy.deepcopy(conf), pickle.loads(pickle.dumps(conf))):
+        assert result.extra.value() == 5
+        assert 'extra' in result.field_names()
+
+
+def test_args_with_a_dict_are_copied() -> None:
+    arg = _WithLegacy.legacy.parse(4)
+    assert arg._allow_none and arg.note == 'a'
+    for result in (copy.copy(arg), copy.deepcopy(arg), pickle.loads(pickle.dumps(arg))):
+        assert result is not arg and type(result) is _Legacy
+        assert (result.value(), result._allow_none, result.note) == (4, True, 'a')
+        # The attributes stay settable on the copies, without changing the original
+        result.note = 'b'
+        result._allow_none = False
+        assert arg.note == 'a' and arg._allow_none
+
+    assert copy.copy(arg).history is arg.history
+    assert copy.deepcopy(arg).history is not arg.history
+
+
+def test_configurations_with_legacy_args() -> None:
+    conf = _WithLegacy.from_dict({'legacy': 7, 'count': 2})
+    for result in (copy.copy(conf), copy.deepcopy(conf), pickle.loads(pickle.dumps(conf))):
+        assert result.to_dict() == {'legacy': 7, 'count': 2}
+        assert result.legacy.note == 'a'
+    assert copy.deepcopy(conf).legacy is not conf.legacy
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_diff.py
+'''
+Tests of `Conf.diff` and `Conf.apply_patch`: applying the diff of two configurations turns one into the other.
+'''
+
+import pytest
+
+from example import TrainConf
+
+
+def _adam(**data) -> TrainConf:
+    """A configuration whose monitors ran, `TrainConf()` keeps a bare `optimizer_conf` until `optimizer_type` is set."""
+    return TrainConf.from_dict({'optimizer_type': 'adam', **data})
+
+
+def _round_trip(old: TrainConf, new: TrainConf) -> dict:
+    patch = old.diff(new)
+    assert old._shallow_copy().apply_patch(patch).to_dict() == new.to_dict()
+    return patch
+
+
+def test_identical_configurations() -> None:
+    conf = TrainConf()
+    assert conf.diff(conf) == {}
+    assert conf.diff(TrainConf()) == {}
+
+
+def test_leaf_changes() -> None:
+    old = _adam()
+    new = _adam(batch_size=8, optimizer_conf={'lr': 0.01})
+    assert _round_trip(old, new) == {'batch_size': 8, 'optimizer_conf.lr': 0.01}
+
+
+def test_structure_changes() -> None:
+    old = _adam()
+    new = TrainConf.from_dict({'optimizer_type': 'sgd', 'optimizer_conf': {'momentum': 0.9},
+                               'len_lst': 2, 'lst': [{'lr': 0.5}, {}]})
+    patch = _round_trip(old, new)
+    assert patch['optimizer_type'] == 'sgd'
+    assert patch['optimizer_conf.momentum'] == 0.9
+    assert patch['lst.[0].lr'] == 0.5
+
+    # Back to Adam and an empty list, the leaves of the new AdamConf are part of the patch
+    patch = _round_trip(new, old)
+    assert patch.items() >= {'optimizer_type': 'adam', 'len_lst': 0, 'optimizer_conf.beta1': 0.9}.items()
+    assert not any(path.startswith('lst') or path.endswith('momentum') for path in patch)
+
+
+def test_monitor_outputs_are_kept() -> None:
+    old = TrainConf()
+    new = TrainConf.from_dict({'int_arg': 4})
+    assert _round_trip(old, new) == {'int_arg': 4, 'conditioned_arg': 8}
+
+
+def test_apply_patch_is_in_dependency_order() -> None:
+    # The nested path only exists once the monitor of optimizer_type ran
+    conf = TrainConf().apply_patch({'optimizer_conf.momentum': 0.5, 'optimizer_type': 'sgd'})
+    assert conf.optimizer_conf.momentum.value() == 0.5
+
+
+def test_apply_patch_copies_only_the_patched_paths() -> None:
+    old = TrainConf.from_dict({'optimizer_type': 'sgd', 'len_lst': 2})
+    new = old._shallow_copy().apply_patch({'lst.[1].lr': 0.2})
+    assert new.lst[0] is old.lst[0]
+    assert new.optimizer_conf is old.optimizer_conf
+    assert old.lst[1].lr.value() == 0.001
+
+
+@pytest.mark.parametrize('patch', [{'batch_size': 0}, {'missing': 1}, {'lst.[5].lr': 0.1}, {'batch_size.x': 1}])
+def test_invalid_patch(patch: dict) -> None:
+    with pytest.raises((ValueError, KeyError, IndexError, TypeError, AssertionError)):
+        TrainConf().apply_patch(patch)
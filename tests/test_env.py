@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_env.py
+'''
+Tests of `Conf.apply_env`: prefixed variables, `env_bind` variables, the dependency order and the report.
+'''
+
+import logging
+
+import pytest
+
+from example import TrainConf
+
+
+def test_prefixed_variables() -> None:
+    conf = TrainConf()
+    report = conf.apply_env('TRAIN', {'TRAIN__BATCH_SIZE': '8', 'TRAIN__USE_GPU': 'false', 'OTHER__BATCH_SIZE': '2'})
+    assert report == {'batch_size': 'TRAIN__BATCH_SIZE', 'use_gpu': 'TRAIN__USE_GPU'}
+    assert (conf.batch_size.value(), conf.use_gpu.value()) == (8, False)
+
+
+def test_dependency_order() -> None:
+    # The nested fields only exist once the monitors of optimizer_type and len_lst ran
+    conf = TrainConf()
+    report = conf.apply_env('TRAIN', {
+        'TRAIN__OPTIMIZER_CONF__MOMENTUM': '0.5',
+        'TRAIN__OPTIMIZER_TYPE': 'sgd',
+        'TRAIN__LST__1__LR': '0.2',
+        'TRAIN__LEN_LST': '2',
+    })
+    assert set(report) == {'optimizer_type', 'optimizer_conf.momentum', 'len_lst', 'lst.[1].lr'}
+    assert conf.optimizer_conf.momentum.value() == 0.5
+    assert [item.lr.value() for item in conf.lst] == [0.001, 0.2]
+
+
+def test_env_bind_and_precedence() -> None:
+    conf = TrainConf()
+    assert conf.apply_env(environ={'MASTER_ADDR': '10.0.0.1'}) == {'master_addr': 'MASTER_ADDR'}
+    assert conf.master_addr.value() == '10.0.0.1'
+
+    conf = TrainConf()
+    report = conf.apply_env('TRAIN', {'MASTER_ADDR': '10.0.0.1', 'TRAIN__MASTER_ADDR': '10.0.0.2'})
+    assert report == {'master_addr': 'TRAIN__MASTER_ADDR'}
+    assert conf.master_addr.value() == '10.0.0.2'
+
+
+def test_report_lists_only_values_that_took_effect() -> None:
+    # conditioned_arg is parsed before int_arg, whose monitor then overwrites it
+    conf = TrainConf()
+    report = conf.apply_env('TRAIN', {'TRAIN__INT_ARG': '4', 'TRAIN__CONDITIONED_ARG': '99'})
+    assert conf.conditioned_arg.value() == 8
+    assert report == {'int_arg': 'TRAIN__INT_ARG'}
+
+
+def test_unchanged_sub_configurations_are_shared() -> None:
+    conf = TrainConf.from_dict({'optimizer_type': 'sgd', 'len_lst': 2})
+    first, second = conf.lst
+    conf.apply_env('TRAIN', {'TRAIN__LST__1__LR': '0.2'})
+    assert conf.lst[0] is first and conf.lst[1] is not second
+    assert second.lr.value() == 0.001
+
+
+def test_unused_variables_are_logged(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING):
+        assert TrainConf().apply_env('TRAIN', {'TRAIN__MISSING': '1'}) == {}
+    assert 'TRAIN__MISSING' in caplog.text
+
+
+def test_invalid_value_raises() -> None:
+    with pytest.raises(ValueError):
+        TrainConf().apply_env('TRAIN', {'TRAIN__BATCH_SIZE': '0'})
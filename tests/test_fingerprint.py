@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_fingerprint.py
+'''
+Tests of `Conf.fingerprint`: stable across processes and key orders, and updated by every change.
+'''
+
+import os
+import subprocess
+import sys
+
+import hyperargs
+from hyperargs import Conf, IntArg, FloatArg, StrArg, BoolArg
+
+
+class _Optim(Conf):
+    lr = FloatArg(0.001)
+    nesterov = BoolArg(False)
+
+
+class _Run(Conf):
+    name = StrArg('run')
+    steps = IntArg(10)
+    optim = _Optim()
+    stages = [_Optim(), _Optim()]
+    scales = [FloatArg(0.5), FloatArg(-0.0)]
+
+
+# The fingerprint of `_Run()`, it must not change between processes, platforms and releases
+DEFAULT_FINGERPRINT = '9fefb2d70a530d6748855b4250759a42b110c9b2db24483d338dd7218f6b3a94'
+
+
+def test_golden_value() -> None:
+    assert _Run().fingerprint() == DEFAULT_FINGERPRINT
+
+
+def test_stable_across_processes() -> None:
+    src = os.path.dirname(os.path.dirname(os.path.abspath(hyperargs.__file__)))
+    code = 'import test_fingerprint; print(test_fingerprint._Run().fingerprint())'
+    env = dict(os.environ, PYTHONHASHSEED='1', PYTHONPATH=os.pathsep.join([src, os.path.dirname(__file__)]))
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == _Run().fingerprint()
+
+
+def test_independent_of_key_order() -> None:
+    data = _Run().to_dict()
+    data['steps'] = 20
+    reordered = dict(reversed(list(data.items())))
+    assert _Run.from_dict(data).fingerprint() == _Run.from_dict(reordered).fingerprint()
+
+
+def test_every_change_is_seen() -> None:
+    conf = _Run()
+    fingerprints = {conf.fingerprint()}
+    for path, value in [('steps', 11), ('optim.lr', 0.01), ('stages.[1].nesterov', True), ('scales.[1]', 0.0),
+                        ('name', 'other')]:
+        conf.apply_patch({path: value})
+        fingerprints.add(conf.fingerprint())
+    assert len(fingerprints) == 6
+
+    # The cached digests of the unchanged fields are reused, the result is the same as computed from scratch
+    assert conf.fingerprint() == _Run.from_dict(conf.to_dict()).fingerprint()
+    conf.stages[0].lr = conf.stages[0].lr.parse(0.5)
+    assert conf.fingerprint() == _Run.from_dict(conf.to_dict()).fingerprint()
+
+
+def test_types_are_distinguished() -> None:
+    class _Value(Conf):
+        value = FloatArg(1.0, allow_none=True)
+
+    assert _Value().fingerprint() != _Value.from_dict({'value': None}).fingerprint()
+    assert _Value().fingerprint() == _Value.from_dict({'value': 1}).fingerprint()
+
+
+def test_frozen_matches() -> None:
+    conf = _Run.from_dict({'steps': 3})
+    assert conf.freeze().fingerprint() == conf.fingerprint()
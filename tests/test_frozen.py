@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_frozen.py
+'''
+Tests of the frozen snapshots: immutable, hashable, shared between threads, and thawed into equal configurations.
+'''
+
+import copy
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from example import TrainConf
+from hyperargs.frozen import FrozenConf
+
+
+def _conf() -> TrainConf:
+    return TrainConf.from_dict({'optimizer_type': 'sgd', 'len_lst': 2, 'lst': [{'lr': 0.5}], 'batch_size': 8})
+
+
+def test_snapshot_reads_like_the_configuration() -> None:
+    conf = _conf()
+    frozen = conf.freeze()
+    assert isinstance(frozen, FrozenConf) and isinstance(frozen.optimizer_conf, FrozenConf)
+    assert frozen.batch_size.value() == 8
+    assert isinstance(frozen.lst, tuple) and frozen.lst[0].lr.value() == 0.5
+    assert frozen.to_dict() == conf.to_dict()
+    assert frozen.field_names() == conf.field_names()
+    # The Args are shared, not copied
+    assert frozen.batch_size is conf.batch_size
+
+
+def test_snapshot_is_immutable() -> None:
+    frozen = _conf().freeze()
+    with pytest.raises(AttributeError):
+        frozen.batch_size = frozen.batch_size.parse(16)
+    with pytest.raises(AttributeError):
+        frozen.optimizer_conf.lr = None
+    with pytest.raises(AttributeError):
+        del frozen.batch_size
+
+
+def test_snapshot_does_not_follow_the_configuration() -> None:
+    conf = _conf()
+    frozen = conf.freeze()
+    conf.batch_size = conf.batch_size.parse(64)
+    conf.lst[0].lr = conf.lst[0].lr.parse(0.1)
+    assert frozen.batch_size.value() == 8
+    assert frozen.lst[0].lr.value() == 0.5
+
+
+def test_equality_and_hash() -> None:
+    first, second = _conf().freeze(), _conf().freeze()
+    assert first == second and hash(first) == hash(second)
+    assert len({first, second}) == 1
+    other = TrainConf.from_dict({'batch_size': 9}).freeze()
+    assert first != other
+    assert first.fingerprint() == _conf().fingerprint()
+
+
+def test_thaw() -> None:
+    frozen = _conf().freeze()
+    thawed = frozen.thaw()
+    assert isinstance(thawed, TrainConf) and isinstance(thawed.lst, list)
+    assert thawed.to_dict() == frozen.to_dict()
+
+    # The thawed configuration is mutable and runs its monitors, the snapshot is unchanged
+    thawed.len_lst = thawed.len_lst.parse(3)
+    assert len(thawed.lst) == 3 and len(frozen.lst) == 2
+    assert thawed.freeze() != frozen
+
+
+def test_runtime_fields() -> None:
+    conf = _conf()
+    conf.extra = conf.batch_size.parse(1)
+    frozen = conf.freeze()
+    assert 'extra' in frozen.field_names()
+    assert frozen.thaw().extra.value() == 1
+
+
+def test_copy_and_pickle() -> None:
+    frozen = _conf().freeze()
+    assert copy.copy(frozen) is frozen and copy.deepcopy(frozen) is frozen
+    loaded = pickle.loads(pickle.dumps(frozen))
+    assert loaded == frozen and type(loaded) is type(frozen)
+
+
+def test_shared_between_threads() -> None:
+    frozen = _conf().freeze()
+    expected = frozen.to_dict()
+
+    def read(_):
+        return frozen.to_dict(), frozen.fingerprint(), hash(frozen)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(read, range(200)))
+    assert all(result == (expected, frozen.fingerprint(), hash(frozen)) for result in results)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_import.py
+'''
+The startup budget of `import hyperargs`: only the standard library is loaded, the GUI, graph and format backends are
+imported on first use.
+'''
+
+import os
+import subprocess
+import sys
+
+import hyperargs
+
+# The cumulative import time of the package, in microseconds, as reported by `python -X importtime`. It is about
+# 50 ms, importing streamlit alone takes seconds.
+IMPORT_BUDGET_US = 200_000
+
+LAZY_MODULES = ('streamlit', 'networkx', 'yaml', 'psutil', 'tomli_w')
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    src = os.path.dirname(os.path.dirname(os.path.abspath(hyperargs.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+def test_import_loads_no_optional_dependency() -> None:
+    code = f"import sys, hyperargs; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    assert _run('-c', code).stdout.strip() == ''
+
+
+def test_import_time_budget() -> None:
+    lines = _run('-X', 'importtime', '-c', 'import hyperargs').stderr.splitlines()
+    # import time: self [us] | cumulative | imported package
+    cumulative = next(int(line.split('|')[1]) for line in lines if line.split('|')[-1].strip() == 'hyperargs')
+    assert cumulative < IMPORT_BUDGET_US, f"import hyperargs took {cumulative / 1000:.1f} ms"
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_iter_from_file.py
+'''
+Tests of `Conf.iter_from_file`: JSON Lines with and without a memory map, multi-document YAML and binary files.
+'''
+
+import json
+
+import pytest
+
+from example import TrainConf
+from hyperargs.conf import RecordError
+
+RECORDS = [{'batch_size': 8}, {'optimizer_type': 'sgd', 'optimizer_conf': {'momentum': 0.9}}, {'num_epochs': 3}]
+
+
+def _expected() -> list:
+    return [TrainConf.from_dict(record).to_dict() for record in RECORDS]
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_json_lines(tmp_path, use_mmap: bool) -> None:
+    path = tmp_path / 'runs.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in RECORDS) + '\n\n', encoding='utf-8')
+    loaded = list(TrainConf.iter_from_file(str(path), use_mmap=use_mmap))
+    assert [conf.to_dict() for conf in loaded] == _expected()
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_json_lines_errors_do_not_stop(tmp_path, use_mmap: bool) -> None:
+    path = tmp_path / 'runs.ndjson'
+    path.write_text('{"batch_size": 8}\n\n{"batch_size": 0}\n{not json\n[1]\n{"num_epochs": 3}', encoding='utf-8')
+    loaded = list(TrainConf.iter_from_file(str(path), use_mmap=use_mmap))
+
+    assert [type(item).__name__ for item in loaded] == ['TrainConf', 'RecordError', 'RecordError', 'RecordError',
+                                                       'TrainConf']
+    assert [(item.index, item.line) for item in loaded if isinstance(item, RecordError)] == [(1, 3), (2, 4), (3, 5)]
+    assert loaded[-1].num_epochs.value() == 3
+
+
+def test_empty_json_lines(tmp_path) -> None:
+    path = tmp_path / 'empty.jsonl'
+    path.write_text('', encoding='utf-8')
+    assert list(TrainConf.iter_from_file(str(path), use_mmap=True)) == []
+
+
+def test_multi_document_yaml(tmp_path) -> None:
+    import yaml
+    path = tmp_path / 'runs.yaml'
+    path.write_text(yaml.safe_dump_all(RECORDS), encoding='utf-8')
+    loaded = list(TrainConf.iter_from_file(str(path)))
+    assert [conf.to_dict() for conf in loaded] == _expected()
+
+
+def test_yaml_syntax_error_ends_the_iteration(tmp_path) -> None:
+    path = tmp_path / 'runs.yml'
+    path.write_text('batch_size: 8\n---\nbatch_size: 0\n---\nbatch_size: [\n---\nnum_epochs: 3\n', encoding='utf-8')
+    loaded = list(TrainConf.iter_from_file(str(path)))
+    assert [type(item).__name__ for item in loaded] == ['TrainConf', 'RecordError', 'RecordError']
+
+
+def test_single_record_formats(tmp_path) -> None:
+    conf = TrainConf.from_dict(RECORDS[1])
+    for extension in ('json', 'toml', 'hargs'):
+        path = str(tmp_path / f'run.{extension}')
+        conf.save_to_file(path)
+        assert [item.to_dict() for item in TrainConf.iter_from_file(path)] == [conf.to_dict()]
+
+
+def test_strict(tmp_path) -> None:
+    path = tmp_path / 'runs.jsonl'
+    path.write_text('{"batch_size": 8, "unknown": 1}\n', encoding='utf-8')
+    assert isinstance(next(TrainConf.iter_from_file(str(path))), TrainConf)
+    assert isinstance(next(TrainConf.iter_from_file(str(path), strict=True)), RecordError)
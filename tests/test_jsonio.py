@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_jsonio.py
+'''
+Regression tests of the JSON backends: every backend reads back what it writes, and the compact and canonical outputs
+do not depend on the backend.
+'''
+
+import json
+import math
+
+import pytest
+
+from hyperargs import BoolArg, Conf, FloatArg, IntArg, StrArg, jsonio
+
+
+class _Bounds(Conf):
+    low = FloatArg(-math.inf)
+    high = FloatArg(math.inf)
+    scale = FloatArg(1.5, allow_none=True)
+
+
+def _installed_backends():
+    for name in jsonio.JSON_BACKENDS:
+        try:
+            jsonio._load_backend(name)
+        except ImportError:
+            continue
+        yield name
+
+
+@pytest.fixture(params=list(_installed_backends()))
+def backend(request: pytest.FixtureRequest):
+    jsonio.set_json_backend(request.param)
+    yield request.param
+    jsonio.set_json_backend(None)
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4])
+def test_non_finite_floats_round_trip(backend: str, indent) -> None:
+    content = _Bounds().to_json(indent=indent)
+    assert 'null' not in content
+    conf = _Bounds.from_json(content)
+    assert (conf.low.value(), conf.high.value(), conf.scale.value()) == (-math.inf, math.inf, 1.5)
+
+
+def test_save_and_load_non_finite_floats(backend: str, tmp_path) -> None:
+    path = str(tmp_path / 'bounds.json')
+    _Bounds().save_to_file(path)
+    assert _Bounds.load_from_file(path).high.value() == math.inf
+
+
+def test_loads_standard_library_extensions(backend: str) -> None:
+    assert math.isnan(jsonio.loads('{"a": NaN}')['a'])
+    assert jsonio.dumps({'a': None}) == '{"a": null}'
+    with pytest.raises(ValueError):
+        jsonio.loads('{"a": }')
+
+
+class _Values(Conf):
+    name = StrArg('héllo "world", ok: ✓')
+    lr = FloatArg(1e-7)
+    big = FloatArg(1e16)
+    ratio = FloatArg(0.1)
+    count = IntArg(3)
+    flag = BoolArg(True)
+    label = StrArg(None, allow_none=True)
+    inner = _Bounds()
+
+
+def _values() -> _Values:
+    conf = _Values()
+    conf.inner = _Bounds.from_dict({'low': -1.0, 'high': 2.5})
+    return conf
+
+
+def test_compact_output_is_the_standard_library(backend: str) -> None:
+    conf = _values()
+    assert conf.to_json() == json.dumps(conf.to_dict(), ensure_ascii=False)
+    assert conf.freeze().to_json() == conf.to_json()
+
+
+def test_canonical_output_is_the_same_for_every_backend(backend: str) -> None:
+    conf = _values()
+    content = conf.to_json(canonical=True)
+    assert content == json.dumps(conf.to_dict(), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    assert jsonio.loads(content) == conf.to_dict()
+    assert _Values.from_json(content).fingerprint() == conf.fingerprint()
+
+
+@pytest.mark.parametrize('indent', [2, 4])
+def test_indented_output_round_trips(backend: str, indent: int) -> None:
+    conf = _values()
+    content = conf.to_json(indent=indent)
+    assert '\n' + ' ' * indent + '"name"' in content
+    assert json.loads(content) == conf.to_dict()
+    assert _Values.from_json(content).to_dict() == conf.to_dict()
+
+
+def test_msgspec_backend() -> None:
+    pytest.importorskip('msgspec')
+    jsonio.set_json_backend('msgspec')
+    try:
+        conf = _values()
+        assert jsonio.get_json_backend().name == 'msgspec'
+        assert conf.to_json() == json.dumps(conf.to_dict(), ensure_ascii=False)
+        assert json.loads(conf.to_json(indent=2)) == conf.to_dict()
+        assert jsonio.dumps({'a': 10 ** 30}) == '{"a": 1000000000000000000000000000000}'
+        assert jsonio.dumps({'a': 10 ** 30}, indent=2) == '{\n  "a": 1000000000000000000000000000000\n}'
+        assert _Bounds.from_json(_Bounds().to_json(indent=2)).high.value() == math.inf
+    finally:
+        jsonio.set_json_backend(None)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_load.py
+'''
+Tests of `Conf.load`: layered sources merged with precedence, and the cache of the layer files.
+'''
+
+import json
+import os
+
+import pytest
+
+from example import TrainConf
+from hyperargs import conf as conf_module
+
+
+def _write(path, data: dict) -> str:
+    path = str(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            json.dump(data, f)
+        elif path.endswith('.toml'):
+            import tomli_w
+            f.write(tomli_w.dumps(data))
+        else:
+            import yaml
+            yaml.safe_dump(data, f)
+    return path
+
+
+def test_later_layers_take_precedence(tmp_path) -> None:
+    base = _write(tmp_path / 'base.yaml', {'batch_size': 16, 'num_epochs': 5, 'optimizer_type': 'sgd',
+                                           'optimizer_conf': {'lr': 0.1, 'momentum': 0.9}})
+    site = _write(tmp_path / 'site.toml', {'num_epochs': 7, 'optimizer_conf': {'lr': 0.2}})
+    conf = TrainConf.load([base, site, {'batch_size': 64}])
+
+    assert (conf.batch_size.value(), conf.num_epochs.value()) == (64, 7)
+    # Nested dictionaries are merged by key
+    assert conf.optimizer_conf.to_dict() == {'lr': 0.2, 'momentum': 0.9}
+
+
+def test_lists_are_merged_by_index(tmp_path) -> None:
+    base = _write(tmp_path / 'base.json', {'optimizer_type': 'sgd', 'len_lst': 2,
+                                           'lst': [{'lr': 0.1, 'momentum': 0.5}, {'lr': 0.2}]})
+    conf = TrainConf.load([base, {'lst': [{'lr': 0.3}]}])
+    assert [item.to_dict() for item in conf.lst] == [{'lr': 0.3, 'momentum': 0.5}, {'lr': 0.2, 'momentum': 0.0}]
+
+
+def test_layers_are_not_modified(tmp_path) -> None:
+    overlay = {'optimizer_conf': {'lr': 0.2}}
+    base = {'optimizer_type': 'sgd', 'optimizer_conf': {'lr': 0.1, 'momentum': 0.9}}
+    TrainConf.load([base, overlay])
+    assert base == {'optimizer_type': 'sgd', 'optimizer_conf': {'lr': 0.1, 'momentum': 0.9}}
+    assert overlay == {'optimizer_conf': {'lr': 0.2}}
+
+
+def test_files_are_cached_until_they_change(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = _write(tmp_path / 'base.json', {'batch_size': 16})
+    reads = []
+    read = conf_module._read_config_file
+    monkeypatch.setattr(conf_module, '_read_config_file', lambda file_path: reads.append(file_path) or read(file_path))
+    conf_module._read_config_file_version.cache_clear()
+
+    assert TrainConf.load([path]).batch_size.value() == 16
+    assert TrainConf.load([path, {'num_epochs': 3}]).batch_size.value() == 16
+    assert len(reads) == 1
+
+    _write(path, {'batch_size': 128})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert TrainConf.load([path]).batch_size.value() == 128
+    assert len(reads) == 2
+
+
+def test_strict() -> None:
+    with pytest.raises(ValueError, match='unknown'):
+        TrainConf.load([{'batch_size': 16}, {'unknown': 1}], strict=True)
+    assert TrainConf.load([{'batch_size': 16}, {'unknown': 1}]).batch_size.value() == 16
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_options.py
+'''
+Tests of the caches of `OptionArg.option_fn`: memoized, expiring after a TTL, or called on every lookup.
+'''
+
+import pytest
+
+from hyperargs import OptionArg
+from hyperargs import args as args_module
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(args_module.time, 'monotonic', clock)
+    return clock
+
+
+def _provider(*options: str):
+    calls = []
+
+    def option_fn():
+        calls.append(None)
+        return list(options)
+    return option_fn, calls
+
+
+def test_memoized_per_process() -> None:
+    option_fn, calls = _provider('a', 'b')
+    arg = OptionArg('a', option_fn=option_fn, cache_options=True)
+    for value in ('a', 'b', 'a'):
+        arg = arg.parse(value)
+    repr(arg)
+
+    assert len(calls) == 1
+    assert (arg.option_cache.hits, arg.option_cache.misses) == (4, 1)
+
+
+def test_ttl_expiry(clock: _Clock) -> None:
+    option_fn, calls = _provider('a', 'b')
+    arg = OptionArg('a', option_fn=option_fn, cache_options=10)
+    arg.parse('b')
+    clock.now += 9.9
+    arg.parse('b')
+    assert len(calls) == 1
+
+    clock.now += 0.2
+    arg.parse('b')
+    assert len(calls) == 2
+    assert (arg.option_cache.hits, arg.option_cache.misses) == (2, 2)
+
+
+def test_uncached_calls_every_lookup() -> None:
+    option_fn, calls = _provider('a', 'b')
+    arg = OptionArg('a', option_fn=option_fn)
+    arg.parse('b')
+    arg.parse('a')
+    assert len(calls) == 3
+    assert arg.option_cache.hits == 0
+
+
+def test_invalidate_refetches() -> None:
+    options = ['a']
+    arg = OptionArg('a', option_fn=lambda: options, cache_options=True)
+    options.append('c')
+    with pytest.raises(ValueError):
+        arg.parse('c')
+    arg.option_cache.invalidate()
+    assert arg.parse('c').value() == 'c'
+
+
+def test_invalid_value_fetches_options_once() -> None:
+    option_fn, calls = _provider('a', 'b')
+    arg = OptionArg('a', option_fn=option_fn)
+    calls.clear()
+    with pytest.raises(ValueError, match=r"Value z is not in options \['a', 'b'\]"):
+        arg.parse('z')
+    assert len(calls) == 1
+
+
+def test_static_options() -> None:
+    arg = OptionArg('a', options=['a', 'b'])
+    assert arg.option_cache is None
+    assert arg.parse('b').value() == 'b'
+    with pytest.raises(ValueError):
+        arg.parse('z')
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_overrides.py
+'''
+Tests of the `--set <path>=<value>` command line overrides of `Conf.parse_command_line`.
+'''
+
+import json
+import sys
+
+import pytest
+
+from example import TrainConf
+from hyperargs import IntArg, FloatArg
+
+
+def _parse(monkeypatch: pytest.MonkeyPatch, *argv: str) -> TrainConf:
+    monkeypatch.setattr(sys, 'argv', ['train.py', *argv])
+    return TrainConf.parse_command_line()
+
+
+def test_overrides_after_a_source(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    path = tmp_path / 'train.json'
+    path.write_text(json.dumps({'batch_size': 16, 'optimizer_type': 'sgd', 'len_lst': 1}), encoding='utf-8')
+    conf = _parse(monkeypatch, '--config_path', str(path), '--set', 'batch_size=8', '--set=lst[0].lr=0.1',
+                  '--set', 'optimizer_conf.momentum=0.9')
+
+    assert conf.batch_size.value() == 8
+    assert conf.lst[0].lr.value() == 0.1
+    assert conf.optimizer_conf.momentum.value() == 0.9
+
+
+def test_overrides_without_a_source(monkeypatch: pytest.MonkeyPatch) -> None:
+    conf = _parse(monkeypatch, '--set', 'num_epochs=3')
+    assert conf.num_epochs.value() == 3
+    assert conf.to_dict() == TrainConf.from_dict({'num_epochs': 3}).to_dict()
+
+
+def test_overrides_follow_the_dependency_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The momentum only exists once the monitor of optimizer_type switched to SGD
+    conf = _parse(monkeypatch, '--parse_json', '{}', '--set', 'optimizer_conf.momentum=0.5',
+                  '--set', 'optimizer_type=sgd')
+    assert conf.optimizer_conf.momentum.value() == 0.5
+
+
+def test_only_the_overridden_fields_are_parsed(monkeypatch: pytest.MonkeyPatch) -> None:
+    source = json.dumps({'batch_size': 16, 'optimizer_type': 'adam', 'optimizer_conf': {'lr': 0.01}})
+    calls = []
+    for arg_type in (IntArg, FloatArg):
+        parse = arg_type.parse
+        monkeypatch.setattr(arg_type, 'parse',
+                            lambda self, value, parse=parse: calls.append(type(self).__name__) or parse(self, value))
+
+    _parse(monkeypatch, '--parse_json', source)
+    baseline = list(calls)
+    calls.clear()
+    conf = _parse(monkeypatch, '--parse_json', source, '--set', 'optimizer_conf.beta1=0.8')
+    assert sorted(calls) == sorted(baseline + ['FloatArg'])
+    assert conf.optimizer_conf.beta1.value() == 0.8
+    assert conf.optimizer_conf.lr.value() == 0.01
+
+
+@pytest.mark.parametrize('argv', [['--set'], ['--set', 'batch_size'], ['--set', 'batch_size=0'],
+                                  ['--set', 'missing=1']])
+def test_invalid_overrides(monkeypatch: pytest.MonkeyPatch, argv: list) -> None:
+    with pytest.raises((ValueError, KeyError)):
+        _parse(monkeypatch, *argv)
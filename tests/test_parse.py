@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_parse.py
+'''
+Regression tests of the single-pass parse engine: every given value is parsed once and every monitor runs once.
+'''
+
+from collections import Counter
+
+import pytest
+
+from example import TrainConf
+from hyperargs import Conf, IntArg, FloatArg, StrArg, BoolArg, OptionArg, monitor_on
+
+MONITORS = ('change_optimizer', 'change_b', 'change_lst')
+
+
+@pytest.fixture
+def calls(monkeypatch: pytest.MonkeyPatch) -> Counter:
+    """Count the calls of `Arg.parse` by argument type, and of the monitors of `TrainConf` by name."""
+    counter: Counter = Counter()
+
+    def counting(name, func):
+        def wrapper(*args, **kwargs):
+            counter[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    for arg_type in (IntArg, FloatArg, StrArg, BoolArg, OptionArg):
+        monkeypatch.setattr(arg_type, 'parse', counting(arg_type.__name__, arg_type.parse))
+    for name in MONITORS:
+        monkeypatch.setattr(TrainConf, name, counting(name, getattr(TrainConf, name)))
+    return counter
+
+
+def test_from_dict_parses_each_value_once(calls: Counter) -> None:
+    conf = TrainConf.from_dict({
+        'optimizer_type': 'sgd',
+        'int_arg': 4,
+        'len_lst': 2,
+        'lst': [{'lr': 0.5}, {'lr': 0.1}],
+        'optimizer_conf': {'lr': 0.01},
+        'batch_size': 8,
+    })
+
+    # batch_size, int_arg, len_lst and the conditioned_arg set by `change_b`; the three learning rates
+    assert calls == Counter(IntArg=4, FloatArg=3, OptionArg=1, change_optimizer=1, change_b=1, change_lst=1)
+    assert conf.conditioned_arg.value() == 8
+    assert [item.lr.value() for item in conf.lst] == [0.5, 0.1]
+    assert conf.optimizer_conf.lr.value() == 0.01
+
+
+def test_round_trip_parses_each_leaf_once(calls: Counter) -> None:
+    data = TrainConf.from_dict({'optimizer_type': 'sgd', 'int_arg': 4, 'len_lst': 2}).to_dict()
+    calls.clear()
+
+    assert TrainConf.from_dict(data).to_dict() == data
+    assert calls == Counter(IntArg=6, FloatArg=6, StrArg=2, BoolArg=1, OptionArg=1,
+                            change_optimizer=1, change_b=1, change_lst=1)
+
+
+class _Scaled(Conf):
+    a = IntArg(1)
+    b = IntArg(0)
+
+    @monitor_on('a')
+    def scale(self):
+        self.b = self.b.parse(self.a.value() * 10)
+
+
+def test_given_value_wins_over_monitor() -> None:
+    assert _Scaled.from_dict({'a': 5}).b.value() == 50
+    assert _Scaled.from_dict({'a': 5, 'b': 7}).b.value() == 7
+    assert _Scaled.from_dict({'b': 7, 'a': 5}).b.value() == 7
+    assert _Scaled().apply_patch({'a': 5, 'b': 7}).b.value() == 7
+
+    conf = _Scaled.from_dict({'a': 5, 'b': 7})
+    assert _Scaled.from_dict(conf.to_dict()).to_dict() == {'a': 5, 'b': 7}
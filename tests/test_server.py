@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_server.py
+'''
+Tests of the HTTP configuration service, against a `ConfServer` on a free localhost port.
+'''
+
+from http.client import HTTPConnection
+import json
+import threading
+
+import pytest
+
+from example import TrainConf
+from hyperargs import Conf, IntArg, monitor_on
+from hyperargs.server import ConfServer, UnknownJob
+
+
+class _Failing(Conf):
+    a = IntArg(1)
+
+    @monitor_on('a')
+    def check(self):
+        if self.a.value() == 13:
+            raise RuntimeError("unlucky")
+
+
+def _serve(conf_cls):
+    server = ConfServer(conf_cls, ('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    return server, thread
+
+
+@pytest.fixture
+def client():
+    """Send requests over one keep-alive connection, a request returns the status and the decoded body."""
+    servers = []
+
+    def connect(conf_cls=TrainConf):
+        server, thread = _serve(conf_cls)
+        connection = HTTPConnection(*server.server_address[:2], timeout=10)
+        servers.append((server, thread, connection))
+
+        def request(method, path, body=None):
+            content = None if body is None else json.dumps(body)
+            headers = {} if content is None else {'Content-Type': 'application/json'}
+            connection.request(method, path, body=content, headers=headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        return request
+
+    yield connect
+    for server, thread, connection in servers:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_schema(client) -> None:
+    status, schema = client()('GET', '/schema')
+    assert status == 200
+    assert schema['class'] == 'TrainConf'
+    assert schema['fields']['batch_size']['value'] == 32
+
+
+def test_job_lifecycle(client) -> None:
+    request = client()
+    status, created = request('POST', '/jobs', {'batch_size': 8})
+    assert status == 201
+    job_id = created['id']
+    assert created['config']['batch_size'] == 8
+    assert request('GET', '/jobs') == (200, {'jobs': [job_id]})
+
+    status, patched = request('PATCH', f'/jobs/{job_id}', {'optimizer_type': 'sgd', 'int_arg': 4})
+    assert status == 200
+    assert patched['config']['optimizer_conf'] == {'lr': 0.001, 'momentum': 0.0}
+    assert patched['changes']['conditioned_arg'] == 8
+    assert request('GET', f'/jobs/{job_id}')[1]['config'] == patched['config']
+    assert 'momentum' in request('GET', f'/jobs/{job_id}/schema')[1]['fields']['optimizer_conf']['fields']
+
+    assert request('DELETE', f'/jobs/{job_id}') == (200, {'id': job_id})
+    assert request('GET', '/jobs') == (200, {'jobs': []})
+
+
+def test_invalid_patch_reports_every_path(client) -> None:
+    request = client()
+    job_id = request('POST', '/jobs')[1]['id']
+    status, response = request('PATCH', f'/jobs/{job_id}', {'batch_size': 0, 'use_gpu': True, 'missing': 1})
+    assert status == 422
+    assert set(response['errors']) == {'batch_size', 'missing'}
+    # The job keeps its previous configuration
+    assert request('GET', f'/jobs/{job_id}')[1]['config']['batch_size'] == 32
+
+
+def test_unknown_job_and_endpoint(client) -> None:
+    request = client()
+    assert request('GET', '/jobs/nope')[0] == 404
+    assert request('PATCH', '/jobs/nope', {'batch_size': 8})[0] == 404
+    assert request('DELETE', '/jobs/nope')[0] == 404
+    assert request('GET', '/nowhere')[0] == 404
+
+
+def test_unexpected_error_still_responds(client) -> None:
+    request = client(_Failing)
+    job_id = request('POST', '/jobs')[1]['id']
+    status, response = request('PATCH', f'/jobs/{job_id}', {'a': 13})
+    assert status == 500
+    assert 'unlucky' in response['error']
+    # The connection is still usable
+    assert request('GET', f'/jobs/{job_id}')[1]['config'] == {'a': 1}
+
+
+def test_unknown_job_in_process() -> None:
+    server = ConfServer(TrainConf, ('127.0.0.1', 0))
+    try:
+        with pytest.raises(UnknownJob):
+            server.get_job('nope')
+        with pytest.raises(UnknownJob):
+            server.delete_job('nope')
+    finally:
+        server.server_close()
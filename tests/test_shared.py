@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_shared.py
+'''
+Tests of `publish` and `attach`: the configuration read from the shared memory block, by this process, by worker
+processes and by unrelated processes, which must not remove the block when they exit.
+'''
+
+import functools
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
+
+from example import TrainConf
+from hyperargs.frozen import FrozenConf
+from hyperargs.shared import attach, publish
+
+
+def _conf() -> TrainConf:
+    return TrainConf.from_dict({'optimizer_type': 'sgd', 'len_lst': 2, 'lst': [{'lr': 0.5}],
+                                'optimizer_conf': {'lr': 0.02}})
+
+
+def _attach_fingerprint(_, name: str) -> str:
+    return attach(name, TrainConf).fingerprint()
+
+
+def test_round_trip() -> None:
+    conf = _conf()
+    with publish(conf) as shared:
+        frozen = shared.attach()
+        assert isinstance(frozen, FrozenConf)
+        assert frozen.to_dict() == conf.to_dict() and frozen.fingerprint() == conf.fingerprint()
+        assert attach(shared.name, TrainConf) == frozen
+
+
+def test_publish_a_snapshot() -> None:
+    frozen = _conf().freeze()
+    with publish(frozen) as shared:
+        assert shared.attach() == frozen
+
+
+def test_snapshot_outlives_the_block() -> None:
+    shared = publish(_conf())
+    frozen = shared.attach()
+    shared.unlink()
+    assert frozen.optimizer_conf.lr.value() == 0.02
+    with pytest.raises(FileNotFoundError):
+        attach(shared.name, TrainConf)
+
+
+def test_not_a_shared_configuration() -> None:
+    from multiprocessing import shared_memory
+    block = shared_memory.SharedMemory(create=True, size=16)
+    try:
+        block.buf[:8] = (1 << 20).to_bytes(8, 'little')
+        with pytest.raises(ValueError):
+            attach(block.name, TrainConf)
+    finally:
+        block.close()
+        block.unlink()
+
+
+@pytest.mark.parametrize('method', ['spawn', 'fork'])
+def test_worker_processes(method: str) -> None:
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f'No {method} start method')
+    conf = _conf()
+    with publish(conf) as shared:
+        with multiprocessing.get_context(method).Pool(2) as pool:
+            fingerprints = pool.map(functools.partial(_attach_fingerprint, name=shared.name), range(4))
+        assert fingerprints == [conf.fingerprint()] * 4
+        # The block is still there for the next workers
+        assert shared.attach().fingerprint() == conf.fingerprint()
+
+
+def test_unrelated_process_keeps_the_block() -> None:
+    conf = _conf()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(root, 'src'), os.path.join(root, 'example')]))
+    with publish(conf) as shared:
+        code = ('import sys; from example import TrainConf; from hyperargs.shared import attach; '
+                f'print(attach({shared.name!r}, TrainConf).fingerprint())')
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == conf.fingerprint()
+        # An attaching process leaves nothing for its resource tracker to clean up
+        assert 'leaked' not in result.stderr and 'Traceback' not in result.stderr
+        assert shared.attach().fingerprint() == conf.fingerprint()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_sweep.py
+'''
+Tests of the sweeps: the variants only depend on the inputs and the seed, not on the workers or the chunks.
+'''
+
+import json
+import os
+
+from example import TrainConf
+from hyperargs.sweep import SweepPlan, iter_sweep, materialize_sweep
+
+SPEC = {
+    'grid': {'optimizer_type': ['adam', 'sgd'], 'batch_size': [8, 16, 32]},
+    'random': {'optimizer_conf.lr': (1e-4, 1e-1, 'log'), 'num_epochs': (1, 20)},
+    'n': 3,
+    'seed': 7,
+}
+
+
+def _manifest(out_dir: str, **kwargs) -> dict:
+    with open(materialize_sweep(TrainConf, SPEC, out_dir, **kwargs), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_iter_sweep_is_deterministic() -> None:
+    variants = [conf.to_dict() for conf in iter_sweep(TrainConf(), SPEC['grid'], SPEC['random'], n=3, seed=7)]
+    assert len(variants) == len(SweepPlan(SPEC['grid'], SPEC['random'], n=3)) == 18
+    assert variants == [conf.to_dict() for conf in TrainConf().sweep(SPEC['grid'], SPEC['random'], n=3, seed=7)]
+
+    # The grid varies the last path fastest, the samples of a grid point are next to each other
+    assert [(v['optimizer_type'], v['batch_size']) for v in variants[:4]] == [('adam', 8)] * 3 + [('adam', 16)]
+    assert all(1e-4 <= v['optimizer_conf']['lr'] <= 1e-1 for v in variants)
+    # Random values follow the structure set by the monitors
+    assert all(('momentum' in v['optimizer_conf']) == (v['optimizer_type'] == 'sgd') for v in variants)
+
+
+def test_variants_do_not_depend_on_the_range() -> None:
+    plan = SweepPlan(SPEC['grid'], SPEC['random'], n=3, seed=7)
+    whole = [conf.to_dict() for _, conf in plan.iter_variants(TrainConf())]
+    parts = [conf.to_dict() for start in range(0, len(plan), 5)
+             for _, conf in plan.iter_variants(TrainConf(), start, start + 5)]
+    assert parts == whole
+
+
+def test_materialize_is_independent_of_workers(tmp_path) -> None:
+    serial = _manifest(str(tmp_path / 'serial'), workers=1, chunk_size=4)
+    parallel = _manifest(str(tmp_path / 'parallel'), workers=2, chunk_size=5)
+
+    assert serial['count'] == 18 and serial['errors'] == 0
+    assert serial['variants'] == parallel['variants']
+    for entry in serial['variants']:
+        with open(os.path.join(tmp_path, 'serial', entry['file']), encoding='utf-8') as f:
+            serial_file = f.read()
+        with open(os.path.join(tmp_path, 'parallel', entry['file']), encoding='utf-8') as f:
+            assert f.read() == serial_file
+
+
+def test_invalid_variants_are_reported(tmp_path) -> None:
+    spec = {'grid': {'batch_size': [8, 0, 16]}, 'seed': 1}
+    manifest = materialize_sweep(TrainConf, spec, str(tmp_path), workers=1)
+    with open(manifest, encoding='utf-8') as f:
+        entries = json.load(f)['variants']
+    assert ['error' in entry for entry in entries] == [False, True, False]
+    assert sorted(os.listdir(tmp_path)) == ['000000.json', '000002.json', 'manifest.json']